@@ -0,0 +1,43 @@
+"""Micro-benchmark: Flow transitions/sec with and without Flow.compile().
+
+    python benchmarks/flow_transitions.py [transitions]
+"""
+import asyncio, sys, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, AsyncNode, Flow, AsyncFlow
+
+class Step(Node):
+    def post(self, shared, prep_res, exec_res):
+        shared["n"] += 1
+        return "loop" if shared["n"] < shared["limit"] else "done"
+
+class AsyncStep(AsyncNode):
+    async def post_async(self, shared, prep_res, exec_res):
+        shared["n"] += 1
+        return "loop" if shared["n"] < shared["limit"] else "done"
+
+def build(flow_cls, node_cls):
+    a, b, end = node_cls(), node_cls(), node_cls()
+    a - "loop" >> b
+    b - "loop" >> a
+    a - "done" >> end
+    b - "done" >> end
+    return flow_cls(start=a)
+
+def measure(flow, transitions):
+    shared = {"n": 0, "limit": transitions}
+    start = time.perf_counter()
+    if isinstance(flow, AsyncFlow): asyncio.run(flow.run_async(shared))
+    else: flow.run(shared)
+    return transitions / (time.perf_counter() - start)
+
+def main(transitions=200_000):
+    for label, flow_cls, node_cls in [("Flow", Flow, Step), ("AsyncFlow", AsyncFlow, AsyncStep)]:
+        before = measure(build(flow_cls, node_cls), transitions)
+        after = measure(build(flow_cls, node_cls).compile(), transitions)
+        print(f"{label:<10} {before:>12,.0f}/s  compiled {after:>12,.0f}/s  ({after / before:.2f}x)")
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:]))
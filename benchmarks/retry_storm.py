@@ -0,0 +1,59 @@
+"""Simulated 429 pressure: fixed `wait` vs RetryPolicy backoff with jitter.
+
+A fake endpoint admits `rate` requests/sec (token bucket, small burst) and
+rejects the rest with RateLimited. Like a real overloaded service, each
+rejection still costs it some capacity (`reject_cost` tokens). 200 items hit it through one
+AsyncParallelBatchNode; we report completions/sec and rejected calls.
+
+    python benchmarks/retry_storm.py
+"""
+import asyncio, sys, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import AsyncParallelBatchNode, RetryPolicy
+
+class RateLimited(Exception): pass
+
+class Endpoint:
+    def __init__(self, rate, burst, reject_cost=0.5):
+        self.rate, self.burst, self.reject_cost = rate, burst, reject_cost
+        self.tokens, self.last, self.rejected = burst, time.monotonic(), 0
+
+    async def call(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+        if self.tokens < 1:
+            self.rejected += 1
+            self.tokens -= self.reject_cost
+            raise RateLimited()
+        self.tokens -= 1
+        await asyncio.sleep(0.005)
+
+class Caller(AsyncParallelBatchNode):
+    async def prep_async(self, shared):
+        return range(shared["items"])
+
+    async def exec_async(self, item):
+        await self.params["endpoint"].call()
+        return True
+
+    async def exec_fallback_async(self, prep_res, exc):
+        return False
+
+    async def post_async(self, shared, prep_res, exec_res):
+        shared["ok"] = sum(exec_res)
+
+def run(label, **node_kwargs):
+    endpoint, shared = Endpoint(rate=400, burst=10), {"items": 200}
+    node = Caller(max_retries=50, **node_kwargs)
+    node.set_params({"endpoint": endpoint})
+    start = time.perf_counter()
+    asyncio.run(node.run_async(shared))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} ok={shared['ok']:>3}  {shared['ok'] / elapsed:>7.1f}/s  rejected={endpoint.rejected}")
+
+if __name__ == "__main__":
+    run("fixed wait=0.05", wait=0.05)
+    run("backoff + full jitter", retry=RetryPolicy(base=0.05, max_delay=1))
@@ -0,0 +1,124 @@
+"""Benchmark suite for the orchestration core, with JSON output for comparing commits.
+
+    python benchmarks/suite.py                       # run everything, print a table
+    python benchmarks/suite.py -o base.json          # also record results as JSON
+    python benchmarks/suite.py --compare base.json   # show the change against a recorded run
+    python benchmarks/suite.py --only async --items 1000000
+
+Every benchmark uses no-op nodes, so the numbers measure pocketflow's own overhead.
+Each one is repeated `--repeat` times; the best run is kept.
+"""
+import argparse, asyncio, gc, json, platform, subprocess, sys, time, tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, Flow, BatchFlow, AsyncParallelBatchNode
+
+class Step(Node):
+    def post(self, shared, prep_res, exec_res):
+        shared["n"] += 1
+
+class Flaky(Node):
+    def exec(self, prep_res):
+        if self.cur_retry < self.max_retries - 1: raise RuntimeError("retry")
+
+class Items(AsyncParallelBatchNode):
+    async def prep_async(self, shared):
+        return range(shared["items"])
+
+    async def exec_async(self, item):
+        return item
+
+class Parked(Items):
+    async def exec_async(self, item):
+        self.params["started"][0] += 1
+        if self.params["started"][0] == self.params["in_flight"]: self.params["peak"][0] = tracemalloc.get_traced_memory()[0]
+        await self.params["release"].wait()
+
+class Wide(BatchFlow):
+    def prep(self, shared):
+        return [{"i": i} for i in range(shared["items"])]
+
+def timed(fn):
+    gc.collect(); start = time.perf_counter(); fn(); return time.perf_counter() - start
+
+def linear(length, compiled, runs=50):
+    nodes = [Step() for _ in range(length)]
+    for a, b in zip(nodes, nodes[1:]): a >> b
+    flow = Flow(start=nodes[0])
+    if compiled: flow.compile()
+    return length * runs / timed(lambda: [flow.run({"n": 0}) for _ in range(runs)]), "transitions/s"
+
+def nested(depth, runs=1000):
+    flow = Flow(start=Step())
+    for _ in range(depth): flow = Flow(start=flow)
+    return depth * runs / timed(lambda: [flow.run({"n": 0}) for _ in range(runs)]), "transitions/s"
+
+def wide(items):
+    flow = Wide(start=Step())
+    return items / timed(lambda: flow.run({"n": 0, "items": items})), "items/s"
+
+def parallel(items, max_concurrency):
+    node = Items(max_concurrency=max_concurrency)
+    return items / timed(lambda: asyncio.run(node.run_async({"items": items}))), "items/s"
+
+def retries(calls, attempts=5):
+    node = Flaky(max_retries=attempts)
+    return calls * attempts / timed(lambda: [node.run({}) for _ in range(calls)]), "attempts/s"
+
+def memory(items, max_concurrency):
+    async def run():
+        node, release = Parked(max_concurrency=max_concurrency), asyncio.Event()
+        node.set_params({"started": [0], "peak": [0], "release": release, "in_flight": min(items, max_concurrency or items)})
+        task = asyncio.ensure_future(node.run_async({"items": items}))
+        while not node.params["peak"][0]: await asyncio.sleep(0)
+        release.set(); await task
+        return node.params["peak"][0]
+    gc.collect(); tracemalloc.start()
+    try: base = tracemalloc.get_traced_memory()[0]; peak = asyncio.run(run())
+    finally: tracemalloc.stop()
+    return (peak - base) / min(items, max_concurrency or items), "bytes/item"
+
+def benchmarks(args):
+    n = args.items
+    return {
+        "linear_1000": lambda: linear(1000, False),
+        "linear_1000_compiled": lambda: linear(1000, True),
+        "nested_depth_50": lambda: nested(50),
+        "batchflow_wide_10k": lambda: wide(10_000),
+        f"async_parallel_{n}": lambda: parallel(n, None),
+        f"async_parallel_{n}_bounded_100": lambda: parallel(n, 100),
+        "retry_heavy_5_attempts": lambda: retries(20_000),
+        "memory_in_flight_10k": lambda: memory(10_000, None),
+        "memory_in_flight_bounded_100": lambda: memory(10_000, 100),
+    }
+
+def commit():
+    try: return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=Path(__file__).parent).stdout.strip() or None
+    except OSError: return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-o", "--output", help="write results to this JSON file")
+    parser.add_argument("--compare", help="JSON file from an earlier run to compare against")
+    parser.add_argument("--only", default="", help="run only benchmarks whose name contains this")
+    parser.add_argument("--items", type=int, default=10_000, help="items for the AsyncParallelBatchNode benchmarks (10k-1M)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+    base = json.loads(Path(args.compare).read_text())["results"] if args.compare else {}
+    results = {}
+    for name, fn in benchmarks(args).items():
+        if args.only not in name: continue
+        runs = [fn() for _ in range(args.repeat)]
+        unit = runs[0][1]
+        value = min(v for v, _ in runs) if unit == "bytes/item" else max(v for v, _ in runs)
+        results[name] = {"value": value, "unit": unit}
+        old = base.get(name, {}).get("value")
+        change = f"  {value / old - 1:+7.1%}" if old else ""
+        print(f"{name:<34} {value:>14,.1f} {unit}{change}")
+    report = {"commit": commit(), "python": platform.python_version(), "platform": platform.platform(), "time": time.time(), "results": results}
+    if args.output: Path(args.output).write_text(json.dumps(report, indent=2))
+    return report
+
+if __name__ == "__main__":
+    main()
@@ -2,5 +2,5 @@ from pocketflow import AsyncFlow
 from nodes import StreamingChatNode
 
 def create_streaming_chat_flow():
-    chat_node = StreamingChatNode()
+    chat_node = StreamingChatNode(max_retries=3, wait=1)
     return AsyncFlow(start=chat_node) 
\ No newline at end of file
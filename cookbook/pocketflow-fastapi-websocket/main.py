@@ -2,6 +2,7 @@ import json
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
+from pocketflow import STREAM_RESET
 from flow import create_streaming_chat_flow
 
 app = FastAPI()
@@ -17,7 +18,6 @@ async def websocket_endpoint(websocket: WebSocket):
     
     # Initialize conversation history for this connection
     shared_store = {
-        "websocket": websocket,
         "conversation_history": []
     }
     
@@ -30,7 +30,14 @@ async def websocket_endpoint(websocket: WebSocket):
             shared_store["user_message"] = message.get("content", "")
             
             flow = create_streaming_chat_flow()
-            await flow.run_async(shared_store)
+            await websocket.send_text(json.dumps({"type": "start", "content": ""}))
+            async for _, chunk_content in flow.stream(shared_store):
+                if chunk_content is STREAM_RESET:
+                    # A failed attempt is being retried: drop its partial reply
+                    await websocket.send_text(json.dumps({"type": "reset", "content": ""}))
+                    continue
+                await websocket.send_text(json.dumps({"type": "chunk", "content": chunk_content}))
+            await websocket.send_text(json.dumps({"type": "end", "content": ""}))
             
     except WebSocketDisconnect:
         pass
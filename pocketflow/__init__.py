@@ -1,7 +1,58 @@
-import asyncio, warnings, copy, time
+import asyncio, warnings, copy, time, functools, contextvars, contextlib, random, threading, collections.abc, os, pickle, sqlite3, hashlib, itertools, marshal, multiprocessing, tempfile, shutil, importlib, inspect, io, mmap
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait as wait_futures
+
+_listeners,_span=[],contextvars.ContextVar("pocketflow_span",default=())
+def add_listener(fn): _listeners.append(fn); return fn
+def remove_listener(fn): _listeners.remove(fn)
+def _emit(event,node,**info):
+    info["path"]=_span.get()
+    for fn in list(_listeners): fn(event,node,info)
+def _phase(event,node,t): now=time.perf_counter(); _emit(event,node,duration=now-t); return now
+
+@contextlib.contextmanager
+def _node_span(node):
+    token,end=_span.set(_span.get()+(type(node).__name__,)),{"action":None,"error":None}
+    _emit("node_start",node); t=time.perf_counter()
+    try: yield end
+    except BaseException as e: end["error"]=e; raise
+    finally: _emit("node_end",node,duration=time.perf_counter()-t,**end); _span.reset(token)
+def _traced(node,fn,*args):
+    with _node_span(node) as end: end["action"]=fn(*args); return end["action"]
+async def _traced_async(node,aw):
+    with _node_span(node) as end: end["action"]=await aw; return end["action"]
+
+class TimingCollector:
+    def __init__(self,buckets=(0.001,0.01,0.1,1,10,60)):
+        self.buckets,self.latencies,self.stacks,self.events,self._lock=tuple(buckets),collections.defaultdict(list),collections.defaultdict(float),collections.Counter(),threading.Lock()
+    def __call__(self,event,node,info):
+        name=type(node).__name__
+        with self._lock:
+            self.events[name,event]+=1
+            if event=="node_end": self.latencies[name].append(info["duration"]); self.stacks[info["path"]]+=info["duration"]
+            elif event in ("prep","exec","post"): self.stacks[info["path"]+(event,)]+=info["duration"]
+    def __enter__(self): add_listener(self); return self
+    def __exit__(self,*exc): remove_listener(self)
+    def histogram(self,name):
+        counts=[0]*(len(self.buckets)+1)
+        for d in self.latencies[name]: counts[next((i for i,b in enumerate(self.buckets) if d<=b),len(self.buckets))]+=1
+        return list(zip(self.buckets+(float("inf"),),counts))
+    def summary(self):
+        out={}
+        for name,ds in self.latencies.items():
+            ds=sorted(ds); pct=lambda q: ds[min(len(ds)-1,int(q*len(ds)))]
+            out[name]={"count":len(ds),"total":sum(ds),"mean":sum(ds)/len(ds),"p50":pct(0.5),"p95":pct(0.95),"max":ds[-1]}
+        return out
+    def folded(self):
+        child=collections.defaultdict(float)
+        for path,d in self.stacks.items():
+            if len(path)>1: child[path[:-1]]+=d
+        return "\n".join(f"{';'.join(path)} {round(max(0.0,d-child[path])*1e6)}" for path,d in sorted(self.stacks.items()))
 
 class BaseNode:
+    reads=writes=version=None
     def __init__(self): self.params,self.successors={},{}
+    def __copy__(self): n=object.__new__(type(self)); n.__dict__.update(self.__dict__); return n
     def set_params(self,params): self.params=params
     def next(self,node,action="default"):
         if action in self.successors: warnings.warn(f"Overwriting successor for action '{action}'")
@@ -10,10 +61,14 @@ class BaseNode:
     def exec(self,prep_res): pass
     def post(self,shared,prep_res,exec_res): pass
     def _exec(self,prep_res): return self.exec(prep_res)
-    def _run(self,shared): p=self.prep(shared); e=self._exec(p); return self.post(shared,p,e)
+    def _run(self,shared):
+        if _listeners: return self._run_traced(shared)
+        p=self.prep(shared); e=self._exec(p); return self.post(shared,p,e)
+    def _run_traced(self,shared):
+        t=time.perf_counter(); p=self.prep(shared); t=_phase("prep",self,t); e=self._exec(p); t=_phase("exec",self,t); r=self.post(shared,p,e); _phase("post",self,t); return r
     def run(self,shared): 
         if self.successors: warnings.warn("Node won't run successors. Use Flow.")  
-        return self._run(shared)
+        return _traced(self,self._run,shared) if _listeners else self._run(shared)
     def __rshift__(self,other): return self.next(other)
     def __sub__(self,action):
         if isinstance(action,str): return _ConditionalTransition(self,action)
@@ -23,78 +78,1062 @@ class _ConditionalTransition:
     def __init__(self,src,action): self.src,self.action=src,action
     def __rshift__(self,tgt): return self.src.next(tgt,self.action)
 
+_deadline=contextvars.ContextVar("pocketflow_deadline",default=None)
+
+def _time_left(timeout=None):
+    d=_deadline.get()
+    if d is None: return timeout
+    left=d-time.monotonic()
+    if left<=0: raise TimeoutError("Flow deadline exceeded")
+    return left if timeout is None else min(left,timeout)
+
+@contextlib.contextmanager
+def _deadline_scope(timeout):
+    if timeout is None: yield; return
+    d,cur=time.monotonic()+timeout,_deadline.get()
+    token=_deadline.set(d if cur is None else min(cur,d))
+    try: yield
+    finally: _deadline.reset(token)
+
+def _in_deadline(deadline,fn,*args):
+    token=_deadline.set(deadline)
+    try: return fn(*args)
+    finally: _deadline.reset(token)
+
+def _call_with_timeout(fn,arg,timeout):
+    if timeout is None: _time_left(); res=fn(arg); _time_left(); return res
+    timeout=_time_left(timeout); out,ctx=[],contextvars.copy_context()
+    def target():
+        try: out.append((True,ctx.run(fn,arg)))
+        except BaseException as e: out.append((False,e))
+    t=threading.Thread(target=target,daemon=True); t.start(); t.join(timeout)
+    if not out: raise TimeoutError(f"exec timed out after {timeout:.3g}s")
+    ok,res=out[0]
+    if ok: return res
+    raise res
+
+async def _wait_for(fn,arg,timeout):
+    if timeout is None: return await fn(arg)
+    try: return await asyncio.wait_for(fn(arg),timeout)
+    except asyncio.TimeoutError: raise TimeoutError(f"exec_async timed out after {timeout:.3g}s") from None
+
+def _retry_after(exc):
+    hint=getattr(exc,"retry_after",None)
+    headers=getattr(getattr(exc,"response",None),"headers",None)
+    if hint is None and headers is not None: hint=headers.get("Retry-After") or headers.get("retry-after")
+    if hint is None: return None
+    try: return max(0.0,float(hint))
+    except (TypeError,ValueError): pass
+    try: return max(0.0,parsedate_to_datetime(hint).timestamp()-time.time())
+    except (TypeError,ValueError): return None
+
+class RetryBudget:
+    def __init__(self,max_tokens=10,refill=0.1): self.max_tokens,self.refill,self.tokens,self._lock=max_tokens,refill,float(max_tokens),threading.Lock()
+    def withdraw(self):
+        with self._lock:
+            if self.tokens<1: return False
+            self.tokens-=1; return True
+    def deposit(self):
+        with self._lock: self.tokens=min(self.max_tokens,self.tokens+self.refill)
+    def __getstate__(self): return {k:v for k,v in self.__dict__.items() if k!="_lock"}
+    def __setstate__(self,state): self.__dict__.update(state); self._lock=threading.Lock()
+
+class RateLimiter:
+    def __init__(self,requests=None,tokens=None,per=60,burst=1.0):
+        self.requests,self.tokens,self.per,self.burst=requests,tokens,per,burst
+        self._level,self._last,self._lock=[(l or 0)*burst for l in (requests,tokens)],time.monotonic(),threading.Lock()
+    def _refill(self):
+        now=time.monotonic(); dt,self._last=now-self._last,now
+        for i,l in enumerate((self.requests,self.tokens)):
+            if l is not None: self._level[i]=min(l*self.burst,self._level[i]+dt*l/self.per)
+    def _reserve(self,tokens,timeout):
+        with self._lock:
+            self._refill(); need=[(i,l,a) for i,(l,a) in enumerate(((self.requests,1),(self.tokens,tokens))) if l is not None]
+            wait=max([(a-self._level[i])*self.per/l for i,l,a in need]+[0.0])
+            if timeout is not None and wait>timeout: raise TimeoutError("Rate limit wait exceeds deadline")
+            for i,l,a in need: self._level[i]-=a
+            return wait
+    def acquire(self,tokens=0,timeout=None):
+        w=self._reserve(tokens,timeout)
+        if w>0: time.sleep(w)
+    async def acquire_async(self,tokens=0,timeout=None):
+        w=self._reserve(tokens,timeout)
+        if w>0: await asyncio.sleep(w)
+    def adjust(self,tokens):
+        with self._lock: self._refill(); self._level[1]-=tokens
+    __getstate__,__setstate__=RetryBudget.__getstate__,RetryBudget.__setstate__
+
+class RetryPolicy:
+    def __init__(self,base=1,max_delay=60,factor=2,jitter=True,retry_on=(Exception,),budget=None):
+        self.base,self.max_delay,self.factor,self.jitter,self.retry_on,self.budget=base,max_delay,factor,jitter,retry_on,budget
+    def retryable(self,exc): return isinstance(exc,self.retry_on) and (self.budget is None or self.budget.withdraw())
+    def delay(self,attempt,exc):
+        d=min(self.max_delay,self.base*self.factor**attempt)
+        if self.jitter: d=random.uniform(0,d)
+        hint=_retry_after(exc)
+        return d if hint is None else max(d,hint)
+    def succeeded(self):
+        if self.budget is not None: self.budget.deposit()
+
+_MISS=object()
+
+class Cache:
+    def __init__(self,maxsize=1024,path=None,ttl=None,max_bytes=None,version="",evict_every=64):
+        self.maxsize,self.path,self.ttl,self.max_bytes,self.version,self.evict_every=maxsize,path,ttl,max_bytes,version,evict_every
+        self._mem,self._lock,self._writes=collections.OrderedDict(),threading.Lock(),0
+        if path: self._execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB, created REAL, used REAL, size INTEGER)")
+    def __getstate__(self): return {**self.__dict__,"_mem":collections.OrderedDict(),"_lock":None}
+    def __setstate__(self,state): self.__dict__.update(state); self._lock=threading.Lock()
+    def _execute(self,sql,*args):
+        with contextlib.closing(sqlite3.connect(self.path)) as db, db: return db.execute(sql,args).fetchall()
+    def key(self,node,prep_res):
+        try: return hashlib.sha256(pickle.dumps((type(node).__module__,type(node).__qualname__,self.version,prep_res),protocol=4)).hexdigest()
+        except Exception: return None
+    def _fresh(self,created,now): return self.ttl is None or now-created<self.ttl
+    def _remember(self,key,created,value):
+        with self._lock:
+            self._mem[key]=(created,value); self._mem.move_to_end(key)
+            while len(self._mem)>self.maxsize: self._mem.popitem(last=False)
+    def get_many(self,keys):
+        res,now,disk=[_MISS]*len(keys),time.time(),{}
+        with self._lock:
+            for j,k in enumerate(keys):
+                if k is None: continue
+                hit=self._mem.get(k)
+                if hit and self._fresh(hit[0],now): self._mem.move_to_end(k); res[j]=hit[1]
+                else: self._mem.pop(k,None); disk.setdefault(k,[]).append(j)
+        if disk and self.path:
+            ks=list(disk)
+            for c in range(0,len(ks),500):
+                chunk=ks[c:c+500]; q=",".join("?"*len(chunk))
+                for k,blob,created in self._execute(f"SELECT key,value,created FROM cache WHERE key IN ({q})",*chunk):
+                    if not self._fresh(created,now): continue
+                    v=pickle.loads(blob); self._remember(k,created,v)
+                    for j in disk[k]: res[j]=v
+                self._execute(f"UPDATE cache SET used=? WHERE key IN ({q})",now,*chunk)
+        return res
+    def get(self,key): return self.get_many([key])[0]
+    def set(self,key,value):
+        if key is None: return
+        now=time.time(); self._remember(key,now,value)
+        if not self.path: return
+        blob=pickle.dumps(value); self._execute("INSERT OR REPLACE INTO cache VALUES (?,?,?,?,?)",key,blob,now,now,len(blob))
+        with self._lock: self._writes+=1; due=self._writes%self.evict_every==0
+        if due: self.evict()
+    def evict(self):
+        if not self.path: return
+        if self.ttl is not None: self._execute("DELETE FROM cache WHERE created<?",time.time()-self.ttl)
+        if self.max_bytes is None: return
+        over=(self._execute("SELECT SUM(size) FROM cache")[0][0] or 0)-self.max_bytes
+        if over<=0: return
+        drop=[]
+        for k,size in self._execute("SELECT key,size FROM cache ORDER BY used"):
+            if over<=0: break
+            drop.append(k); over-=size
+        for c in range(0,len(drop),500): self._execute(f"DELETE FROM cache WHERE key IN ({','.join('?'*len(drop[c:c+500]))})",*drop[c:c+500])
+    def clear(self):
+        with self._lock: self._mem.clear()
+        if self.path: self._execute("DELETE FROM cache")
+
 class Node(BaseNode):
-    def __init__(self,max_retries=1,wait=0): super().__init__(); self.max_retries,self.wait=max_retries,wait
+    batch_size=max_wait=None
+    def __init__(self,max_retries=1,wait=0,retry=None,timeout=None,cache=None,rate_limit=None): super().__init__(); self.max_retries,self.wait,self.retry,self.timeout,self.cache,self.rate_limit=max_retries,wait,retry,timeout,Cache() if cache is True else cache,rate_limit
+    def estimate_tokens(self,prep_res): return 0
+    def exec_batch(self,items): return [self.exec(i) for i in items]
     def exec_fallback(self,prep_res,exc): raise exc
+    def _retryable(self,exc): return self.retry is None or self.retry.retryable(exc)
+    def _retry_wait(self,exc):
+        w,d=self.wait if self.retry is None else self.retry.delay(self.cur_retry,exc),_deadline.get()
+        return w if d is None else min(w,max(0.0,d-time.monotonic()))
     def _exec(self,prep_res):
+        if self.cache is None: return self._exec_one(prep_res)
+        k=self.cache.key(self,prep_res); res=self.cache.get(k)
+        return self._exec_one(prep_res,k) if res is _MISS else res
+    def _batch(self,items,run):
+        if self.cache is None: res,miss=run(items or [],itertools.repeat(None)),None
+        else:
+            items=list(items or []); keys=[self.cache.key(self,i) for i in items]; res=self.cache.get_many(keys); miss=[j for j,r in enumerate(res) if r is _MISS]
+            for j,r in zip(miss,run([items[j] for j in miss],[keys[j] for j in miss])): res[j]=r
+        if _listeners: _emit("batch",self,items=len(res),cached=0 if miss is None else len(res)-len(miss))
+        return res
+    def _attempt(self,prep_res,batch=False):
+        if self.rate_limit is not None: self.rate_limit.acquire(sum(map(self.estimate_tokens,prep_res)) if batch else self.estimate_tokens(prep_res),_time_left(self.timeout))
+        return _call_with_timeout(self.exec,prep_res,self.timeout) if not batch else _check_batch(prep_res,_call_with_timeout(self.exec_batch,prep_res,self.timeout))
+    def _exec_chunk(self,items,keys):
+        res=self._exec_one(items,batch=True)
+        for j,(x,k,r) in enumerate(zip(items,keys,res)):
+            if isinstance(r,Exception): res[j]=self._exec_one(x,k)
+            elif k is not None: self.cache.set(k,r)
+        return res
+    def _exec_one(self,prep_res,key=None,batch=False):
+        fast=not batch and self.timeout is None and self.rate_limit is None and _deadline.get() is None
         for self.cur_retry in range(self.max_retries):
-            try: return self.exec(prep_res)
+            try: res=self.exec(prep_res) if fast else self._attempt(prep_res,batch)
             except Exception as e:
-                if self.cur_retry==self.max_retries-1: return self.exec_fallback(prep_res,e)
-                if self.wait>0: time.sleep(self.wait)
+                if self.cur_retry==self.max_retries-1 or not self._retryable(e):
+                    if batch: return [e]*len(prep_res)
+                    if _listeners: _emit("fallback",self,error=e)
+                    return self.exec_fallback(prep_res,e)
+                w=self._retry_wait(e)
+                if _listeners: _emit("retry",self,attempt=self.cur_retry,error=e,wait=w)
+                if w>0: time.sleep(w)
+            else:
+                if self.retry is not None: self.retry.succeeded()
+                if key is not None: self.cache.set(key,res)
+                return res
+
+def _check_batch(items,res):
+    res=list(res)
+    if len(res)!=len(items): raise ValueError(f"exec_batch returned {len(res)} results for {len(items)} items")
+    return res
+def _chunks(pairs,n):
+    it=iter(pairs)
+    while c:=list(itertools.islice(it,n)): yield tuple(map(list,zip(*c)))
 
 class BatchNode(Node):
-    def _exec(self,items): return [super(BatchNode,self)._exec(i) for i in (items or [])]
+    def __init__(self,max_retries=1,wait=0,batch_size=None,**kwargs): super().__init__(max_retries,wait,**kwargs); self.batch_size=batch_size
+    def _exec(self,items): return self._batch(items,self._run_items)
+    def _run_items(self,xs,ks):
+        if not self.batch_size: return [self._exec_one(x,k) for x,k in zip(xs,ks)]
+        return [r for c in _chunks(zip(xs,ks),self.batch_size) for r in self._exec_chunk(*c)]
+
+_resuming,_ckpt_lock=contextvars.ContextVar("pocketflow_resuming",default=False),threading.Lock()
+_incremental=contextvars.ContextVar("pocketflow_incremental",default=None)
+_item_shared=contextvars.ContextVar("pocketflow_item_shared")
+_stream_sink=contextvars.ContextVar("pocketflow_stream_sink",default=None)
+
+@contextlib.contextmanager
+def _incremental_scope(store):
+    if store is None: yield; return
+    token=_incremental.set(store)
+    try: yield
+    finally: _incremental.reset(token)
+
+@functools.lru_cache(maxsize=None)
+def _code_digest(cls):
+    h=hashlib.sha256()
+    for c in cls.__mro__:
+        if c.__module__==__name__: continue
+        for name,v in sorted(vars(c).items()):
+            f=getattr(v,"__func__",getattr(v,"fget",v))
+            if hasattr(f,"__code__"): h.update(marshal.dumps(f.__code__)); continue
+            if name.startswith("__") or callable(v) or isinstance(v,(property,classmethod,staticmethod)): continue
+            try: h.update(name.encode()+pickle.dumps(v,protocol=4))
+            except Exception: h.update(name.encode()+repr(v).encode())
+    return h.hexdigest()
+
+class DirCheckpoint:
+    def __init__(self,path,key="checkpoint"): os.makedirs(path,exist_ok=True); self.file=os.path.join(path,f"{key}.pkl")
+    def save(self,state):
+        tmp=f"{self.file}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp,"wb") as f: pickle.dump(state,f)
+        os.replace(tmp,self.file)
+    def load(self):
+        try:
+            with open(self.file,"rb") as f: return pickle.load(f)
+        except FileNotFoundError: return None
+    def clear(self):
+        try: os.remove(self.file)
+        except FileNotFoundError: pass
+
+class SQLiteCheckpoint:
+    def __init__(self,path,key="checkpoint"):
+        self.path,self.key=path,key
+        self._execute("CREATE TABLE IF NOT EXISTS checkpoints (key TEXT PRIMARY KEY, state BLOB)")
+    def _execute(self,sql,*args):
+        with contextlib.closing(sqlite3.connect(self.path)) as db, db: return db.execute(sql,args).fetchone()
+    def save(self,state): self._execute("INSERT OR REPLACE INTO checkpoints VALUES (?,?)",self.key,pickle.dumps(state))
+    def load(self):
+        row=self._execute("SELECT state FROM checkpoints WHERE key=?",self.key)
+        return pickle.loads(row[0]) if row else None
+    def clear(self): self._execute("DELETE FROM checkpoints WHERE key=?",self.key)
 
 class Flow(BaseNode):
-    def __init__(self,start=None): super().__init__(); self.start_node=start
-    def start(self,start): self.start_node=start; return start
+    _plan=timeout=checkpoint=incremental=None
+    def __init__(self,start=None,timeout=None,checkpoint=None,incremental=None): super().__init__(); self.start_node,self.timeout,self.checkpoint,self.incremental=start,timeout,checkpoint,incremental
+    def start(self,start): self.start_node,self._plan=start,None; return start
     def get_next_node(self,curr,action):
         nxt=curr.successors.get(action or "default")
         if not nxt and curr.successors: warnings.warn(f"Flow ends: '{action}' not found in {list(curr.successors)}")
         return nxt
-    def _orch(self,shared,params=None):
-        curr,p,last_action =copy.copy(self.start_node),(params or {**self.params}),None
-        while curr: curr.set_params(p); last_action=curr._run(shared); curr=copy.copy(self.get_next_node(curr,last_action))
+    def compile(self):
+        nodes,idx,todo=[],{},[self.start_node]
+        while todo:
+            n=todo.pop()
+            if id(n) in idx: continue
+            if not isinstance(n,BaseNode): raise TypeError(f"Flow nodes must be BaseNode instances, got {type(n).__name__}")
+            idx[id(n)]=len(nodes); nodes.append(n); todo.extend(reversed(list(n.successors.values())))
+        self._plan=(nodes,[{a:idx[id(s)] for a,s in n.successors.items()} for n in nodes]); return self
+    def _next_index(self,i,action):
+        t=self._plan[1][i]; j=t.get(action or "default")
+        if j is None and t: warnings.warn(f"Flow ends: '{action}' not found in {list(t)}")
+        return j
+    @contextlib.contextmanager
+    def _scope(self,shared):
+        with _deadline_scope(self.timeout),_incremental_scope(self.incremental):
+            if self.checkpoint is None: yield; return
+            state=self.checkpoint.load() if _resuming.get() else None
+            if state: shared.update(state.pop("shared"))
+            self._ckpt=state or {"done":set(),"pos":{}}
+            yield
+            self.checkpoint.clear()
+    def _fingerprint(self,node,shared):
+        store=_incremental.get() if self.incremental is None else self.incremental
+        if store is None or node.reads is None or node.writes is None or isinstance(node,Flow): return None,None
+        return store,store.key(node,(_code_digest(type(node)),node.version,node.params,{k:shared[k] for k in node.reads if k in shared}))
+    def _replay(self,node,shared):
+        store,key=self._fingerprint(node,shared); hit=_MISS if key is None else store.get(key)
+        if hit is not _MISS:
+            shared.update(copy.deepcopy(hit[1]))
+            if _listeners: _emit("replayed",node)
+        return store,key,hit
+    def _record(self,node,shared,store,key,action):
+        if key is not None: store.set(key,(action,copy.deepcopy({k:shared[k] for k in node.writes if k in shared})))
+        return action
+    def _run_node(self,curr,shared): return _traced(curr,self._step,curr,shared) if _listeners else self._step(curr,shared)
+    def _plain(self): return not _listeners and (_incremental.get() if self.incremental is None else self.incremental) is None
+    def _step(self,curr,shared):
+        store,key,hit=self._replay(curr,shared)
+        return hit[0] if hit is not _MISS else self._record(curr,shared,store,key,curr._run(shared))
+    def _save_checkpoint(self,shared,item=None,pos=None):
+        with _ckpt_lock:
+            if pos is None: self._ckpt["done"].add(item); self._ckpt["pos"].pop(item,None)
+            else: self._ckpt["pos"][item]=pos
+            self.checkpoint.save({**self._ckpt,"shared":shared})
+    def _start_at(self,item,params):
+        pos=self._ckpt["pos"].get(item) if self.checkpoint is not None else None
+        if pos is None: return 0,None,(params or {**self.params})
+        return self._next_index(pos[0],pos[1]),pos[1],pos[2]
+    def _skip(self,item): return self.checkpoint is not None and item in self._ckpt["done"]
+    def _orch_plan(self,shared,params=None,item=None):
+        (nodes,trans),ckpt=self._plan,self.checkpoint
+        i,last_action,p=(0,None,params or {**self.params}) if ckpt is None else self._start_at(item,params)
+        run,plain,timed=[None]*len(nodes),self._plain(),_deadline.get() is not None
+        while i is not None:
+            if timed: _time_left()
+            node=run[i]
+            if node is None: node=run[i]=copy.copy(nodes[i]); node.set_params(p)
+            last_action=node._run(shared) if plain else self._run_node(node,shared)
+            if ckpt is not None: self._save_checkpoint(shared,item,(i,last_action,p))
+            t=trans[i]; i=t.get(last_action or "default")
+            if i is None and t: warnings.warn(f"Flow ends: '{last_action}' not found in {list(t)}")
+        return last_action
+    def _orch(self,shared,params=None,item=None):
+        if self.checkpoint is not None and self._plan is None: self.compile()
+        if self._plan: return self._orch_plan(shared,params,item)
+        curr,p,last_action,plain,timed=copy.copy(self.start_node),(params or {**self.params}),None,self._plain(),_deadline.get() is not None
+        while curr:
+            if timed: _time_left()
+            curr.set_params(p); last_action=curr._run(shared) if plain else self._run_node(curr,shared); curr=copy.copy(self.get_next_node(curr,last_action))
         return last_action
-    def _run(self,shared): p=self.prep(shared); o=self._orch(shared); return self.post(shared,p,o)
+    def _run(self,shared):
+        with self._scope(shared): p=self.prep(shared); o=self._orch(shared); return self.post(shared,p,o)
     def post(self,shared,prep_res,exec_res): return exec_res
+    def resume(self,shared):
+        token=_resuming.set(True)
+        try: return self.run(shared)
+        finally: _resuming.reset(token)
+    def to_spec(self): return _to_spec(self)
+    @classmethod
+    def from_spec(cls,spec):
+        flow=_from_spec(spec)
+        if not isinstance(flow,cls): raise TypeError(f"Spec builds a {type(flow).__name__}, not a {cls.__name__}")
+        return flow
 
 class BatchFlow(Flow):
+    def _batch_item(self,shared,bp,item):
+        self._orch(shared,{**self.params,**bp},item)
+        if self.checkpoint is not None: self._save_checkpoint(shared,item)
+    def _run(self,shared):
+        with self._scope(shared):
+            pr=self.prep(shared) or []
+            for i,bp in enumerate(pr):
+                if not self._skip(i): self._batch_item(shared,bp,i)
+            return self.post(shared,pr,None)
+
+class StreamNode(Node):
+    flatten=False
+    def _stream(self,items):
+        for res in (self._exec(i) for i in items) if not self.batch_size else (r for c in _chunks(((i,None) for i in items),self.batch_size) for r in self._exec_chunk(*c)):
+            if self.flatten: yield from res
+            else: yield res
+
+class StreamFlow(Flow):
+    def _stages(self,params):
+        stages,n,p=[],self.start_node,(params or {**self.params})
+        while n is not None:
+            if any(n is s for s in stages): raise ValueError("Stream stages must form a chain without cycles")
+            stages.append(n); n=n.successors.get("default")
+        stages=[copy.copy(n) for n in stages]
+        for n in stages: n.set_params(p)
+        return stages
+    def _orch(self,shared,params=None):
+        stages=self._stages(params); preps=[n.prep(shared) for n in stages]; items=preps[0] or []
+        for n in stages: items=n._stream(items)
+        out=list(items)
+        for n,pr in zip(stages,preps): last_action=n.post(shared,pr,out if n is stages[-1] else None)
+        return last_action
+
+class _CacheWrites(list):
+    def set(self,key,value): self.append((key,value))
+def _recording(node): node=copy.copy(node); node.cache=_CacheWrites(); return node
+def _exec_item(node,item,key=None): node=_recording(node); return Node._exec_one(node,item,key),node.cache
+def _exec_chunk(node,chunk): node=_recording(node); return Node._exec_chunk(node,*chunk),node.cache
+def _changed(shared,base): return {k:v for k,v in shared.items() if base.get(k)!=pickle.dumps(v)}
+def _orch_item(flow,blob,params):
+    shared=_unpack(blob) if isinstance(blob,_Packed) else pickle.loads(blob); base={k:pickle.dumps(v) for k,v in shared.items()}
+    flow._orch(shared,params); return _changed(shared,base)
+def _merge(dst,src):
+    for k,v in src.items():
+        if isinstance(v,dict) and isinstance(dst.get(k),dict): _merge(dst[k],v)
+        else: dst[k]=v
+
+_Packed=collections.namedtuple("_Packed","data files keep")
+class _BufferPickler(pickle.Pickler):
+    def persistent_id(self,obj): return (type(obj) is bytes,self.transport._write(obj)) if type(obj) in (bytes,bytearray) and len(obj)>=self.transport.threshold else None
+class _BufferUnpickler(pickle.Unpickler):
+    def persistent_load(self,pid): v=_map_file(*pid[1],self.keep); return bytes(v) if pid[0] else bytearray(v)
+def _map_file(path,size,keep):
+    with open(path,"rb") as f: m=mmap.mmap(f.fileno(),size,access=mmap.ACCESS_COPY)
+    if not keep: os.unlink(path)
+    return memoryview(m)
+def _unpack(obj):
+    if not isinstance(obj,_Packed): return obj
+    u=_BufferUnpickler(io.BytesIO(obj.data),buffers=[_map_file(p,n,obj.keep) for p,n in obj.files]); u.keep=obj.keep; return u.load()
+def _shm_call(transport,fn,packed,*args): return transport.pack(fn(_unpack(packed),*args))
+
+class SharedMemoryTransport:
+    def __init__(self,threshold=1<<20,dir=None): self.threshold,self.dir=max(1,threshold),dir
+    @contextlib.contextmanager
+    def session(self):
+        t=copy.copy(self); t.dir=tempfile.mkdtemp(prefix="pocketflow-",dir=self.dir or ("/dev/shm" if os.path.isdir("/dev/shm") else None))
+        try: yield t
+        finally: shutil.rmtree(t.dir,ignore_errors=True)
+    def _write(self,buf):
+        fd,path=tempfile.mkstemp(dir=self.dir)
+        with os.fdopen(fd,"wb") as f: f.write(buf)
+        return path,memoryview(buf).nbytes
+    def pack(self,obj,keep=False):
+        big,out=[],io.BytesIO(); p=_BufferPickler(out,5,buffer_callback=lambda b: b.raw().nbytes<self.threshold or big.append(b)); p.transport=self; p.dump(obj)
+        return _Packed(out.getvalue(),[self._write(b.raw()) for b in big],keep)
+
+class _ProcessPickler(pickle.Pickler):
+    def reducer_override(self,obj):
+        if isinstance(obj,(RetryBudget,RateLimiter,AdaptiveLimit)): raise TypeError(f"{type(obj).__name__} is shared state and can't be copied into worker processes; use a thread pool or async nodes with it")
+        return NotImplemented
+def _process_safe(obj): _ProcessPickler(io.BytesIO(),protocol=pickle.HIGHEST_PROTOCOL).dump(obj); return obj
+
+class _Pool:
+    pool,transport=ThreadPoolExecutor,None
+    def _map(self,fn,*items,transport=None):
+        if isinstance(self.executor,ProcessPoolExecutor) if self.executor else self.pool is ProcessPoolExecutor: _process_safe(fn)
+        if transport is not None: fn,items=functools.partial(_shm_call,transport,fn),(map(transport.pack,items[0]),*items[1:])
+        fn=functools.partial(_in_deadline,_deadline.get(),fn)
+        if self.executor: yield from map(_unpack,self.executor.map(fn,*items)); return
+        with self.pool(self.max_workers) as ex: yield from map(_unpack,ex.map(fn,*items))
+    def _shm(self): return contextlib.nullcontext() if self.transport is None else self.transport.session()
+    def _shippable(self): n=copy.copy(self); n.executor=None; return n
+
+class ThreadPoolBatchNode(_Pool,BatchNode):
+    def __init__(self,max_retries=1,wait=0,max_workers=None,executor=None,**kwargs): super().__init__(max_retries,wait,**kwargs); self.max_workers,self.executor=max_workers,executor
+    def _run_items(self,xs,ks):
+        out,n=[],self._shippable()
+        with self._shm() as t:
+            for res,writes in self._map(functools.partial(_exec_chunk,n),_chunks(zip(xs,ks),self.batch_size),transport=t) if self.batch_size else self._map(functools.partial(_exec_item,n),xs,ks,transport=t):
+                for k,v in writes: self.cache.set(k,v)
+                out.extend(res) if self.batch_size else out.append(res)
+        return out
+
+class ProcessPoolBatchNode(ThreadPoolBatchNode):
+    pool=ProcessPoolExecutor
+    def __init__(self,max_retries=1,wait=0,transport=None,**kwargs): super().__init__(max_retries,wait,**kwargs); self.transport=SharedMemoryTransport() if transport is True else transport
+
+class ThreadPoolBatchFlow(_Pool,BatchFlow):
+    def __init__(self,start=None,max_workers=None,executor=None,**kwargs):
+        if self.pool is ThreadPoolExecutor and kwargs.get("checkpoint") is not None: raise ValueError("ThreadPoolBatchFlow can't be checkpointed: items write to shared from other threads while it is saved")
+        super().__init__(start,**kwargs); self.max_workers,self.executor=max_workers,executor
+    def _run(self,shared):
+        with self._scope(shared):
+            pr=self.prep(shared) or []; todo=[i for i in range(len(pr)) if not self._skip(i)]
+            for _ in self._map(functools.partial(self._batch_item,shared),[pr[i] for i in todo],todo): pass
+            return self.post(shared,pr,None)
+
+class ProcessPoolBatchFlow(ThreadPoolBatchFlow):
+    pool=ProcessPoolExecutor
+    def __init__(self,start=None,transport=None,**kwargs): super().__init__(start,**kwargs); self.transport=SharedMemoryTransport() if transport is True else transport
+    def _run(self,shared):
+        with self._scope(shared),self._shm() as t:
+            pr=self.prep(shared) or []; todo=[i for i in range(len(pr)) if not self._skip(i)]
+            flow=self._shippable(); flow.checkpoint=None
+            blob=pickle.dumps(shared) if t is None else t.pack(shared,keep=True)
+            for i,s in zip(todo,self._map(functools.partial(_orch_item,flow,blob),[{**self.params,**pr[i]} for i in todo],transport=t)):
+                _merge(shared,s)
+                if self.checkpoint is not None: self._save_checkpoint(shared,i)
+            return self.post(shared,pr,None)
+
+class SQLiteQueue:
+    def __init__(self,path,name="batch",poll=0.05):
+        self.path,self.name,self.poll=path,name,poll
+        with self._db() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS runs (queue TEXT PRIMARY KEY, context BLOB)")
+            db.execute("CREATE TABLE IF NOT EXISTS tasks (queue TEXT, idx INTEGER, params BLOB, state INTEGER DEFAULT 0, ok INTEGER, result BLOB, PRIMARY KEY (queue, idx))")
+    def _db(self): return contextlib.closing(sqlite3.connect(self.path,timeout=60,isolation_level=None))
+    def open(self,context,tasks):
+        with self._db() as db:
+            db.execute("BEGIN IMMEDIATE")
+            db.execute("INSERT OR REPLACE INTO runs VALUES (?,?)",(self.name,pickle.dumps(context)))
+            db.execute("UPDATE tasks SET state=0 WHERE queue=? AND (state=1 OR ok=0)",(self.name,))
+            db.executemany("INSERT OR IGNORE INTO tasks (queue,idx,params) VALUES (?,?,?)",((self.name,i,pickle.dumps(p)) for i,p in tasks))
+            db.execute("COMMIT")
+    def context(self):
+        with self._db() as db: return pickle.loads(db.execute("SELECT context FROM runs WHERE queue=?",(self.name,)).fetchone()[0])
+    def claim(self):
+        with self._db() as db:
+            db.execute("BEGIN IMMEDIATE")
+            row=db.execute("SELECT idx,params FROM tasks WHERE queue=? AND state=0 ORDER BY idx LIMIT 1",(self.name,)).fetchone()
+            if row: db.execute("UPDATE tasks SET state=1 WHERE queue=? AND idx=?",(self.name,row[0]))
+            db.execute("COMMIT")
+        return row and (row[0],pickle.loads(row[1]))
+    def complete(self,idx,ok,result):
+        with self._db() as db: db.execute("UPDATE tasks SET state=2,ok=?,result=? WHERE queue=? AND idx=?",(int(ok),pickle.dumps(result),self.name,idx))
+    def pending(self):
+        with self._db() as db: return db.execute("SELECT COUNT(*) FROM tasks WHERE queue=? AND state<2",(self.name,)).fetchone()[0]
+    def results(self):
+        with self._db() as db:
+            for i,ok,r in db.execute("SELECT idx,ok,result FROM tasks WHERE queue=? AND state=2 ORDER BY idx",(self.name,)): yield i,bool(ok),pickle.loads(r)
+    def clear(self):
+        with self._db() as db: db.execute("DELETE FROM tasks WHERE queue=?",(self.name,)); db.execute("DELETE FROM runs WHERE queue=?",(self.name,))
+
+def run_worker(queue):
+    flow,blob,deadline=queue.context(); base={k:pickle.dumps(v) for k,v in pickle.loads(blob).items()}
+    with _deadline_scope(None if deadline is None else deadline-time.time()):
+        while (task:=queue.claim()):
+            try: s=pickle.loads(blob); flow._orch(s,task[1]); ok,res=True,_changed(s,base)
+            except Exception as e: ok,res=False,e
+            try: queue.complete(task[0],ok,res)
+            except Exception as e: queue.complete(task[0],False,RuntimeError(f"Batch item {task[0]} result can't be pickled: {e!r}"))
+
+@contextlib.contextmanager
+def _work_queue(queue):
+    if queue is not None: yield queue; return
+    d=tempfile.mkdtemp(prefix="pocketflow-")
+    try: yield SQLiteQueue(os.path.join(d,"queue.db"))
+    finally: shutil.rmtree(d,ignore_errors=True)
+
+class DistributedBatchFlow(BatchFlow):
+    def __init__(self,start=None,workers=None,queue=None,**kwargs): super().__init__(start,**kwargs); self.workers,self.queue=workers,queue
     def _run(self,shared):
-        pr=self.prep(shared) or []
-        for bp in pr: self._orch(shared,{**self.params,**bp})
-        return self.post(shared,pr,None)
+        with self._scope(shared),_work_queue(self.queue) as q:
+            pr=self.prep(shared) or []; todo=[i for i in range(len(pr)) if not self._skip(i)]
+            flow,left=copy.copy(self),_time_left(); flow.checkpoint=flow.queue=None; _process_safe(flow)
+            q.open((flow,pickle.dumps(shared),None if left is None else time.time()+left),[(i,{**self.params,**pr[i]}) for i in todo])
+            n=self.workers if self.workers is not None else os.cpu_count() or 1
+            procs=[multiprocessing.Process(target=run_worker,args=(q,),daemon=True) for _ in range(min(n,len(todo)))]
+            for p in procs: p.start()
+            try:
+                while q.pending() and (not procs or any(p.is_alive() for p in procs)): _time_left(); time.sleep(q.poll)
+            finally:
+                for p in procs:
+                    if p.is_alive(): p.terminate()
+                    p.join()
+            if (left:=q.pending()): raise RuntimeError(f"{left} batch items did not finish; run again with the same queue to resume")
+            want=set(todo)
+            for i,ok,res in q.results():
+                if i not in want: continue
+                if not ok: raise res
+                _merge(shared,res)
+                if self.checkpoint is not None: self._save_checkpoint(shared,i)
+            q.clear(); return self.post(shared,pr,None)
+
+class HedgePolicy:
+    def __init__(self,delay=None,percentile=None,max_hedges=1,min_samples=20,window=200):
+        self.delay,self.percentile,self.max_hedges,self.min_samples=delay,percentile,max_hedges,min_samples
+        self.latencies,self.calls,self.hedges,self.hedge_wins=collections.deque(maxlen=window),0,0,0
+    def hedge_delay(self):
+        if self.percentile is None or len(self.latencies)<self.min_samples: return self.delay
+        lat=sorted(self.latencies); return lat[min(len(lat)-1,int(len(lat)*self.percentile/100))]
+    async def run(self,fn,arg):
+        start,first,err=time.monotonic(),asyncio.ensure_future(fn(arg)),None
+        pending,launched=[first],1; self.calls+=1
+        try:
+            while pending:
+                delay=self.hedge_delay() if launched<=self.max_hedges else None
+                done,_=await asyncio.wait(pending,timeout=delay,return_when=asyncio.FIRST_COMPLETED)
+                if not done: pending.append(asyncio.ensure_future(fn(arg))); launched+=1; self.hedges+=1; continue
+                for t in done:
+                    pending.remove(t)
+                    if t.exception() is not None: err=t.exception(); continue
+                    self.latencies.append(time.monotonic()-start); self.hedge_wins+=t is not first
+                    return t.result()
+            raise err
+        finally:
+            for t in pending: t.cancel()
+
+class Parallel(_Pool,BaseNode):
+    def __init__(self,*branches,max_workers=None,executor=None): super().__init__(); self.branches,self.max_workers,self.executor=list(branches),max_workers,executor
+    def _branch(self,shared,b): b=copy.copy(b); b.set_params(self.params); return b._run(shared)
+    def _run(self,shared): p=self.prep(shared); e=list(self._map(functools.partial(self._branch,shared),self.branches)); return self.post(shared,p,e)
+
+def _declared(node): return None if node.reads is None and node.writes is None else (set(node.reads or ()),set(node.writes or ()))
+def _dag_deps(nodes):
+    decl,deps=[_declared(n) for n in nodes],[]
+    for j,dj in enumerate(decl):
+        deps.append({i for i,di in enumerate(decl[:j]) if di is None or dj is None or di[1]&(dj[0]|dj[1]) or di[0]&dj[1]})
+    return deps,[[j for j in range(len(nodes)) if i in deps[j]] for i in range(len(nodes))]
+
+class _DeclaredView(collections.abc.MutableMapping):
+    def __init__(self,shared,node): self._shared,self._name,(self._reads,self._writes)=shared,type(node).__name__,_declared(node)
+    def _check(self,key,allowed,kind):
+        if key not in allowed: warnings.warn(f"{self._name} {kind} undeclared shared key '{key}'")
+    def __getitem__(self,key): self._check(key,self._reads|self._writes,"reads"); return self._shared[key]
+    def __setitem__(self,key,value): self._check(key,self._writes,"writes"); self._shared[key]=value
+    def __delitem__(self,key): self._check(key,self._writes,"writes"); del self._shared[key]
+    def __iter__(self): return iter(self._shared)
+    def __len__(self): return len(self._shared)
+
+class _Overlay(collections.abc.MutableMapping):
+    def __init__(self,base): self._base,self._local,self._written,self._gone=base,{},set(),set()
+    def __getitem__(self,key):
+        if key in self._local: return self._local[key]
+        if key in self._gone: raise KeyError(key)
+        v=self._base[key]
+        if isinstance(v,(dict,list,set,bytearray)): v=self._local[key]=copy.deepcopy(v)
+        return v
+    def __setitem__(self,key,value): self._local[key]=value; self._written.add(key); self._gone.discard(key)
+    def __delitem__(self,key):
+        if key not in self: raise KeyError(key)
+        self._local.pop(key,None); self._written.discard(key); self._gone.add(key)
+    def __contains__(self,key): return key in self._local or key not in self._gone and key in self._base
+    def __iter__(self): yield from (k for k in self._base if k not in self._gone and k not in self._local); yield from self._local
+    def __len__(self): return sum(1 for _ in self)
+    def _changes(self): return {k:v for k,v in self._local.items() if k in self._written or v!=self._base[k]},self._gone
+
+class MergePolicy:
+    def __init__(self,rules=None,default="last"):
+        self.rules,self.default=dict(rules or {}),default
+        for r in (default,*self.rules.values()):
+            if r not in ("last","merge","append") and not callable(r): raise ValueError(f"Merge rule must be 'last', 'merge', 'append' or a function, got {r!r}")
+    def overlay(self,shared): return _Overlay(shared)
+    def merge(self,shared,overlays):
+        changes=[o._changes() for o in overlays]
+        for k in dict.fromkeys(k for c,g in changes for k in itertools.chain(c,g)):
+            rule,vals=self.rules.get(k,self.default),[(k in c,c.get(k)) for c,g in changes if k in c or k in g]
+            if rule in ("last","merge"):
+                for present,v in vals:
+                    if not present: shared.pop(k,None)
+                    elif rule=="merge": _merge(shared,{k:v})
+                    else: shared[k]=v
+            elif rule=="append":
+                base=list(shared.get(k,[])); out=list(base)
+                for present,v in vals:
+                    if present: out.extend(v[len(base):] if list(v[:len(base)])==base else v)
+                shared[k]=out
+            else:
+                acc=shared.get(k,_MISS)
+                for present,v in vals:
+                    if present: acc=v if acc is _MISS else rule(acc,v)
+                if acc is not _MISS: shared[k]=acc
+
+class DAGFlow(_Pool,Flow):
+    def __init__(self,nodes,max_workers=None,executor=None,debug=False,timeout=None,incremental=None): super().__init__(timeout=timeout,incremental=incremental); self.nodes,self.max_workers,self.executor,self.debug=list(nodes),max_workers,executor,debug
+    def _prepare(self,params):
+        nodes,p=[copy.copy(n) for n in self.nodes],(params or {**self.params})
+        for n in nodes: n.set_params(p)
+        return (nodes,*_dag_deps(self.nodes))
+    def _view(self,shared,node): return _DeclaredView(shared,node) if self.debug and _declared(node) else shared
+    def _orch(self,shared,params=None):
+        nodes,deps,users=self._prepare(params); left,ex=[len(d) for d in deps],self.executor or self.pool(self.max_workers)
+        run=lambda i: ex.submit(_in_deadline,_deadline.get(),self._run_node,nodes[i],self._view(shared,nodes[i]))
+        pending={run(i):i for i,d in enumerate(deps) if not d}
+        try:
+            while pending:
+                done,_=wait_futures(pending,return_when=FIRST_COMPLETED)
+                for f in done:
+                    i=pending.pop(f); f.result(); _time_left()
+                    for j in users[i]:
+                        left[j]-=1
+                        if not left[j]: pending[run(j)]=j
+        finally:
+            for f in pending: f.cancel()
+            if ex is not self.executor: ex.shutdown()
 
 class AsyncNode(Node):
+    def __init__(self,max_retries=1,wait=0,hedge=None,**kwargs):
+        super().__init__(max_retries,wait,**kwargs); self.hedge=hedge
+        if hedge is not None and type(self).exec_stream_async is not AsyncNode.exec_stream_async: raise ValueError(f"{type(self).__name__} streams its output, which can't be hedged")
     async def prep_async(self,shared): pass
     async def exec_async(self,prep_res): pass
+    async def exec_stream_async(self,prep_res): yield await self.exec_async(prep_res)
+    async def exec_batch_async(self,items): return [await self.exec_async(i) for i in items]
     async def exec_fallback_async(self,prep_res,exc): raise exc
     async def post_async(self,shared,prep_res,exec_res): pass
-    async def _exec(self,prep_res): 
+    async def _exec(self,prep_res):
+        if self.cache is None: return await self._exec_one(prep_res)
+        k=self.cache.key(self,prep_res); res=self.cache.get(k)
+        return await self._exec_one(prep_res,k) if res is _MISS else res
+    async def _batch_async(self,items,run):
+        if self.cache is None: res,miss=await run(items or [],itertools.repeat(None)),None
+        else:
+            items=list(items or []); keys=[self.cache.key(self,i) for i in items]; res=self.cache.get_many(keys); miss=[j for j,r in enumerate(res) if r is _MISS]
+            for j,r in zip(miss,await run([items[j] for j in miss],[keys[j] for j in miss])): res[j]=r
+        if _listeners: _emit("batch",self,items=len(res),cached=0 if miss is None else len(res)-len(miss))
+        return res
+    async def _attempt(self,prep_res,batch=False):
+        if batch or type(self).exec_stream_async is not AsyncNode.exec_stream_async:
+            if self.rate_limit is not None: await self.rate_limit.acquire_async(sum(map(self.estimate_tokens,prep_res)) if batch else self.estimate_tokens(prep_res),_time_left(self.timeout))
+            return _check_batch(prep_res,await _wait_for(self.exec_batch_async,prep_res,_time_left(self.timeout))) if batch else await _wait_for(self._exec_stream,prep_res,_time_left(self.timeout))
+        return await _wait_for(self._launch if self.hedge is None else functools.partial(self.hedge.run,self._launch),prep_res,_time_left(self.timeout))
+    async def _launch(self,prep_res):
+        if self.rate_limit is not None: await self.rate_limit.acquire_async(self.estimate_tokens(prep_res),_time_left(self.timeout))
+        return await self.exec_async(prep_res)
+    async def _exec_stream(self,prep_res):
+        sink,chunks=_stream_sink.get(),[]
+        if sink is not None and self.cur_retry: sink.put_nowait((self,STREAM_RESET))
+        async for c in self.exec_stream_async(prep_res):
+            chunks.append(c)
+            if sink is not None: sink.put_nowait((self,c))
+            if _listeners: _emit("chunk",self,chunk=c)
+        return "".join(chunks) if all(isinstance(c,str) for c in chunks) else chunks
+    async def _exec_chunk(self,items,keys):
+        res=await self._exec_one(items,batch=True)
+        for j,(x,k,r) in enumerate(zip(items,keys,res)):
+            if isinstance(r,Exception): res[j]=await self._exec_one(x,k)
+            elif k is not None: self.cache.set(k,r)
+        return res
+    async def _exec_one(self,prep_res,key=None,batch=False):
+        cls=type(self); fast=not batch and self.timeout is None and self.rate_limit is None and self.hedge is None and _deadline.get() is None and cls._attempt is AsyncNode._attempt and cls.exec_stream_async is AsyncNode.exec_stream_async
         for self.cur_retry in range(self.max_retries):
-            try: return await self.exec_async(prep_res)
+            try: res=await (self.exec_async(prep_res) if fast else self._attempt(prep_res,batch))
             except Exception as e:
-                if self.cur_retry==self.max_retries-1: return await self.exec_fallback_async(prep_res,e)
-                if self.wait>0: await asyncio.sleep(self.wait)
+                if self.cur_retry==self.max_retries-1 or not self._retryable(e):
+                    if batch: return [e]*len(prep_res)
+                    if _listeners: _emit("fallback",self,error=e)
+                    return await self.exec_fallback_async(prep_res,e)
+                w=self._retry_wait(e)
+                if _listeners: _emit("retry",self,attempt=self.cur_retry,error=e,wait=w)
+                if w>0: await asyncio.sleep(w)
+            else:
+                if self.retry is not None: self.retry.succeeded()
+                if key is not None: self.cache.set(key,res)
+                return res
     async def run_async(self,shared): 
         if self.successors: warnings.warn("Node won't run successors. Use AsyncFlow.")  
-        return await self._run_async(shared)
-    async def _run_async(self,shared): p=await self.prep_async(shared); e=await self._exec(p); return await self.post_async(shared,p,e)
+        return await (_traced_async(self,self._run_async(shared)) if _listeners else self._run_async(shared))
+    async def _run_async(self,shared):
+        if _listeners: return await self._run_traced_async(shared)
+        p=await self.prep_async(shared); e=await self._exec(p); return await self.post_async(shared,p,e)
+    async def _run_traced_async(self,shared):
+        t=time.perf_counter(); p=await self.prep_async(shared); t=_phase("prep",self,t); e=await self._exec(p); t=_phase("exec",self,t); r=await self.post_async(shared,p,e); _phase("post",self,t); return r
     def _run(self,shared): raise RuntimeError("Use run_async.")
 
 class AsyncBatchNode(AsyncNode,BatchNode):
-    async def _exec(self,items): return [await super(AsyncBatchNode,self)._exec(i) for i in items]
+    async def _exec(self,items): return await self._batch_async(items,self._run_items)
+    async def _run_items(self,xs,ks):
+        if not self.batch_size: return [await self._exec_one(x,k) for x,k in zip(xs,ks)]
+        return [r for c in _chunks(zip(xs,ks),self.batch_size) for r in await self._exec_chunk(*c)]
+
+class AdaptiveLimit:
+    def __init__(self,initial=4,min_limit=1,max_limit=256,backoff=0.5,latency=None,backoff_on=(TimeoutError,)):
+        self.min_limit,self.max_limit,self.backoff,self.latency,self.backoff_on=min_limit,max_limit,backoff,latency,backoff_on
+        self._limit,self._rtt,self._dropped,self.throttled,self._lock=float(initial),None,0.0,0,threading.Lock()
+    @property
+    def limit(self): return int(self._limit)
+    def congested(self,exc):
+        status=getattr(exc,"status_code",None) or getattr(getattr(exc,"response",None),"status_code",None)
+        return isinstance(exc,self.backoff_on) or status in (429,503) or _retry_after(exc) is not None
+    def record(self,latency,exc=None):
+        with self._lock:
+            now=time.monotonic(); self._rtt=latency if self._rtt is None else 0.8*self._rtt+0.2*latency
+            if (exc is not None and self.congested(exc)) or (exc is None and self.latency is not None and latency>self.latency):
+                self.throttled+=1
+                if now-self._dropped>=self._rtt: self._limit,self._dropped=max(self.min_limit,self._limit*self.backoff),now
+            elif exc is None: self._limit=min(self.max_limit,self._limit+1/self._limit)
+    __getstate__,__setstate__=RetryBudget.__getstate__,RetryBudget.__setstate__
+
+async def _cancel(tasks):
+    for t in tasks: t.cancel()
+    if tasks: await asyncio.wait(tasks)
+    for t in tasks: t.cancelled() or t.exception()
+
+async def _gather(aws,limit=None):
+    if not limit:
+        tasks=[asyncio.ensure_future(aw) for aw in aws]
+        try: return list(await asyncio.gather(*tasks))
+        except BaseException: await _cancel(tasks); raise
+    cap=(lambda: limit.limit) if hasattr(limit,"limit") else (lambda: limit)
+    it,res,pend=enumerate(aws),{},{}
+    try:
+        while True:
+            while len(pend)<cap() and (nxt:=next(it,None)) is not None: pend[asyncio.ensure_future(nxt[1])]=nxt[0]
+            if not pend: return [res[i] for i in range(len(res))]
+            done,_=await asyncio.wait(pend,return_when=asyncio.FIRST_COMPLETED)
+            for t in done: res[pend.pop(t)]=t.result()
+    finally: await _cancel(list(pend))
 
 class AsyncParallelBatchNode(AsyncNode,BatchNode):
-    async def _exec(self,items): return await asyncio.gather(*(super(AsyncParallelBatchNode,self)._exec(i) for i in items))
+    def __init__(self,max_retries=1,wait=0,max_concurrency=None,as_completed=False,keep_results=True,on_error="raise",**kwargs):
+        if on_error not in ("raise","collect"): raise ValueError(f"on_error must be 'raise' or 'collect', got {on_error!r}")
+        super().__init__(max_retries,wait,**kwargs); self.max_concurrency,self.as_completed,self.keep_results,self.on_error=max_concurrency,as_completed,keep_results,on_error
+    async def post_item_async(self,shared,item,exec_res): pass
+    async def _run_async(self,shared):
+        if not self.as_completed: return await super()._run_async(shared)
+        token=_item_shared.set(shared)
+        try: return await super()._run_async(shared)
+        finally: _item_shared.reset(token)
+    async def _exec(self,items):
+        if not self.as_completed: return await self._batch_async(items,self._run_items)
+        shared=_item_shared.get()
+        async def one(x):
+            r=await AsyncNode._exec(self,x); await self.post_item_async(shared,x,r)
+            return r if self.keep_results else None
+        async def chunk(xs):
+            rs=await self._batch_async(xs,self._exec_chunk)
+            for x,r in zip(xs,rs): await self.post_item_async(shared,x,r)
+            return rs if self.keep_results else [None]*len(rs)
+        if not self.batch_size: res=await _gather((one(x) for x in (items or [])),self.max_concurrency)
+        else: res=[r for c in await _gather((chunk(xs) for xs,_ in _chunks(((x,None) for x in (items or [])),self.batch_size)),self.max_concurrency) for r in c]
+        return res if self.keep_results else None
+    async def _run_items(self,xs,ks):
+        if not self.batch_size: return await _gather((self._exec_one(x,k) for x,k in zip(xs,ks)),self.max_concurrency)
+        return [r for c in await _gather((self._exec_chunk(*c) for c in _chunks(zip(xs,ks),self.batch_size)),self.max_concurrency) for r in c]
+    async def _exec_one(self,prep_res,key=None,batch=False):
+        if batch or self.on_error=="raise": return await super()._exec_one(prep_res,key,batch)
+        try: return await super()._exec_one(prep_res,key)
+        except Exception as e: return e
+    async def _attempt(self,prep_res,batch=False):
+        lim=self.max_concurrency
+        if not hasattr(lim,"record"): return await super()._attempt(prep_res,batch)
+        t=time.monotonic()
+        try: res=await super()._attempt(prep_res,batch)
+        except Exception as e: lim.record(time.monotonic()-t,e); raise
+        else: lim.record(time.monotonic()-t); return res
+        finally:
+            if _listeners: _emit("concurrency",self,limit=lim.limit)
+
+async def _to_thread(executor,fn,*args):
+    ctx=contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(executor,functools.partial(ctx.run,fn,*args))
 
 class AsyncFlow(Flow,AsyncNode):
-    async def _orch_async(self,shared,params=None):
-        curr,p,last_action =copy.copy(self.start_node),(params or {**self.params}),None
-        while curr: curr.set_params(p); last_action=await curr._run_async(shared) if isinstance(curr,AsyncNode) else curr._run(shared); curr=copy.copy(self.get_next_node(curr,last_action))
+    offload_sync,executor=True,None
+    def __init__(self,start=None,offload_sync=True,executor=None,timeout=None,checkpoint=None,incremental=None): super().__init__(start,timeout,checkpoint,incremental); self.offload_sync,self.executor=offload_sync,executor
+    async def _run_node_async(self,curr,shared): return await (_traced_async(curr,self._step_async(curr,shared)) if _listeners else self._step_async(curr,shared))
+    async def _step_async(self,curr,shared):
+        store,key,hit=self._replay(curr,shared)
+        return hit[0] if hit is not _MISS else self._record(curr,shared,store,key,await self._run_sync_or_async(curr,shared))
+    async def _run_sync_or_async(self,curr,shared):
+        if isinstance(curr,AsyncNode): return await curr._run_async(shared)
+        if not self.offload_sync: return curr._run(shared)
+        if self.offload_sync=="exec" and not isinstance(curr,Flow): p=curr.prep(shared); e=await _to_thread(self.executor,curr._exec,p); return curr.post(shared,p,e)
+        return await _to_thread(self.executor,curr._run,shared)
+    async def _orch_plan_async(self,shared,params=None,item=None):
+        (nodes,trans),ckpt=self._plan,self.checkpoint
+        i,last_action,p=(0,None,params or {**self.params}) if ckpt is None else self._start_at(item,params)
+        run,plain,timed=[None]*len(nodes),self._plain(),_deadline.get() is not None
+        while i is not None:
+            if timed: _time_left()
+            node=run[i]
+            if node is None: node=run[i]=copy.copy(nodes[i]); node.set_params(p)
+            last_action=await (self._run_sync_or_async(node,shared) if plain else self._run_node_async(node,shared))
+            if ckpt is not None: self._save_checkpoint(shared,item,(i,last_action,p))
+            t=trans[i]; i=t.get(last_action or "default")
+            if i is None and t: warnings.warn(f"Flow ends: '{last_action}' not found in {list(t)}")
+        return last_action
+    async def _orch_async(self,shared,params=None,item=None):
+        if self.checkpoint is not None and self._plan is None: self.compile()
+        if self._plan: return await self._orch_plan_async(shared,params,item)
+        curr,p,last_action,plain,timed=copy.copy(self.start_node),(params or {**self.params}),None,self._plain(),_deadline.get() is not None
+        while curr:
+            if timed: _time_left()
+            curr.set_params(p); last_action=await (self._run_sync_or_async(curr,shared) if plain else self._run_node_async(curr,shared)); curr=copy.copy(self.get_next_node(curr,last_action))
         return last_action
-    async def _run_async(self,shared): p=await self.prep_async(shared); o=await self._orch_async(shared); return await self.post_async(shared,p,o)
+    async def _run_async(self,shared):
+        with self._scope(shared): p=await self.prep_async(shared); o=await self._orch_async(shared); return await self.post_async(shared,p,o)
+    async def resume_async(self,shared):
+        token=_resuming.set(True)
+        try: return await self.run_async(shared)
+        finally: _resuming.reset(token)
+    async def stream(self,shared):
+        q=asyncio.Queue(); token=_stream_sink.set(q)
+        try: task=asyncio.ensure_future(self.run_async(shared))
+        finally: _stream_sink.reset(token)
+        task.add_done_callback(lambda _: q.put_nowait(_END))
+        try:
+            while (item:=await q.get()) is not _END: yield item
+            await task
+        finally: await _cancel([task])
+    async def _batch_item_async(self,shared,bp,item):
+        await self._orch_async(shared,{**self.params,**bp},item)
+        if self.checkpoint is not None: self._save_checkpoint(shared,item)
     async def post_async(self,shared,prep_res,exec_res): return exec_res
 
+class AsyncParallel(AsyncNode):
+    _run_node_async=AsyncFlow._run_sync_or_async
+    def __init__(self,*branches,offload_sync=True,executor=None,isolate=None): super().__init__(); self.branches,self.offload_sync,self.executor,self.isolate=list(branches),offload_sync,executor,MergePolicy() if isolate is True else isolate
+    async def _branch(self,shared,b): b=copy.copy(b); b.set_params(self.params); return await self._run_node_async(b,shared)
+    async def _run_async(self,shared):
+        p=await self.prep_async(shared); views=[self.isolate.overlay(shared) if self.isolate else shared for _ in self.branches]
+        e=await _gather(self._branch(v,b) for v,b in zip(views,self.branches))
+        if self.isolate: self.isolate.merge(shared,views)
+        return await self.post_async(shared,p,e)
+
+class AsyncDAGFlow(AsyncFlow):
+    _prepare,_view=DAGFlow._prepare,DAGFlow._view
+    def __init__(self,nodes,offload_sync=True,executor=None,debug=False,timeout=None,incremental=None): super().__init__(None,offload_sync,executor,timeout,incremental=incremental); self.nodes,self.debug=list(nodes),debug
+    async def _orch_async(self,shared,params=None):
+        nodes,deps,users=self._prepare(params); left=[len(d) for d in deps]
+        run=lambda i: asyncio.ensure_future(self._run_node_async(nodes[i],self._view(shared,nodes[i])))
+        pending={run(i):i for i,d in enumerate(deps) if not d}
+        try:
+            while pending:
+                done,_=await asyncio.wait(pending,return_when=asyncio.FIRST_COMPLETED)
+                for t in done:
+                    i=pending.pop(t); t.result(); _time_left()
+                    for j in users[i]:
+                        left[j]-=1
+                        if not left[j]: pending[run(j)]=j
+        finally:
+            for t in pending: t.cancel()
+
+_END,STREAM_RESET=object(),object()
+
+class AsyncStreamNode(AsyncNode):
+    flatten=False
+    async def _pump(self,inq,outq):
+        while (item:=await inq.get()) is not _END:
+            if not self.batch_size: res=[await self._exec(item)]
+            else: item,batch=await self._coalesce(inq,[item]); res=await self._exec_chunk(batch,[None]*len(batch))
+            for r in res:
+                for x in (r if self.flatten else (r,)): await outq.put(x)
+            if item is _END: break
+        await outq.put(_END)
+    async def _coalesce(self,inq,batch):
+        loop,item=asyncio.get_running_loop(),None; until=None if self.max_wait is None else loop.time()+self.max_wait
+        while len(batch)<self.batch_size:
+            try: item=await (inq.get() if until is None else asyncio.wait_for(inq.get(),max(0,until-loop.time())))
+            except asyncio.TimeoutError: return None,batch
+            if item is _END: break
+            batch.append(item)
+        return item,batch
+
+class AsyncStreamFlow(AsyncFlow):
+    _stages=StreamFlow._stages
+    def __init__(self,start=None,maxsize=64,**kwargs): super().__init__(start,**kwargs); self.maxsize=maxsize
+    async def _orch_async(self,shared,params=None):
+        stages=self._stages(params); preps=[await n.prep_async(shared) for n in stages]; out=[]
+        qs=[asyncio.Queue(self.maxsize) for _ in range(len(stages)+1)]
+        async def feed():
+            src=preps[0] or []
+            if hasattr(src,"__aiter__"):
+                async for item in src: await qs[0].put(item)
+            else:
+                for item in src: await qs[0].put(item)
+            await qs[0].put(_END)
+        async def drain():
+            while (item:=await qs[-1].get()) is not _END: out.append(item)
+        tasks=[asyncio.ensure_future(c) for c in (feed(),*(n._pump(qs[i],qs[i+1]) for i,n in enumerate(stages)),drain())]
+        try: await asyncio.gather(*tasks)
+        finally:
+            for t in tasks: t.cancel()
+        for n,pr in zip(stages,preps): last_action=await n.post_async(shared,pr,out if n is stages[-1] else None)
+        return last_action
+
 class AsyncBatchFlow(AsyncFlow,BatchFlow):
     async def _run_async(self,shared):
-        pr=await self.prep_async(shared) or []
-        for bp in pr: await self._orch_async(shared,{**self.params,**bp})
-        return await self.post_async(shared,pr,None)
+        with self._scope(shared):
+            pr=await self.prep_async(shared) or []
+            for i,bp in enumerate(pr):
+                if not self._skip(i): await self._batch_item_async(shared,bp,i)
+            return await self.post_async(shared,pr,None)
+
+def _offloads(start,offload):
+    todo,seen=[(start,offload)],set()
+    while todo:
+        n,off=todo.pop()
+        if n is None or id(n) in seen: continue
+        seen.add(id(n)); todo+=[(s,off) for s in n.successors.values()]
+        if not isinstance(n,AsyncNode):
+            if off and (off!="exec" or isinstance(n,Flow)): return True
+            continue
+        f=_children(n)
+        if f: todo+=[(c,n.offload_sync) for c in ([n.start_node] if f=="start" else getattr(n,f))]
+    return False
 
 class AsyncParallelBatchFlow(AsyncFlow,BatchFlow):
+    def __init__(self,start=None,max_concurrency=None,on_error="raise",isolate=None,**kwargs):
+        if on_error not in ("raise","collect"): raise ValueError(f"on_error must be 'raise' or 'collect', got {on_error!r}")
+        if isolate and kwargs.get("checkpoint") is not None: raise ValueError("isolate can't be combined with checkpoint: item writes only reach shared at the join")
+        super().__init__(start,**kwargs); self.max_concurrency,self.on_error,self.isolate=max_concurrency,on_error,MergePolicy() if isolate is True else isolate
+    async def _collect_item(self,shared,bp,i,errors):
+        try: await self._batch_item_async(shared,bp,i)
+        except Exception as e:
+            if self.on_error=="raise": raise
+            errors[i]=e
     async def _run_async(self,shared): 
-        pr=await self.prep_async(shared) or []
-        await asyncio.gather(*(self._orch_async(shared,{**self.params,**bp}) for bp in pr))
-        return await self.post_async(shared,pr,None)
\ No newline at end of file
+        if self.checkpoint is not None and _offloads(self.start_node,self.offload_sync): raise ValueError("checkpoint needs offload_sync=False when items contain sync nodes: they would write to shared from other threads while it is saved")
+        with self._scope(shared):
+            pr,errors=await self.prep_async(shared) or [],None
+            if self.on_error=="collect" or self.isolate: pr=list(pr)
+            if self.on_error=="collect": errors=[None]*len(pr)
+            views=[self.isolate.overlay(shared) for _ in pr] if self.isolate else None
+            await _gather((self._collect_item(views[i] if views else shared,bp,i,errors) for i,bp in enumerate(pr) if not self._skip(i)),self.max_concurrency)
+            if views: self.isolate.merge(shared,[v for i,v in enumerate(views) if errors is None or errors[i] is None])
+            return await self.post_async(shared,pr,errors)
+
+def _class_path(cls):
+    if "<locals>" in cls.__qualname__: raise ValueError(f"{cls.__qualname__} must be defined at module level to be used in a flow spec")
+    return f"{cls.__module__}:{cls.__qualname__}"
+def _import_class(path):
+    mod,_,name=path.partition(":"); obj=importlib.import_module(mod)
+    for part in name.split("."): obj=getattr(obj,part)
+    return obj
+def _children(node): return "nodes" if isinstance(node,(DAGFlow,AsyncDAGFlow)) else "start" if isinstance(node,Flow) else "branches" if isinstance(node,(Parallel,AsyncParallel)) else None
+def _init_args(node,skip):
+    if hasattr(node,"spec_args"): return dict(node.spec_args())
+    args,seen={},{skip}
+    for c in type(node).__mro__:
+        if "__init__" not in vars(c): continue
+        ps=list(inspect.signature(c.__init__).parameters.values())[1:]
+        for p in ps:
+            if p.kind in (p.VAR_POSITIONAL,p.VAR_KEYWORD) or p.name in seen: continue
+            seen.add(p.name)
+            if not hasattr(node,p.name): raise ValueError(f"{type(node).__name__} doesn't keep its '{p.name}' argument as self.{p.name}, so it can't be written to a spec; store it or define spec_args()")
+            v=getattr(node,p.name)
+            if p.default is p.empty or not (v is p.default or type(v) is type(p.default) and v==p.default): args[p.name]=v
+        if not any(p.kind==p.VAR_KEYWORD for p in ps): break
+    return args
+def _to_spec(root):
+    order,idx,out=[],{},[]
+    def ref(n):
+        if not isinstance(n,BaseNode): raise TypeError(f"Flow nodes must be BaseNode instances, got {type(n).__name__}")
+        if id(n) not in idx: idx[id(n)]=len(order); order.append(n)
+        return idx[id(n)]
+    ref(root)
+    for n in order:
+        f=_children(n); e={"class":_class_path(type(n)),"args":_init_args(n,f)}
+        if n.params: e["params"]=dict(n.params)
+        if f=="start":
+            if n.start_node is not None: e["start"]=ref(n.start_node)
+        elif f: e[f]=[ref(c) for c in getattr(n,f)]
+        if n.successors: e["successors"]={a:ref(c) for a,c in n.successors.items()}
+        out.append(e)
+    return {"nodes":out}
+def _from_spec(spec):
+    built=[_import_class(e["class"])(*([[]] if "nodes" in e else []),**e.get("args",{})) for e in spec["nodes"]]
+    for n,e in zip(built,spec["nodes"]):
+        n.params,n.successors=dict(e.get("params",{})),{a:built[j] for a,j in e.get("successors",{}).items()}
+        if "start" in e: n.start_node=built[e["start"]]
+        for f in ("nodes","branches"):
+            if f in e: setattr(n,f,[built[j] for j in e[f]])
+    return built[0]
+
+_flows,_flows_lock={},threading.Lock()
+def register_flow(name,spec):
+    with _flows_lock: _flows[name]=[spec,None]
+    return spec
+def get_flow(name):
+    with _flows_lock:
+        if name not in _flows: raise KeyError(f"No flow registered as '{name}'")
+        entry=_flows[name]
+        if entry[1] is None: built=entry[0]() if callable(entry[0]) else entry[0]; entry[1]=built if isinstance(built,BaseNode) else Flow.from_spec(built)
+        return entry[1]
@@ -1,5 +1,6 @@
 import asyncio
-from typing import Any, Dict, List, Optional, Union, TypeVar, Generic
+from concurrent.futures import Executor
+from typing import Any, AsyncIterable, ContextManager, Protocol, Awaitable, Callable, Deque, Dict, Iterable, Iterator, List, Set, Optional, Tuple, Type, Union, TypeVar, Generic, MutableMapping, AsyncIterator
 
 # Type variables for better type relationships
 _PrepResult = TypeVar('_PrepResult')
@@ -11,9 +12,33 @@ ParamValue = Union[str, int, float, bool, None, List[Any], Dict[str, Any]]
 SharedData = Dict[str, Any]
 Params = Dict[str, ParamValue]
 
+Listener = Callable[[str, "BaseNode[Any, Any, Any]", Dict[str, Any]], None]
+FlowSpec = Dict[str, List[Dict[str, Any]]]
+STREAM_RESET: object
+
+def add_listener(fn: Listener) -> Listener: ...
+def remove_listener(fn: Listener) -> None: ...
+
+class TimingCollector:
+    buckets: Tuple[float, ...]
+    latencies: Dict[str, List[float]]
+    stacks: Dict[Tuple[str, ...], float]
+    events: Dict[Tuple[str, str], int]
+
+    def __init__(self, buckets: Iterable[float] = (0.001, 0.01, 0.1, 1, 10, 60)) -> None: ...
+    def __call__(self, event: str, node: BaseNode[Any, Any, Any], info: Dict[str, Any]) -> None: ...
+    def __enter__(self) -> TimingCollector: ...
+    def __exit__(self, *exc: Any) -> None: ...
+    def histogram(self, name: str) -> List[Tuple[float, int]]: ...
+    def summary(self) -> Dict[str, Dict[str, float]]: ...
+    def folded(self) -> str: ...
+
 class BaseNode(Generic[_PrepResult, _ExecResult, _PostResult]):
     params: Params
     successors: Dict[str, BaseNode[Any, Any, Any]]
+    reads: Optional[Iterable[str]]
+    writes: Optional[Iterable[str]]
+    version: Any
     
     def __init__(self) -> None: ...
     def set_params(self, params: Params) -> None: ...
@@ -23,6 +48,7 @@ class BaseNode(Generic[_PrepResult, _ExecResult, _PostResult]):
     def post(self, shared: SharedData, prep_res: _PrepResult, exec_res: _ExecResult) -> _PostResult: ...
     def _exec(self, prep_res: _PrepResult) -> _ExecResult: ...
     def _run(self, shared: SharedData) -> _PostResult: ...
+    def _run_traced(self, shared: SharedData) -> _PostResult: ...
     def run(self, shared: SharedData) -> _PostResult: ...
     def __rshift__(self, other: BaseNode[Any, Any, Any]) -> BaseNode[Any, Any, Any]: ...
     def __sub__(self, action: str) -> _ConditionalTransition: ...
@@ -34,64 +60,582 @@ class _ConditionalTransition:
     def __init__(self, src: BaseNode[Any, Any, Any], action: str) -> None: ...
     def __rshift__(self, tgt: BaseNode[Any, Any, Any]) -> BaseNode[Any, Any, Any]: ...
 
+class RetryBudget:
+    max_tokens: int
+    refill: float
+    tokens: float
+
+    def __init__(self, max_tokens: int = 10, refill: float = 0.1) -> None: ...
+    def withdraw(self) -> bool: ...
+    def deposit(self) -> None: ...
+
+class RateLimiter:
+    requests: Optional[float]
+    tokens: Optional[float]
+    per: float
+    burst: float
+
+    def __init__(
+        self, requests: Optional[float] = None, tokens: Optional[float] = None, per: float = 60, burst: float = 1.0
+    ) -> None: ...
+    def _refill(self) -> None: ...
+    def _reserve(self, tokens: float, timeout: Optional[float]) -> float: ...
+    def acquire(self, tokens: float = 0, timeout: Optional[float] = None) -> None: ...
+    async def acquire_async(self, tokens: float = 0, timeout: Optional[float] = None) -> None: ...
+    def adjust(self, tokens: float) -> None: ...
+
+class RetryPolicy:
+    base: float
+    max_delay: float
+    factor: float
+    jitter: bool
+    retry_on: Union[Type[BaseException], Tuple[Type[BaseException], ...]]
+    budget: Optional[RetryBudget]
+
+    def __init__(
+        self,
+        base: float = 1,
+        max_delay: float = 60,
+        factor: float = 2,
+        jitter: bool = True,
+        retry_on: Union[Type[BaseException], Tuple[Type[BaseException], ...]] = (Exception,),
+        budget: Optional[RetryBudget] = None,
+    ) -> None: ...
+    def retryable(self, exc: Exception) -> bool: ...
+    def delay(self, attempt: int, exc: Exception) -> float: ...
+    def succeeded(self) -> None: ...
+
+class Cache:
+    maxsize: int
+    path: Optional[str]
+    ttl: Optional[float]
+    max_bytes: Optional[int]
+    version: str
+    evict_every: int
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        path: Optional[str] = None,
+        ttl: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        version: str = "",
+        evict_every: int = 64,
+    ) -> None: ...
+    def key(self, node: BaseNode[Any, Any, Any], prep_res: Any) -> Optional[str]: ...
+    def get(self, key: Optional[str]) -> Any: ...
+    def get_many(self, keys: List[Optional[str]]) -> List[Any]: ...
+    def set(self, key: Optional[str], value: Any) -> None: ...
+    def evict(self) -> None: ...
+    def clear(self) -> None: ...
+
 class Node(BaseNode[_PrepResult, _ExecResult, _PostResult]):
     max_retries: int
     wait: Union[int, float]
+    retry: Optional[RetryPolicy]
+    timeout: Optional[float]
+    cache: Optional[Cache]
+    rate_limit: Optional[RateLimiter]
+    batch_size: Optional[int]
+    max_wait: Optional[float]
     cur_retry: int
     
-    def __init__(self, max_retries: int = 1, wait: Union[int, float] = 0) -> None: ...
+    def __init__(
+        self,
+        max_retries: int = 1,
+        wait: Union[int, float] = 0,
+        retry: Optional[RetryPolicy] = None,
+        timeout: Optional[float] = None,
+        cache: Union[Cache, bool, None] = None,
+        rate_limit: Optional[RateLimiter] = None,
+    ) -> None: ...
+    def estimate_tokens(self, prep_res: _PrepResult) -> float: ...
+    def exec_batch(self, items: List[_PrepResult]) -> List[Union[_ExecResult, Exception]]: ...
     def exec_fallback(self, prep_res: _PrepResult, exc: Exception) -> _ExecResult: ...
+    def _retryable(self, exc: Exception) -> bool: ...
+    def _retry_wait(self, exc: Exception) -> float: ...
     def _exec(self, prep_res: _PrepResult) -> _ExecResult: ...
+    def _batch(self, items: Optional[Iterable[Any]], run: Callable[[Iterable[Any], Iterable[Optional[str]]], List[Any]]) -> List[Any]: ...
+    def _attempt(self, prep_res: Any, batch: bool = False) -> Any: ...
+    def _exec_chunk(self, items: List[_PrepResult], keys: List[Optional[str]]) -> List[_ExecResult]: ...
+    def _exec_one(self, prep_res: Any, key: Optional[str] = None, batch: bool = False) -> Any: ...
 
 class BatchNode(Node[Optional[List[_PrepResult]], List[_ExecResult], _PostResult]):
+    def __init__(
+        self,
+        max_retries: int = 1,
+        wait: Union[int, float] = 0,
+        batch_size: Optional[int] = None,
+        retry: Optional[RetryPolicy] = None,
+        timeout: Optional[float] = None,
+        cache: Union[Cache, bool, None] = None,
+        rate_limit: Optional[RateLimiter] = None,
+    ) -> None: ...
     def _exec(self, items: Optional[List[_PrepResult]]) -> List[_ExecResult]: ...
+    def _run_items(self, xs: Iterable[_PrepResult], ks: Iterable[Optional[str]]) -> List[_ExecResult]: ...
+
+class Checkpoint(Protocol):
+    def save(self, state: Dict[str, Any]) -> None: ...
+    def load(self) -> Optional[Dict[str, Any]]: ...
+    def clear(self) -> None: ...
+
+class DirCheckpoint:
+    file: str
+
+    def __init__(self, path: str, key: str = "checkpoint") -> None: ...
+    def save(self, state: Dict[str, Any]) -> None: ...
+    def load(self) -> Optional[Dict[str, Any]]: ...
+    def clear(self) -> None: ...
+
+class SQLiteCheckpoint:
+    path: str
+    key: str
+
+    def __init__(self, path: str, key: str = "checkpoint") -> None: ...
+    def _execute(self, sql: str, *args: Any) -> Any: ...
+    def save(self, state: Dict[str, Any]) -> None: ...
+    def load(self) -> Optional[Dict[str, Any]]: ...
+    def clear(self) -> None: ...
 
 class Flow(BaseNode[_PrepResult, Any, _PostResult]):
     start_node: Optional[BaseNode[Any, Any, Any]]
+    timeout: Optional[float]
+    checkpoint: Optional[Checkpoint]
+    incremental: Optional[Cache]
+    _plan: Optional[Tuple[List[BaseNode[Any, Any, Any]], List[Dict[str, int]]]]
+    _ckpt: Dict[str, Any]
     
-    def __init__(self, start: Optional[BaseNode[Any, Any, Any]] = None) -> None: ...
+    def __init__(
+        self,
+        start: Optional[BaseNode[Any, Any, Any]] = None,
+        timeout: Optional[float] = None,
+        checkpoint: Optional[Checkpoint] = None,
+        incremental: Optional[Cache] = None,
+    ) -> None: ...
+    def resume(self, shared: SharedData) -> _PostResult: ...
+    def to_spec(self) -> FlowSpec: ...
+    @classmethod
+    def from_spec(cls, spec: FlowSpec) -> Flow[Any, Any, Any]: ...
+    def _scope(self, shared: SharedData) -> ContextManager[None]: ...
+    def _fingerprint(self, node: BaseNode[Any, Any, Any], shared: SharedData) -> Tuple[Optional[Cache], Optional[str]]: ...
+    def _replay(self, node: BaseNode[Any, Any, Any], shared: SharedData) -> Tuple[Optional[Cache], Optional[str], Any]: ...
+    def _record(
+        self, node: BaseNode[Any, Any, Any], shared: SharedData, store: Optional[Cache], key: Optional[str], action: Any
+    ) -> Any: ...
+    def _run_node(self, curr: BaseNode[Any, Any, Any], shared: SharedData) -> Any: ...
+    def _step(self, curr: BaseNode[Any, Any, Any], shared: SharedData) -> Any: ...
+    def _save_checkpoint(
+        self, shared: SharedData, item: Optional[int] = None, pos: Optional[Tuple[int, Any, Params]] = None
+    ) -> None: ...
+    def _start_at(self, item: Optional[int], params: Optional[Params]) -> Tuple[Optional[int], Any, Params]: ...
+    def _skip(self, item: int) -> bool: ...
     def start(self, start: BaseNode[Any, Any, Any]) -> BaseNode[Any, Any, Any]: ...
     def get_next_node(
         self, curr: BaseNode[Any, Any, Any], action: Optional[str]
     ) -> Optional[BaseNode[Any, Any, Any]]: ...
+    def compile(self) -> Flow[_PrepResult, Any, _PostResult]: ...
+    def _next_index(self, i: int, action: Optional[str]) -> Optional[int]: ...
+    def _orch_plan(
+        self, shared: SharedData, params: Optional[Params] = None, item: Optional[int] = None
+    ) -> Any: ...
     def _orch(
-        self, shared: SharedData, params: Optional[Params] = None
+        self, shared: SharedData, params: Optional[Params] = None, item: Optional[int] = None
     ) -> Any: ...
     def _run(self, shared: SharedData) -> _PostResult: ...
     def post(self, shared: SharedData, prep_res: _PrepResult, exec_res: Any) -> _PostResult: ...
 
 class BatchFlow(Flow[Optional[List[Params]], Any, _PostResult]):
+    def _batch_item(self, shared: SharedData, bp: Params, item: int) -> None: ...
     def _run(self, shared: SharedData) -> _PostResult: ...
 
+class StreamNode(Node[_PrepResult, _ExecResult, _PostResult]):
+    flatten: bool
+
+    def _stream(self, items: Iterable[Any]) -> Iterator[Any]: ...
+
+class StreamFlow(Flow[_PrepResult, Any, _PostResult]):
+    def _stages(self, params: Optional[Params]) -> List[BaseNode[Any, Any, Any]]: ...
+    def _orch(
+        self, shared: SharedData, params: Optional[Params] = None
+    ) -> Any: ...
+
+class SharedMemoryTransport:
+    threshold: int
+    dir: Optional[str]
+
+    def __init__(self, threshold: int = 1 << 20, dir: Optional[str] = None) -> None: ...
+    def session(self) -> ContextManager[SharedMemoryTransport]: ...
+    def _write(self, buf: Any) -> Tuple[str, int]: ...
+    def pack(self, obj: Any, keep: bool = False) -> Any: ...
+
+class ThreadPoolBatchNode(BatchNode[_PrepResult, _ExecResult, _PostResult]):
+    pool: type[Executor]
+    max_workers: Optional[int]
+    executor: Optional[Executor]
+
+    def __init__(
+        self,
+        max_retries: int = 1,
+        wait: Union[int, float] = 0,
+        max_workers: Optional[int] = None,
+        executor: Optional[Executor] = None,
+        batch_size: Optional[int] = None,
+        retry: Optional[RetryPolicy] = None,
+        timeout: Optional[float] = None,
+        cache: Union[Cache, bool, None] = None,
+        rate_limit: Optional[RateLimiter] = None,
+    ) -> None: ...
+    def _run_items(self, xs: Iterable[_PrepResult], ks: Iterable[Optional[str]]) -> List[_ExecResult]: ...
+
+class ProcessPoolBatchNode(ThreadPoolBatchNode[_PrepResult, _ExecResult, _PostResult]):
+    transport: Optional[SharedMemoryTransport]
+
+    def __init__(
+        self,
+        max_retries: int = 1,
+        wait: Union[int, float] = 0,
+        transport: Union[SharedMemoryTransport, bool, None] = None,
+        max_workers: Optional[int] = None,
+        executor: Optional[Executor] = None,
+        batch_size: Optional[int] = None,
+        retry: Optional[RetryPolicy] = None,
+        timeout: Optional[float] = None,
+        cache: Union[Cache, bool, None] = None,
+        rate_limit: Optional[RateLimiter] = None,
+    ) -> None: ...
+
+class ThreadPoolBatchFlow(BatchFlow[_PostResult]):
+    pool: type[Executor]
+    max_workers: Optional[int]
+    executor: Optional[Executor]
+
+    def __init__(
+        self,
+        start: Optional[BaseNode[Any, Any, Any]] = None,
+        max_workers: Optional[int] = None,
+        executor: Optional[Executor] = None,
+        timeout: Optional[float] = None,
+        checkpoint: Optional[Checkpoint] = None,
+        incremental: Optional[Cache] = None,
+    ) -> None: ...
+    def _run(self, shared: SharedData) -> _PostResult: ...
+
+class ProcessPoolBatchFlow(ThreadPoolBatchFlow[_PostResult]):
+    transport: Optional[SharedMemoryTransport]
+
+    def __init__(
+        self,
+        start: Optional[BaseNode[Any, Any, Any]] = None,
+        transport: Union[SharedMemoryTransport, bool, None] = None,
+        max_workers: Optional[int] = None,
+        executor: Optional[Executor] = None,
+        timeout: Optional[float] = None,
+        checkpoint: Optional[Checkpoint] = None,
+        incremental: Optional[Cache] = None,
+    ) -> None: ...
+
+class WorkQueue(Protocol):
+    def open(self, context: Tuple[Any, bytes, Optional[float]], tasks: Iterable[Tuple[int, Params]]) -> None: ...
+    def context(self) -> Tuple[Any, bytes, Optional[float]]: ...
+    def claim(self) -> Optional[Tuple[int, Params]]: ...
+    def complete(self, idx: int, ok: bool, result: Any) -> None: ...
+    def pending(self) -> int: ...
+    def results(self) -> Iterator[Tuple[int, bool, Any]]: ...
+    def clear(self) -> None: ...
+
+class SQLiteQueue:
+    path: str
+    name: str
+    poll: float
+
+    def __init__(self, path: str, name: str = "batch", poll: float = 0.05) -> None: ...
+    def _db(self) -> ContextManager[Any]: ...
+    def open(self, context: Tuple[Any, bytes, Optional[float]], tasks: Iterable[Tuple[int, Params]]) -> None: ...
+    def context(self) -> Tuple[Any, bytes, Optional[float]]: ...
+    def claim(self) -> Optional[Tuple[int, Params]]: ...
+    def complete(self, idx: int, ok: bool, result: Any) -> None: ...
+    def pending(self) -> int: ...
+    def results(self) -> Iterator[Tuple[int, bool, Any]]: ...
+    def clear(self) -> None: ...
+
+def run_worker(queue: WorkQueue) -> None: ...
+
+class DistributedBatchFlow(BatchFlow[_PostResult]):
+    workers: Optional[int]
+    queue: Optional[WorkQueue]
+
+    def __init__(
+        self,
+        start: Optional[BaseNode[Any, Any, Any]] = None,
+        workers: Optional[int] = None,
+        queue: Optional[WorkQueue] = None,
+        timeout: Optional[float] = None,
+        checkpoint: Optional[Checkpoint] = None,
+        incremental: Optional[Cache] = None,
+    ) -> None: ...
+    def _run(self, shared: SharedData) -> _PostResult: ...
+
+class Parallel(BaseNode[_PrepResult, List[Any], _PostResult]):
+    branches: List[BaseNode[Any, Any, Any]]
+    max_workers: Optional[int]
+    executor: Optional[Executor]
+
+    def __init__(
+        self,
+        *branches: BaseNode[Any, Any, Any],
+        max_workers: Optional[int] = None,
+        executor: Optional[Executor] = None,
+    ) -> None: ...
+    def _branch(self, shared: SharedData, b: BaseNode[Any, Any, Any]) -> Any: ...
+    def _run(self, shared: SharedData) -> _PostResult: ...
+
+MergeRule = Union[str, Callable[[Any, Any], Any]]
+
+class MergePolicy:
+    rules: Dict[str, MergeRule]
+    default: MergeRule
+
+    def __init__(self, rules: Optional[Dict[str, MergeRule]] = None, default: MergeRule = "last") -> None: ...
+    def overlay(self, shared: SharedData) -> MutableMapping[str, Any]: ...
+    def merge(self, shared: SharedData, overlays: Iterable[MutableMapping[str, Any]]) -> None: ...
+
+class DAGFlow(Flow[_PrepResult, Any, _PostResult]):
+    nodes: List[BaseNode[Any, Any, Any]]
+    max_workers: Optional[int]
+    executor: Optional[Executor]
+    debug: bool
+
+    def __init__(
+        self,
+        nodes: Iterable[BaseNode[Any, Any, Any]],
+        max_workers: Optional[int] = None,
+        executor: Optional[Executor] = None,
+        debug: bool = False,
+        timeout: Optional[float] = None,
+        incremental: Optional[Cache] = None,
+    ) -> None: ...
+    def _prepare(
+        self, params: Optional[Params]
+    ) -> Tuple[List[BaseNode[Any, Any, Any]], List[Set[int]], List[List[int]]]: ...
+    def _view(self, shared: SharedData, node: BaseNode[Any, Any, Any]) -> SharedData: ...
+
+class HedgePolicy:
+    delay: Optional[float]
+    percentile: Optional[float]
+    max_hedges: int
+    min_samples: int
+    latencies: Deque[float]
+    calls: int
+    hedges: int
+    hedge_wins: int
+
+    def __init__(
+        self,
+        delay: Optional[float] = None,
+        percentile: Optional[float] = None,
+        max_hedges: int = 1,
+        min_samples: int = 20,
+        window: int = 200,
+    ) -> None: ...
+    def hedge_delay(self) -> Optional[float]: ...
+    async def run(self, fn: Callable[[Any], Awaitable[Any]], arg: Any) -> Any: ...
+
 class AsyncNode(Node[_PrepResult, _ExecResult, _PostResult]):
+    hedge: Optional[HedgePolicy]
+
+    def __init__(
+        self,
+        max_retries: int = 1,
+        wait: Union[int, float] = 0,
+        hedge: Optional[HedgePolicy] = None,
+        retry: Optional[RetryPolicy] = None,
+        timeout: Optional[float] = None,
+        cache: Union[Cache, bool, None] = None,
+        rate_limit: Optional[RateLimiter] = None,
+    ) -> None: ...
     async def prep_async(self, shared: SharedData) -> _PrepResult: ...
     async def exec_async(self, prep_res: _PrepResult) -> _ExecResult: ...
+    def exec_stream_async(self, prep_res: _PrepResult) -> AsyncIterator[Any]: ...
+    async def _exec_stream(self, prep_res: _PrepResult) -> Any: ...
+    async def exec_batch_async(self, items: List[_PrepResult]) -> List[Union[_ExecResult, Exception]]: ...
     async def exec_fallback_async(self, prep_res: _PrepResult, exc: Exception) -> _ExecResult: ...
     async def post_async(
         self, shared: SharedData, prep_res: _PrepResult, exec_res: _ExecResult
     ) -> _PostResult: ...
     async def _exec(self, prep_res: _PrepResult) -> _ExecResult: ...
+    async def _attempt(self, prep_res: Any, batch: bool = False) -> Any: ...
+    async def _batch_async(
+        self, items: Optional[Iterable[Any]], run: Callable[[Iterable[Any], Iterable[Optional[str]]], Awaitable[List[Any]]]
+    ) -> List[Any]: ...
+    async def _exec_chunk(self, items: List[_PrepResult], keys: List[Optional[str]]) -> List[_ExecResult]: ...
+    async def _exec_one(self, prep_res: Any, key: Optional[str] = None, batch: bool = False) -> Any: ...
     async def run_async(self, shared: SharedData) -> _PostResult: ...
     async def _run_async(self, shared: SharedData) -> _PostResult: ...
+    async def _run_traced_async(self, shared: SharedData) -> _PostResult: ...
     def _run(self, shared: SharedData) -> _PostResult: ...
 
 class AsyncBatchNode(AsyncNode[Optional[List[_PrepResult]], List[_ExecResult], _PostResult], BatchNode[Optional[List[_PrepResult]], List[_ExecResult], _PostResult]):
     async def _exec(self, items: Optional[List[_PrepResult]]) -> List[_ExecResult]: ...
+    async def _run_items(self, xs: Iterable[_PrepResult], ks: Iterable[Optional[str]]) -> List[_ExecResult]: ...
+
+class AdaptiveLimit:
+    min_limit: int
+    max_limit: int
+    backoff: float
+    latency: Optional[float]
+    backoff_on: Union[Type[BaseException], Tuple[Type[BaseException], ...]]
+    throttled: int
+
+    def __init__(
+        self,
+        initial: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 256,
+        backoff: float = 0.5,
+        latency: Optional[float] = None,
+        backoff_on: Union[Type[BaseException], Tuple[Type[BaseException], ...]] = (TimeoutError,),
+    ) -> None: ...
+    @property
+    def limit(self) -> int: ...
+    def congested(self, exc: BaseException) -> bool: ...
+    def record(self, latency: float, exc: Optional[BaseException] = None) -> None: ...
 
 class AsyncParallelBatchNode(AsyncNode[Optional[List[_PrepResult]], List[_ExecResult], _PostResult], BatchNode[Optional[List[_PrepResult]], List[_ExecResult], _PostResult]):
-    async def _exec(self, items: Optional[List[_PrepResult]]) -> List[_ExecResult]: ...
+    max_concurrency: Union[int, AdaptiveLimit, None]
+    as_completed: bool
+    keep_results: bool
+    on_error: str
+
+    def __init__(
+        self,
+        max_retries: int = 1,
+        wait: Union[int, float] = 0,
+        max_concurrency: Union[int, AdaptiveLimit, None] = None,
+        as_completed: bool = False,
+        keep_results: bool = True,
+        on_error: str = "raise",
+        hedge: Optional[HedgePolicy] = None,
+        batch_size: Optional[int] = None,
+        retry: Optional[RetryPolicy] = None,
+        timeout: Optional[float] = None,
+        cache: Union[Cache, bool, None] = None,
+        rate_limit: Optional[RateLimiter] = None,
+    ) -> None: ...
+    async def post_item_async(self, shared: SharedData, item: _PrepResult, exec_res: _ExecResult) -> None: ...
+    async def _run_async(self, shared: SharedData) -> _PostResult: ...
+    async def _exec(self, items: Optional[List[_PrepResult]]) -> Optional[List[_ExecResult]]: ...
+    async def _run_items(self, xs: Iterable[_PrepResult], ks: Iterable[Optional[str]]) -> List[_ExecResult]: ...
+    async def _exec_one(self, prep_res: Any, key: Optional[str] = None, batch: bool = False) -> Any: ...
+    async def _attempt(self, prep_res: Any, batch: bool = False) -> Any: ...
 
 class AsyncFlow(Flow[_PrepResult, Any, _PostResult], AsyncNode[_PrepResult, Any, _PostResult]):
+    offload_sync: Union[bool, str]
+    executor: Optional[Executor]
+
+    def __init__(
+        self,
+        start: Optional[BaseNode[Any, Any, Any]] = None,
+        offload_sync: Union[bool, str] = True,
+        executor: Optional[Executor] = None,
+        timeout: Optional[float] = None,
+        checkpoint: Optional[Checkpoint] = None,
+        incremental: Optional[Cache] = None,
+    ) -> None: ...
+    async def _run_node_async(self, curr: BaseNode[Any, Any, Any], shared: SharedData) -> Any: ...
+    async def _step_async(self, curr: BaseNode[Any, Any, Any], shared: SharedData) -> Any: ...
+    async def _run_sync_or_async(self, curr: BaseNode[Any, Any, Any], shared: SharedData) -> Any: ...
+    async def _orch_plan_async(
+        self, shared: SharedData, params: Optional[Params] = None, item: Optional[int] = None
+    ) -> Any: ...
     async def _orch_async(
-        self, shared: SharedData, params: Optional[Params] = None
+        self, shared: SharedData, params: Optional[Params] = None, item: Optional[int] = None
     ) -> Any: ...
     async def _run_async(self, shared: SharedData) -> _PostResult: ...
+    async def resume_async(self, shared: SharedData) -> _PostResult: ...
+    def stream(self, shared: SharedData) -> AsyncIterator[Tuple[AsyncNode[Any, Any, Any], Any]]: ...
+    async def _batch_item_async(self, shared: SharedData, bp: Params, item: int) -> None: ...
     async def post_async(
         self, shared: SharedData, prep_res: _PrepResult, exec_res: Any
     ) -> _PostResult: ...
 
+class AsyncParallel(AsyncNode[_PrepResult, List[Any], _PostResult]):
+    branches: List[BaseNode[Any, Any, Any]]
+    offload_sync: Union[bool, str]
+    executor: Optional[Executor]
+    isolate: Optional[MergePolicy]
+
+    def __init__(
+        self,
+        *branches: BaseNode[Any, Any, Any],
+        offload_sync: Union[bool, str] = True,
+        executor: Optional[Executor] = None,
+        isolate: Union[MergePolicy, bool, None] = None,
+    ) -> None: ...
+    async def _run_node_async(self, curr: BaseNode[Any, Any, Any], shared: SharedData) -> Any: ...
+    async def _branch(self, shared: SharedData, b: BaseNode[Any, Any, Any]) -> Any: ...
+    async def _run_async(self, shared: SharedData) -> _PostResult: ...
+
+class AsyncDAGFlow(AsyncFlow[_PrepResult, Any, _PostResult]):
+    nodes: List[BaseNode[Any, Any, Any]]
+    debug: bool
+
+    def __init__(
+        self,
+        nodes: Iterable[BaseNode[Any, Any, Any]],
+        offload_sync: Union[bool, str] = True,
+        executor: Optional[Executor] = None,
+        debug: bool = False,
+        timeout: Optional[float] = None,
+        incremental: Optional[Cache] = None,
+    ) -> None: ...
+    def _prepare(
+        self, params: Optional[Params]
+    ) -> Tuple[List[BaseNode[Any, Any, Any]], List[Set[int]], List[List[int]]]: ...
+    def _view(self, shared: SharedData, node: BaseNode[Any, Any, Any]) -> SharedData: ...
+
+class AsyncStreamNode(AsyncNode[_PrepResult, _ExecResult, _PostResult]):
+    flatten: bool
+
+    async def _pump(self, inq: asyncio.Queue[Any], outq: asyncio.Queue[Any]) -> None: ...
+    async def _coalesce(self, inq: asyncio.Queue[Any], batch: List[Any]) -> Tuple[Any, List[Any]]: ...
+
+class AsyncStreamFlow(AsyncFlow[_PrepResult, Any, _PostResult]):
+    maxsize: int
+
+    def __init__(
+        self,
+        start: Optional[BaseNode[Any, Any, Any]] = None,
+        maxsize: int = 64,
+        offload_sync: Union[bool, str] = True,
+        executor: Optional[Executor] = None,
+        timeout: Optional[float] = None,
+    ) -> None: ...
+    def _stages(self, params: Optional[Params]) -> List[BaseNode[Any, Any, Any]]: ...
+
 class AsyncBatchFlow(AsyncFlow[Optional[List[Params]], Any, _PostResult], BatchFlow[Optional[List[Params]], Any, _PostResult]):
     async def _run_async(self, shared: SharedData) -> _PostResult: ...
 
 class AsyncParallelBatchFlow(AsyncFlow[Optional[List[Params]], Any, _PostResult], BatchFlow[Optional[List[Params]], Any, _PostResult]):
-    async def _run_async(self, shared: SharedData) -> _PostResult: ...
\ No newline at end of file
+    max_concurrency: Union[int, AdaptiveLimit, None]
+    on_error: str
+    isolate: Optional[MergePolicy]
+
+    def __init__(
+        self,
+        start: Optional[BaseNode[Any, Any, Any]] = None,
+        max_concurrency: Union[int, AdaptiveLimit, None] = None,
+        on_error: str = "raise",
+        isolate: Union[MergePolicy, bool, None] = None,
+        offload_sync: Union[bool, str] = True,
+        executor: Optional[Executor] = None,
+        timeout: Optional[float] = None,
+        checkpoint: Optional[Checkpoint] = None,
+        incremental: Optional[Cache] = None,
+    ) -> None: ...
+    async def _collect_item(
+        self, shared: SharedData, bp: Params, i: int, errors: Optional[List[Optional[Exception]]]
+    ) -> None: ...
+    async def _run_async(self, shared: SharedData) -> _PostResult: ...
+
+def register_flow(name: str, spec: Union[FlowSpec, Callable[[], Union[FlowSpec, BaseNode[Any, Any, Any]]]]) -> Any: ...
+def get_flow(name: str) -> BaseNode[Any, Any, Any]: ...
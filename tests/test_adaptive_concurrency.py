@@ -0,0 +1,100 @@
+import unittest
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import AsyncParallelBatchNode, AdaptiveLimit, add_listener, remove_listener
+
+class Throttled(Exception):
+    status_code = 429
+
+class Endpoint:
+    def __init__(self, capacity=None, base_latency=0.005, per_call_latency=0.0):
+        self.capacity, self.base_latency, self.per_call_latency = capacity, base_latency, per_call_latency
+        self.in_flight = self.peak = self.rejected = 0
+
+    async def call(self):
+        if self.capacity is not None and self.in_flight >= self.capacity:
+            self.rejected += 1
+            raise Throttled()
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.base_latency + self.per_call_latency * self.in_flight)
+        finally:
+            self.in_flight -= 1
+
+class Caller(AsyncParallelBatchNode):
+    async def prep_async(self, shared_storage):
+        return range(shared_storage['items'])
+
+    async def exec_async(self, item):
+        await self.params['endpoint'].call()
+        return item
+
+    async def post_async(self, shared_storage, prep_result, exec_result):
+        shared_storage['results'] = exec_result
+
+def run(endpoint, limit, items=300):
+    node = Caller(max_retries=20, wait=0.01, max_concurrency=limit)
+    node.set_params({'endpoint': endpoint})
+    shared_storage = {'items': items}
+    asyncio.run(node.run_async(shared_storage))
+    return shared_storage['results']
+
+class TestAdaptiveLimit(unittest.TestCase):
+    def test_grows_while_healthy(self):
+        limit = AdaptiveLimit(initial=2, max_limit=50)
+        self.assertEqual(run(Endpoint(), limit), list(range(300)))
+        self.assertGreater(limit.limit, 10)
+
+    def test_backs_off_on_throttling(self):
+        endpoint, limit = Endpoint(capacity=8), AdaptiveLimit(initial=32)
+        self.assertEqual(run(endpoint, limit), list(range(300)))
+        self.assertGreater(limit.throttled, 0)
+        self.assertLessEqual(limit.limit, 16)
+        self.assertGreaterEqual(limit.limit, 2)
+
+    def test_latency_target(self):
+        endpoint, limit = Endpoint(base_latency=0.002, per_call_latency=0.001), AdaptiveLimit(initial=4, latency=0.012)
+        run(endpoint, limit, items=400)
+        self.assertLessEqual(limit.limit, 15)
+
+    def test_limit_bounds(self):
+        limit = AdaptiveLimit(initial=4, min_limit=2, max_limit=5)
+        for _ in range(100):
+            limit.record(0.01)
+        self.assertEqual(limit.limit, 5)
+        for _ in range(20):
+            limit._dropped = 0
+            limit.record(0.01, TimeoutError())
+        self.assertEqual(limit.limit, 2)
+
+    def test_other_errors_do_not_move_limit(self):
+        limit = AdaptiveLimit(initial=4)
+        limit.record(0.01, ValueError("bad input"))
+        self.assertEqual((limit.limit, limit.throttled), (4, 0))
+
+    def test_limit_reported_as_metric(self):
+        seen = []
+
+        def listener(event, node, info):
+            if event == 'concurrency':
+                seen.append(info['limit'])
+
+        add_listener(listener)
+        try:
+            run(Endpoint(), AdaptiveLimit(initial=2), items=20)
+        finally:
+            remove_listener(listener)
+        self.assertEqual(len(seen), 20)
+        self.assertGreaterEqual(seen[-1], seen[0])
+
+    def test_in_flight_follows_current_limit(self):
+        endpoint = Endpoint()
+        run(endpoint, AdaptiveLimit(initial=3, max_limit=3))
+        self.assertEqual(endpoint.peak, 3)
+
+if __name__ == '__main__':
+    unittest.main()
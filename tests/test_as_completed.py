@@ -0,0 +1,72 @@
+import unittest
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import AsyncFlow, AsyncParallelBatchNode, Cache
+
+class Progressive(AsyncParallelBatchNode):
+    async def prep_async(self, shared_storage):
+        return shared_storage['delays']
+
+    async def exec_async(self, delay):
+        await asyncio.sleep(delay)
+        return delay * 1000
+
+    async def post_item_async(self, shared_storage, item, exec_result):
+        shared_storage['seen'].append((item, exec_result, time.perf_counter() - shared_storage['start']))
+
+    async def post_async(self, shared_storage, prep_result, exec_result):
+        shared_storage['results'] = exec_result
+
+def run(node, delays):
+    shared_storage = {'delays': delays, 'seen': [], 'start': time.perf_counter()}
+    asyncio.run(node.run_async(shared_storage))
+    return shared_storage
+
+class TestAsCompleted(unittest.TestCase):
+    def test_items_are_posted_in_completion_order(self):
+        shared_storage = run(Progressive(as_completed=True), [0.08, 0.01, 0.04])
+        self.assertEqual([item for item, _, _ in shared_storage['seen']], [0.01, 0.04, 0.08])
+        self.assertLess(shared_storage['seen'][0][2], 0.05)
+        self.assertEqual(shared_storage['results'], [80, 10, 40])
+
+    def test_release_results(self):
+        shared_storage = run(Progressive(as_completed=True, keep_results=False), [0.01, 0.02])
+        self.assertIsNone(shared_storage['results'])
+        self.assertEqual([r for _, r, _ in shared_storage['seen']], [10, 20])
+
+    def test_bounded_concurrency(self):
+        shared_storage = run(Progressive(as_completed=True, max_concurrency=1), [0.03, 0.01])
+        self.assertEqual([item for item, _, _ in shared_storage['seen']], [0.03, 0.01])
+
+    def test_default_mode_skips_post_item(self):
+        shared_storage = run(Progressive(), [0.01, 0.02])
+        self.assertEqual(shared_storage['seen'], [])
+        self.assertEqual(shared_storage['results'], [10, 20])
+
+    def test_cache_hits_are_posted(self):
+        node = Progressive(as_completed=True, cache=Cache())
+        run(node, [0.01])
+        shared_storage = run(node, [0.01, 0.02])
+        self.assertEqual(sorted(r for _, r, _ in shared_storage['seen']), [10, 20])
+
+    def test_batches_are_posted_per_item(self):
+        class Batched(Progressive):
+            async def exec_batch_async(self, delays):
+                await asyncio.sleep(max(delays))
+                return [d * 1000 for d in delays]
+
+        shared_storage = run(Batched(as_completed=True, batch_size=2), [0.05, 0.04, 0.01])
+        self.assertEqual([item for item, _, _ in shared_storage['seen']], [0.01, 0.05, 0.04])
+        self.assertEqual(shared_storage['results'], [50, 40, 10])
+
+    def test_inside_flow(self):
+        shared_storage = {'delays': [0.02, 0.01], 'seen': [], 'start': time.perf_counter()}
+        asyncio.run(AsyncFlow(start=Progressive(as_completed=True)).run_async(shared_storage))
+        self.assertEqual([item for item, _, _ in shared_storage['seen']], [0.01, 0.02])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+import asyncio
+import threading
+import time
+import sys
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, AsyncNode, Flow, AsyncFlow
+
+class BlockingNode(Node):
+    def prep(self, shared_storage):
+        shared_storage.setdefault('prep_threads', []).append(threading.get_ident())
+
+    def exec(self, prep_result):
+        time.sleep(0.1)
+        return threading.get_ident()
+
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage['exec_thread'] = exec_result
+        return "done"
+
+class Ticker:
+    def __init__(self):
+        self.ticks = 0
+
+    async def run(self, stop):
+        while not stop.is_set():
+            self.ticks += 1
+            await asyncio.sleep(0.01)
+
+class TestAsyncFlowOffload(unittest.TestCase):
+    def run_with_ticker(self, flow, shared_storage):
+        async def main():
+            ticker, stop = Ticker(), asyncio.Event()
+            task = asyncio.create_task(ticker.run(stop))
+            action = await flow.run_async(shared_storage)
+            stop.set()
+            await task
+            return action, ticker.ticks
+        return asyncio.run(main())
+
+    def test_sync_node_does_not_block_loop(self):
+        shared_storage = {}
+        action, ticks = self.run_with_ticker(AsyncFlow(start=BlockingNode()), shared_storage)
+        self.assertEqual(action, "done")
+        self.assertGreater(ticks, 3)
+        self.assertNotEqual(shared_storage['exec_thread'], threading.get_ident())
+
+    def test_opt_out_runs_inline(self):
+        shared_storage = {}
+        action, ticks = self.run_with_ticker(AsyncFlow(start=BlockingNode(), offload_sync=False), shared_storage)
+        self.assertEqual(action, "done")
+        self.assertLessEqual(ticks, 1)
+        self.assertEqual(shared_storage['exec_thread'], threading.get_ident())
+
+    def test_exec_only_offload(self):
+        shared_storage = {}
+        self.run_with_ticker(AsyncFlow(start=BlockingNode(), offload_sync="exec"), shared_storage)
+        self.assertEqual(shared_storage['prep_threads'], [threading.get_ident()])
+        self.assertNotEqual(shared_storage['exec_thread'], threading.get_ident())
+
+    def test_custom_executor(self):
+        with ThreadPoolExecutor(1, thread_name_prefix="pf-test") as executor:
+            class NameNode(Node):
+                def exec(self, prep_result):
+                    return threading.current_thread().name
+
+                def post(self, shared_storage, prep_result, exec_result):
+                    shared_storage['name'] = exec_result
+
+            shared_storage = {}
+            asyncio.run(AsyncFlow(start=NameNode(), executor=executor).run_async(shared_storage))
+            self.assertTrue(shared_storage['name'].startswith("pf-test"))
+
+    def test_nested_sync_flow_and_async_nodes(self):
+        class AsyncStep(AsyncNode):
+            async def post_async(self, shared_storage, prep_result, exec_result):
+                shared_storage['async_ran'] = True
+
+        inner = Flow(start=BlockingNode())
+        inner - "done" >> AsyncStep()
+        shared_storage = {}
+        asyncio.run(AsyncFlow(start=inner).compile().run_async(shared_storage))
+        self.assertTrue(shared_storage['async_ran'])
+        self.assertNotEqual(shared_storage['exec_thread'], threading.get_ident())
+
+if __name__ == '__main__':
+    unittest.main()
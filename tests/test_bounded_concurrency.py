@@ -0,0 +1,125 @@
+import unittest
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import AsyncNode, AsyncFlow, AsyncParallelBatchNode, AsyncParallelBatchFlow
+
+class InFlightTracker:
+    def __init__(self):
+        self.current = 0
+        self.peak = 0
+
+    async def run(self, delay):
+        self.current += 1
+        self.peak = max(self.peak, self.current)
+        await asyncio.sleep(delay)
+        self.current -= 1
+
+class BoundedDoubler(AsyncParallelBatchNode):
+    def __init__(self, tracker, max_concurrency=None, delays=None):
+        super().__init__(max_concurrency=max_concurrency)
+        self.tracker = tracker
+        self.delays = delays or {}
+
+    async def prep_async(self, shared_storage):
+        return shared_storage['numbers']
+
+    async def exec_async(self, number):
+        await self.tracker.run(self.delays.get(number, 0.01))
+        return number * 2
+
+    async def post_async(self, shared_storage, prep_result, exec_result):
+        shared_storage['doubled'] = exec_result
+
+class TestBoundedParallelBatchNode(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_limits_items_in_flight(self):
+        tracker = InFlightTracker()
+        shared_storage = {'numbers': list(range(20))}
+        self.loop.run_until_complete(BoundedDoubler(tracker, max_concurrency=3).run_async(shared_storage))
+        self.assertEqual(shared_storage['doubled'], [n * 2 for n in range(20)])
+        self.assertEqual(tracker.peak, 3)
+
+    def test_results_keep_input_order(self):
+        tracker = InFlightTracker()
+        shared_storage = {'numbers': [0, 1, 2, 3]}
+        node = BoundedDoubler(tracker, max_concurrency=2, delays={0: 0.05, 1: 0.01, 2: 0.01, 3: 0.01})
+        self.loop.run_until_complete(node.run_async(shared_storage))
+        self.assertEqual(shared_storage['doubled'], [0, 2, 4, 6])
+
+    def test_unbounded_by_default(self):
+        tracker = InFlightTracker()
+        shared_storage = {'numbers': list(range(10))}
+        self.loop.run_until_complete(BoundedDoubler(tracker).run_async(shared_storage))
+        self.assertEqual(tracker.peak, 10)
+
+    def test_lazy_generator_input(self):
+        created = []
+
+        class GeneratorDoubler(BoundedDoubler):
+            async def prep_async(self, shared_storage):
+                def gen():
+                    for n in range(6):
+                        created.append((n, self.tracker.current))
+                        yield n
+                return gen()
+
+        tracker = InFlightTracker()
+        shared_storage = {}
+        self.loop.run_until_complete(GeneratorDoubler(tracker, max_concurrency=2).run_async(shared_storage))
+        self.assertEqual(shared_storage['doubled'], [0, 2, 4, 6, 8, 10])
+        self.assertTrue(all(in_flight < 2 for _, in_flight in created))
+
+    def test_error_cancels_pending_items(self):
+        started = []
+
+        class FailingDoubler(BoundedDoubler):
+            async def exec_async(self, number):
+                started.append(number)
+                if number == 1:
+                    raise ValueError("boom")
+                await asyncio.sleep(0.05)
+                return number
+
+        with self.assertRaises(ValueError):
+            self.loop.run_until_complete(FailingDoubler(InFlightTracker(), max_concurrency=2).run_async({'numbers': list(range(10))}))
+        self.assertLess(len(started), 10)
+
+class TestBoundedParallelBatchFlow(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_limits_sub_flows_in_flight(self):
+        tracker = InFlightTracker()
+
+        class Worker(AsyncNode):
+            async def exec_async(self, prep_result):
+                await tracker.run(0.01)
+
+            async def post_async(self, shared_storage, prep_result, exec_result):
+                shared_storage.setdefault('done', []).append(self.params['i'])
+
+        class Batch(AsyncParallelBatchFlow):
+            async def prep_async(self, shared_storage):
+                return [{'i': i} for i in range(12)]
+
+        shared_storage = {}
+        flow = Batch(start=AsyncFlow(start=Worker()), max_concurrency=4)
+        self.loop.run_until_complete(flow.run_async(shared_storage))
+        self.assertEqual(sorted(shared_storage['done']), list(range(12)))
+        self.assertEqual(tracker.peak, 4)
+
+if __name__ == '__main__':
+    unittest.main()
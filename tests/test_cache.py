@@ -0,0 +1,184 @@
+import unittest
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, BatchNode, AsyncNode, AsyncParallelBatchNode, ThreadPoolBatchNode, Cache
+
+class CountingSquare(Node):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.calls = []
+
+    def prep(self, shared_storage):
+        return shared_storage['n']
+
+    def exec(self, n):
+        self.calls.append(n)
+        if n < 0:
+            raise ValueError("negative")
+        return n * n
+
+    def exec_fallback(self, prep_result, exc):
+        return None
+
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage['result'] = exec_result
+
+class OtherSquare(CountingSquare):
+    pass
+
+class CountingBatch(BatchNode):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.calls = []
+
+    def prep(self, shared_storage):
+        return shared_storage['numbers']
+
+    def exec(self, n):
+        self.calls.append(n)
+        return n * n
+
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage['squares'] = exec_result
+
+class ThreadBatch(ThreadPoolBatchNode):
+    calls = []
+
+    def prep(self, shared_storage):
+        return shared_storage['numbers']
+
+    def exec(self, n):
+        self.calls.append(n)
+        return n * n
+
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage['squares'] = exec_result
+
+class AsyncCountingBatch(AsyncParallelBatchNode):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.calls = []
+
+    async def prep_async(self, shared_storage):
+        return shared_storage['numbers']
+
+    async def exec_async(self, n):
+        self.calls.append(n)
+        await asyncio.sleep(0)
+        return n * n
+
+    async def post_async(self, shared_storage, prep_result, exec_result):
+        shared_storage['squares'] = exec_result
+
+class TestNodeCache(unittest.TestCase):
+    def test_hit_skips_exec(self):
+        node = CountingSquare(cache=True)
+        for _ in range(3):
+            shared_storage = {'n': 4}
+            node.run(shared_storage)
+            self.assertEqual(shared_storage['result'], 16)
+        self.assertEqual(node.calls, [4])
+
+    def test_fallback_results_are_not_cached(self):
+        node = CountingSquare(cache=True)
+        node.run({'n': -1})
+        node.run({'n': -1})
+        self.assertEqual(node.calls, [-1, -1])
+
+    def test_key_includes_node_class_and_version(self):
+        cache = Cache()
+        a, b = CountingSquare(cache=cache), OtherSquare(cache=cache)
+        a.run({'n': 3})
+        b.run({'n': 3})
+        self.assertEqual((a.calls, b.calls), ([3], [3]))
+        self.assertNotEqual(Cache(version="v1").key(a, 3), Cache(version="v2").key(a, 3))
+
+    def test_unpicklable_input_runs_uncached(self):
+        node = CountingSquare(cache=True)
+        self.assertIsNone(node.cache.key(node, lambda: None))
+
+    def test_lru_eviction(self):
+        node = CountingSquare(cache=Cache(maxsize=2))
+        for n in [1, 2, 3, 1]:
+            node.run({'n': n})
+        self.assertEqual(node.calls, [1, 2, 3, 1])
+
+    def test_ttl_expiry(self):
+        node = CountingSquare(cache=Cache(ttl=0.2))
+        node.run({'n': 2})
+        node.run({'n': 2})
+        time.sleep(0.25)
+        node.run({'n': 2})
+        self.assertEqual(node.calls, [2, 2])
+
+class TestDiskCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'cache.db')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_survives_new_process_memory(self):
+        CountingSquare(cache=Cache(path=self.path)).run({'n': 5})
+        node = CountingSquare(cache=Cache(path=self.path))
+        shared_storage = {'n': 5}
+        node.run(shared_storage)
+        self.assertEqual(shared_storage['result'], 25)
+        self.assertEqual(node.calls, [])
+
+    def test_size_eviction_drops_least_recently_used(self):
+        cache = Cache(path=self.path, max_bytes=100)
+        keys = [f"k{i}" for i in range(5)]
+        for k in keys:
+            cache.set(k, b"x" * 30)
+            time.sleep(0.001)
+        disk = Cache(path=self.path, max_bytes=100)
+        disk.get_many([keys[0]])
+        disk.evict()
+        self.assertEqual([r == b"x" * 30 for r in Cache(path=self.path).get_many(keys)], [True, False, False, False, True])
+
+class TestBatchCache(unittest.TestCase):
+    def test_batch_executes_only_misses(self):
+        node = CountingBatch(cache=True)
+        node.run({'numbers': [1, 2]})
+        shared_storage = {'numbers': [1, 2, 3, 2]}
+        node.run(shared_storage)
+        self.assertEqual(shared_storage['squares'], [1, 4, 9, 4])
+        self.assertEqual(node.calls, [1, 2, 3])
+
+    def test_thread_pool_batch(self):
+        node = ThreadBatch(cache=True, max_workers=4)
+        node.run({'numbers': [1, 2, 3]})
+        shared_storage = {'numbers': [3, 4]}
+        node.run(shared_storage)
+        self.assertEqual(shared_storage['squares'], [9, 16])
+        self.assertEqual(sorted(node.calls), [1, 2, 3, 4])
+
+    def test_async_parallel_batch(self):
+        node = AsyncCountingBatch(cache=True, max_concurrency=2)
+        asyncio.run(node.run_async({'numbers': [1, 2]}))
+        shared_storage = {'numbers': [2, 3, 1]}
+        asyncio.run(node.run_async(shared_storage))
+        self.assertEqual(shared_storage['squares'], [4, 9, 1])
+        self.assertEqual(node.calls, [1, 2, 3])
+
+    def test_async_node(self):
+        class AsyncSquare(AsyncNode):
+            async def exec_async(self, n):
+                calls.append(n)
+                return n * n
+
+        calls = []
+        node = AsyncSquare(cache=True)
+        self.assertEqual([asyncio.run(node._exec(3)) for _ in range(2)], [9, 9])
+        self.assertEqual(calls, [3])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,173 @@
+import unittest
+import asyncio
+import tempfile
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import (Node, AsyncNode, Flow, AsyncFlow, BatchFlow, AsyncParallelBatchFlow, ThreadPoolBatchFlow,
+                        DirCheckpoint, SQLiteCheckpoint)
+
+class Crash(Exception):
+    pass
+
+class Step(Node):
+    def __init__(self, name, calls, crash_on=None):
+        super().__init__()
+        self.name, self.calls, self.crash_on = name, calls, crash_on
+
+    def exec(self, prep_result):
+        key = (self.name, self.params.get('item'))
+        self.calls.append(key)
+        if self.crash_on is not None and key in self.crash_on:
+            self.crash_on.discard(key)
+            raise Crash(key)
+        return key
+
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage.setdefault('done', []).append(exec_result)
+
+class AsyncStep(AsyncNode):
+    def __init__(self, name, calls, crash_on=None):
+        super().__init__()
+        self.name, self.calls, self.crash_on = name, calls, crash_on
+
+    async def exec_async(self, prep_result):
+        key = (self.name, self.params.get('item'))
+        self.calls.append(key)
+        await asyncio.sleep(0.001 * (self.params.get('item') or 0))
+        if self.crash_on is not None and key in self.crash_on:
+            self.crash_on.discard(key)
+            raise Crash(key)
+        return key
+
+    async def post_async(self, shared_storage, prep_result, exec_result):
+        shared_storage.setdefault('done', []).append(exec_result)
+
+class Items(BatchFlow):
+    def prep(self, shared_storage):
+        return [{'item': i} for i in range(4)]
+
+class ThreadItems(ThreadPoolBatchFlow):
+    def prep(self, shared_storage):
+        return [{'item': i} for i in range(4)]
+
+class AsyncItems(AsyncParallelBatchFlow):
+    async def prep_async(self, shared_storage):
+        return [{'item': i} for i in range(4)]
+
+class ManyItems(AsyncParallelBatchFlow):
+    async def prep_async(self, shared_storage):
+        return [{'item': i % 5} for i in range(50)]
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def stores(self):
+        return [DirCheckpoint(self.tmp.name, key="flow"), SQLiteCheckpoint(os.path.join(self.tmp.name, "ckpt.db"), key="flow")]
+
+    def test_store_round_trip(self):
+        for store in self.stores():
+            self.assertIsNone(store.load())
+            store.save({'a': 1})
+            self.assertEqual(store.load(), {'a': 1})
+            store.clear()
+            self.assertIsNone(store.load())
+
+    def test_linear_flow_resumes_after_crash(self):
+        for store in self.stores():
+            calls, crash_on = [], {('b', None)}
+            a, b, c = Step('a', calls), Step('b', calls, crash_on), Step('c', calls)
+            a >> b >> c
+            flow = Flow(start=a, checkpoint=store)
+            with self.assertRaises(Crash):
+                flow.run({})
+            shared_storage = {}
+            flow.resume(shared_storage)
+            self.assertEqual(calls, [('a', None), ('b', None), ('b', None), ('c', None)])
+            self.assertEqual(shared_storage['done'], [('a', None), ('b', None), ('c', None)])
+            self.assertIsNone(store.load())
+
+    def test_run_ignores_stale_checkpoint(self):
+        store = DirCheckpoint(self.tmp.name)
+        calls = []
+        a, b = Step('a', calls), Step('b', calls, {('b', None)})
+        a >> b
+        flow = Flow(start=a, checkpoint=store)
+        with self.assertRaises(Crash):
+            flow.run({})
+        flow.run({})
+        self.assertEqual(calls, [('a', None), ('b', None), ('a', None), ('b', None)])
+
+    def test_batch_flow_skips_finished_items(self):
+        calls = []
+        x, y = Step('x', calls), Step('y', calls, {('y', 2)})
+        x >> y
+        flow = Items(start=Flow(start=x), checkpoint=DirCheckpoint(self.tmp.name))
+        with self.assertRaises(Crash):
+            flow.run({})
+        calls.clear()
+        shared_storage = {}
+        flow.resume(shared_storage)
+        # the sub-flow is one step of the batch flow, so the crashed item restarts from its beginning
+        self.assertEqual(calls, [('x', 2), ('y', 2), ('x', 3), ('y', 3)])
+        self.assertEqual(len(shared_storage['done']), 8)
+
+    def test_batch_item_resumes_mid_item(self):
+        calls = []
+        x, y = Step('x', calls), Step('y', calls, {('y', 1)})
+        x >> y
+        flow = Items(start=x, checkpoint=DirCheckpoint(self.tmp.name))
+        with self.assertRaises(Crash):
+            flow.run({})
+        calls.clear()
+        flow.resume({})
+        self.assertEqual(calls, [('y', 1), ('x', 2), ('y', 2), ('x', 3), ('y', 3)])
+
+    def test_thread_pool_batch_flow_rejects_checkpoint(self):
+        with self.assertRaises(ValueError):
+            ThreadItems(start=Step('t', []), checkpoint=DirCheckpoint(self.tmp.name))
+
+    def test_async_parallel_batch_flow_with_offloaded_sync_nodes(self):
+        flow = ManyItems(start=Flow(start=Step('s', [])), checkpoint=DirCheckpoint(self.tmp.name))
+        with self.assertRaises(ValueError):
+            asyncio.run(flow.run_async({}))
+
+    def test_async_parallel_batch_flow_with_inline_sync_nodes(self):
+        calls = []
+        a, s = AsyncStep('a', calls), Step('s', calls)
+        a >> s
+        for _ in range(5):
+            shared_storage = {}
+            flow = ManyItems(start=AsyncFlow(start=a, offload_sync=False), offload_sync=False, checkpoint=DirCheckpoint(self.tmp.name))
+            asyncio.run(flow.run_async(shared_storage))
+            self.assertEqual(len(shared_storage['done']), 100)
+
+    def test_async_parallel_batch_flow(self):
+        calls = []
+        flow = AsyncItems(start=AsyncStep('p', calls, {('p', 3)}), checkpoint=SQLiteCheckpoint(os.path.join(self.tmp.name, "a.db")))
+        with self.assertRaises(Crash):
+            asyncio.run(flow.run_async({}))
+        calls.clear()
+        shared_storage = {}
+        asyncio.run(flow.resume_async(shared_storage))
+        self.assertEqual(calls, [('p', 3)])
+        self.assertEqual(sorted(shared_storage['done']), [('p', i) for i in range(4)])
+
+    def test_async_flow(self):
+        calls = []
+        a, b = AsyncStep('a', calls), AsyncStep('b', calls, {('b', None)})
+        a >> b
+        flow = AsyncFlow(start=a, checkpoint=DirCheckpoint(self.tmp.name))
+        with self.assertRaises(Crash):
+            asyncio.run(flow.run_async({}))
+        asyncio.run(flow.resume_async({}))
+        self.assertEqual(calls, [('a', None), ('b', None), ('b', None)])
+
+if __name__ == '__main__':
+    unittest.main()
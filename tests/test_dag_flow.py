@@ -0,0 +1,128 @@
+import unittest
+import asyncio
+import time
+import warnings
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, AsyncNode, Flow, DAGFlow, AsyncDAGFlow
+
+def make_node(base, name, reads, writes, delay=0.05, log=None):
+    class Step(base):
+        pass
+
+    Step.__name__ = name
+    Step.reads, Step.writes = reads, writes
+
+    def record(shared_storage, when):
+        if log is not None:
+            log.append((name, when, time.perf_counter()))
+
+    if base is Node:
+        def post(self, shared_storage, prep_result, exec_result):
+            record(shared_storage, 'start')
+            time.sleep(delay)
+            values = [shared_storage[k] for k in reads]
+            for key in writes:
+                shared_storage[key] = f"{name}({','.join(map(str, values))})"
+            record(shared_storage, 'end')
+        Step.post = post
+    else:
+        async def post_async(self, shared_storage, prep_result, exec_result):
+            record(shared_storage, 'start')
+            await asyncio.sleep(delay)
+            values = [shared_storage[k] for k in reads]
+            for key in writes:
+                shared_storage[key] = f"{name}({','.join(map(str, values))})"
+            record(shared_storage, 'end')
+        Step.post_async = post_async
+    return Step()
+
+def times(log, name, when):
+    return next(t for n, w, t in log if n == name and w == when)
+
+class TestDAGFlow(unittest.TestCase):
+    def build(self, base, log):
+        return [
+            make_node(base, 'load', (), ('doc',), log=log),
+            make_node(base, 'summarize', ('doc',), ('summary',), log=log),
+            make_node(base, 'classify', ('doc',), ('label',), log=log),
+            make_node(base, 'report', ('summary', 'label'), ('report',), log=log),
+        ]
+
+    def check(self, log, shared_storage):
+        self.assertEqual(shared_storage['report'], 'report(summarize(load()),classify(load()))')
+        self.assertLess(abs(times(log, 'summarize', 'start') - times(log, 'classify', 'start')), 0.03)
+        self.assertGreaterEqual(times(log, 'summarize', 'start'), times(log, 'load', 'end'))
+        self.assertGreaterEqual(times(log, 'report', 'start'), max(times(log, 'summarize', 'end'), times(log, 'classify', 'end')))
+
+    def test_threaded_dag(self):
+        log, shared_storage = [], {}
+        start = time.perf_counter()
+        DAGFlow(self.build(Node, log)).run(shared_storage)
+        self.assertLess(time.perf_counter() - start, 0.19)
+        self.check(log, shared_storage)
+
+    def test_async_dag(self):
+        log, shared_storage = [], {}
+        start = time.perf_counter()
+        asyncio.run(AsyncDAGFlow(self.build(AsyncNode, log)).run_async(shared_storage))
+        self.assertLess(time.perf_counter() - start, 0.19)
+        self.check(log, shared_storage)
+
+    def test_undeclared_node_is_barrier(self):
+        log, shared_storage = [], {}
+        a = make_node(AsyncNode, 'a', (), ('x',), log=log)
+        barrier = make_node(AsyncNode, 'barrier', (), (), log=log)
+        barrier.reads = barrier.writes = None
+        b = make_node(AsyncNode, 'b', (), ('y',), log=log)
+        asyncio.run(AsyncDAGFlow([a, barrier, b]).run_async(shared_storage))
+        self.assertGreaterEqual(times(log, 'barrier', 'start'), times(log, 'a', 'end'))
+        self.assertGreaterEqual(times(log, 'b', 'start'), times(log, 'barrier', 'end'))
+
+    def test_write_after_read_ordering(self):
+        shared_storage = {'x': 'orig'}
+        reader = make_node(Node, 'reader', ('x',), ('seen',), delay=0.05)
+        writer = make_node(Node, 'writer', (), ('x',), delay=0)
+        DAGFlow([reader, writer]).run(shared_storage)
+        self.assertEqual(shared_storage['seen'], 'reader(orig)')
+
+    def test_params_and_nesting(self):
+        class Tag(Node):
+            writes = ('tag',)
+            def post(self, shared_storage, prep_result, exec_result):
+                shared_storage['tag'] = self.params['tag']
+
+        flow = Flow(start=DAGFlow([Tag()]))
+        flow.set_params({'tag': 't1'})
+        shared_storage = {}
+        flow.run(shared_storage)
+        self.assertEqual(shared_storage['tag'], 't1')
+
+    def test_failure_propagates(self):
+        class Boom(Node):
+            writes = ('boom',)
+            def exec(self, prep_result):
+                raise RuntimeError("dag failure")
+
+        with self.assertRaises(RuntimeError):
+            DAGFlow([Boom(), make_node(Node, 'after', ('boom',), ('z',))]).run({})
+
+    def test_debug_warns_on_undeclared_access(self):
+        class Sneaky(AsyncNode):
+            reads, writes = ('a',), ('b',)
+            async def post_async(self, shared_storage, prep_result, exec_result):
+                shared_storage['b'] = shared_storage['a']
+                shared_storage['c'] = shared_storage.get('d')
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            shared_storage = {'a': 1, 'd': 2}
+            asyncio.run(AsyncDAGFlow([Sneaky()], debug=True).run_async(shared_storage))
+        messages = sorted(str(w.message) for w in caught)
+        self.assertEqual(messages, ["Sneaky reads undeclared shared key 'd'", "Sneaky writes undeclared shared key 'c'"])
+        self.assertEqual(shared_storage['c'], 2)
+
+if __name__ == '__main__':
+    unittest.main()
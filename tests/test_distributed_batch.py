@@ -0,0 +1,79 @@
+import unittest
+import os
+import pickle
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, Flow, DistributedBatchFlow, SQLiteQueue, run_worker
+
+class Square(Node):
+    def prep(self, shared_storage):
+        if self.params['n'] == shared_storage.get('fail'):
+            raise ValueError(f"cannot square {self.params['n']}")
+        return self.params['n']
+
+    def exec(self, n):
+        return n * n
+
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage.setdefault('squares', {})[prep_result] = exec_result
+        shared_storage['last'] = prep_result
+        shared_storage.setdefault('pids', {})[prep_result] = os.getpid()
+
+class Squares(DistributedBatchFlow):
+    def prep(self, shared_storage):
+        return [{'n': n} for n in shared_storage['numbers']]
+
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage['done'] = True
+
+class TestDistributedBatchFlow(unittest.TestCase):
+    def test_runs_items_in_worker_processes(self):
+        shared_storage = {'numbers': list(range(10)), 'squares': {-1: 1}}
+        Squares(start=Square(), workers=3).run(shared_storage)
+        self.assertEqual(shared_storage['squares'], {-1: 1, **{n: n * n for n in range(10)}})
+        self.assertTrue(shared_storage['done'])
+        self.assertNotIn(os.getpid(), shared_storage['pids'].values())
+
+    def test_merge_is_in_input_order(self):
+        shared_storage = {'numbers': [4, 2, 9, 1]}
+        Squares(start=Square(), workers=4).run(shared_storage)
+        self.assertEqual(shared_storage['last'], 1)
+        self.assertEqual(list(shared_storage['squares']), [4, 2, 9, 1])
+
+    def test_empty_input(self):
+        shared_storage = {'numbers': []}
+        Squares(start=Square()).run(shared_storage)
+        self.assertTrue(shared_storage['done'])
+
+    def test_failed_item_raises_and_resumes(self):
+        with tempfile.TemporaryDirectory() as d:
+            queue = SQLiteQueue(os.path.join(d, 'queue.db'))
+            with self.assertRaises(ValueError):
+                Squares(start=Square(), workers=2, queue=queue).run({'numbers': [1, 2, 3, 4], 'fail': 3})
+            self.assertEqual(queue.pending(), 0)
+            first = {n: pid for _, ok, r in queue.results() if ok for n, pid in r['pids'].items()}
+            self.assertEqual(sorted(first), [1, 2, 4])
+            shared_storage = {'numbers': [1, 2, 3, 4]}
+            Squares(start=Square(), workers=1, queue=queue).run(shared_storage)
+            self.assertEqual(shared_storage['squares'], {1: 1, 2: 4, 3: 9, 4: 16})
+            self.assertEqual({n: shared_storage['pids'][n] for n in first}, first)
+            self.assertEqual(list(queue.results()), [])
+
+    def test_external_workers(self):
+        with tempfile.TemporaryDirectory() as d:
+            queue = SQLiteQueue(os.path.join(d, 'queue.db'), name='nightly')
+            flow = Squares(start=Square(), workers=0, queue=queue)
+            queue.open((flow, pickle.dumps({}), None), [(0, {'n': 5}), (1, {'n': 6})])
+            run_worker(queue)
+            self.assertEqual([(i, ok, r['squares']) for i, ok, r in queue.results()], [(0, True, {5: 25}), (1, True, {6: 36})])
+
+    def test_nested_in_flow(self):
+        shared_storage = {'numbers': [7, 8]}
+        Flow(start=Squares(start=Square(), workers=2)).run(shared_storage)
+        self.assertEqual(shared_storage['squares'], {7: 49, 8: 64})
+
+if __name__ == '__main__':
+    unittest.main()
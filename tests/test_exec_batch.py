@@ -0,0 +1,211 @@
+import unittest
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import BatchNode, AsyncBatchNode, AsyncParallelBatchNode, ThreadPoolBatchNode, ProcessPoolBatchNode, StreamNode, StreamFlow, AsyncStreamNode, AsyncStreamFlow, AsyncFlow, AsyncNode, Cache
+
+class Embed(BatchNode):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.batches, self.singles = [], []
+
+    def prep(self, shared_storage):
+        return shared_storage['texts']
+
+    def exec(self, text):
+        self.singles.append(text)
+        if text == 'bad':
+            raise ValueError("bad item")
+        return len(text)
+
+    def exec_batch(self, texts):
+        self.batches.append(list(texts))
+        if 'bad' in texts:
+            raise ValueError("batch rejected")
+        return [len(t) for t in texts]
+
+    def exec_fallback(self, prep_result, exc):
+        return -1
+
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage['lengths'] = exec_result
+
+class PartialEmbed(Embed):
+    def exec_batch(self, texts):
+        self.batches.append(list(texts))
+        return [ValueError("item failed") if t == 'bad' else len(t) for t in texts]
+
+class AsyncEmbed(AsyncBatchNode):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.batches = []
+
+    async def prep_async(self, shared_storage):
+        return shared_storage['texts']
+
+    async def exec_async(self, text):
+        return len(text)
+
+    async def exec_batch_async(self, texts):
+        self.batches.append(list(texts))
+        await asyncio.sleep(0.01)
+        return [len(t) for t in texts]
+
+    async def post_async(self, shared_storage, prep_result, exec_result):
+        shared_storage['lengths'] = exec_result
+
+class ParallelEmbed(AsyncParallelBatchNode):
+    async def prep_async(self, shared_storage):
+        return shared_storage['texts']
+
+    async def exec_batch_async(self, texts):
+        self.params['in_flight'][0] += 1
+        self.params['peak'][0] = max(self.params['peak'][0], self.params['in_flight'][0])
+        await asyncio.sleep(0.01)
+        self.params['in_flight'][0] -= 1
+        return [len(t) for t in texts]
+
+    async def post_async(self, shared_storage, prep_result, exec_result):
+        shared_storage['lengths'] = exec_result
+
+class PoolEmbed(ProcessPoolBatchNode):
+    def prep(self, shared_storage):
+        return shared_storage['texts']
+
+    def exec_batch(self, texts):
+        return [(len(t), len(texts)) for t in texts]
+
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage['lengths'] = exec_result
+
+TEXTS = ['a', 'bb', 'ccc', 'dddd', 'eeeee']
+
+class TestExecBatch(unittest.TestCase):
+    def test_splits_into_batches(self):
+        node = Embed(batch_size=2)
+        shared_storage = {'texts': TEXTS}
+        node.run(shared_storage)
+        self.assertEqual(shared_storage['lengths'], [1, 2, 3, 4, 5])
+        self.assertEqual(node.batches, [['a', 'bb'], ['ccc', 'dddd'], ['eeeee']])
+        self.assertEqual(node.singles, [])
+
+    def test_default_exec_batch_calls_exec(self):
+        class Plain(BatchNode):
+            def exec(self, text):
+                return text.upper()
+
+        self.assertEqual(Plain(batch_size=3)._exec(['a', 'b', 'c', 'd']), ['A', 'B', 'C', 'D'])
+
+    def test_failed_batch_falls_back_per_item(self):
+        node = Embed(batch_size=3, max_retries=2)
+        shared_storage = {'texts': ['a', 'bad', 'ccc', 'dddd']}
+        node.run(shared_storage)
+        self.assertEqual(shared_storage['lengths'], [1, -1, 3, 4])
+        self.assertEqual(node.batches, [['a', 'bad', 'ccc'], ['a', 'bad', 'ccc'], ['dddd']])
+        self.assertEqual(node.singles, ['a', 'bad', 'bad', 'ccc'])
+
+    def test_per_item_errors_rerun_only_failed_items(self):
+        node = PartialEmbed(batch_size=3)
+        shared_storage = {'texts': ['a', 'bad', 'ccc']}
+        node.run(shared_storage)
+        self.assertEqual(shared_storage['lengths'], [1, -1, 3])
+        self.assertEqual(node.singles, ['bad'])
+
+    def test_wrong_result_count_falls_back(self):
+        class Short(Embed):
+            def exec_batch(self, texts):
+                return [0]
+
+        node = Short(batch_size=2)
+        shared_storage = {'texts': ['a', 'bb']}
+        node.run(shared_storage)
+        self.assertEqual(shared_storage['lengths'], [1, 2])
+
+    def test_cache_hits_are_not_rebatched(self):
+        node = Embed(batch_size=2, cache=Cache())
+        node.run({'texts': ['a', 'bb']})
+        shared_storage = {'texts': ['a', 'ccc', 'bb', 'dddd']}
+        node.run(shared_storage)
+        self.assertEqual(shared_storage['lengths'], [1, 3, 2, 4])
+        self.assertEqual(node.batches, [['a', 'bb'], ['ccc', 'dddd']])
+
+    def test_process_pool(self):
+        shared_storage = {'texts': TEXTS}
+        PoolEmbed(batch_size=2, max_workers=2).run(shared_storage)
+        self.assertEqual(shared_storage['lengths'], [(1, 2), (2, 2), (3, 2), (4, 2), (5, 1)])
+
+class TestAsyncExecBatch(unittest.TestCase):
+    def test_async_batch_node(self):
+        node = AsyncEmbed(batch_size=2)
+        shared_storage = {'texts': TEXTS}
+        asyncio.run(node.run_async(shared_storage))
+        self.assertEqual(shared_storage['lengths'], [1, 2, 3, 4, 5])
+        self.assertEqual(len(node.batches), 3)
+
+    def test_parallel_batches_respect_max_concurrency(self):
+        node = ParallelEmbed(batch_size=10, max_concurrency=2)
+        node.set_params({'in_flight': [0], 'peak': [0]})
+        shared_storage = {'texts': ['x' * (i % 7) for i in range(100)]}
+        asyncio.run(node.run_async(shared_storage))
+        self.assertEqual(shared_storage['lengths'], [i % 7 for i in range(100)])
+        self.assertEqual(node.params['peak'][0], 2)
+
+class TestStreamExecBatch(unittest.TestCase):
+    def test_sync_stream(self):
+        class Source(StreamNode):
+            def prep(self, shared_storage):
+                return range(5)
+
+            def exec(self, n):
+                return n
+
+        class Double(StreamNode):
+            batch_size = 2
+
+            def exec_batch(self, items):
+                shared_storage['batches'].append(list(items))
+                return [n * 2 for n in items]
+
+            def post(self, shared_storage, prep_result, exec_result):
+                shared_storage['out'] = exec_result
+
+        shared_storage = {'batches': []}
+        source = Source()
+        source >> Double()
+        StreamFlow(start=source).run(shared_storage)
+        self.assertEqual(shared_storage['out'], [0, 2, 4, 6, 8])
+        self.assertEqual(shared_storage['batches'], [[0, 1], [2, 3], [4]])
+
+    def test_async_stream_coalesces_until_max_wait(self):
+        batches = []
+
+        class Source(AsyncStreamNode):
+            async def prep_async(self, shared_storage):
+                return range(6)
+
+            async def exec_async(self, n):
+                await asyncio.sleep(0.05 if n == 3 else 0)
+                return n
+
+        class Embed(AsyncStreamNode):
+            batch_size, max_wait = 4, 0.02
+
+            async def exec_batch_async(self, items):
+                batches.append(list(items))
+                return items
+
+            async def post_async(self, shared_storage, prep_result, exec_result):
+                shared_storage['out'] = exec_result
+
+        shared_storage = {}
+        source = Source()
+        source >> Embed()
+        asyncio.run(AsyncStreamFlow(start=source).run_async(shared_storage))
+        self.assertEqual(shared_storage['out'], list(range(6)))
+        self.assertEqual(batches, [[0, 1, 2], [3, 4, 5]])
+
+if __name__ == '__main__':
+    unittest.main()
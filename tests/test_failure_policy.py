@@ -0,0 +1,171 @@
+import unittest
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import AsyncNode, AsyncFlow, AsyncParallel, AsyncParallelBatchNode, AsyncParallelBatchFlow
+
+class Calls(AsyncParallelBatchNode):
+    async def prep_async(self, shared_storage):
+        return shared_storage['items']
+
+    async def exec_async(self, item):
+        log = self.params['log']
+        log['started'].append(item)
+        try:
+            await asyncio.sleep(0.01 if item == 'bad' else 0.1)
+        except asyncio.CancelledError:
+            log['cancelled'].append(item)
+            raise
+        if item == 'bad':
+            raise ValueError("bad item")
+        log['finished'].append(item)
+        return item.upper()
+
+    async def post_async(self, shared_storage, prep_result, exec_result):
+        shared_storage['results'] = exec_result
+
+def new_log():
+    return {'started': [], 'finished': [], 'cancelled': []}
+
+class TestFailFast(unittest.TestCase):
+    def run_node(self, **kwargs):
+        log = new_log()
+        node = Calls(**kwargs)
+        node.set_params({'log': log})
+        with self.assertRaises(ValueError):
+            asyncio.run(node.run_async({'items': ['a', 'bad', 'b', 'c']}))
+        return log
+
+    def test_unbounded_cancels_siblings(self):
+        log = self.run_node()
+        self.assertEqual(log['finished'], [])
+        self.assertEqual(sorted(log['cancelled']), ['a', 'b', 'c'])
+
+    def test_bounded_cancels_siblings_and_skips_pending(self):
+        log = self.run_node(max_concurrency=2)
+        self.assertEqual(log['started'], ['a', 'bad'])
+        self.assertEqual(log['cancelled'], ['a'])
+
+    def test_invalid_policy(self):
+        with self.assertRaises(ValueError):
+            Calls(on_error="ignore")
+
+class TestCollectAll(unittest.TestCase):
+    def test_errors_are_returned_per_item(self):
+        log = new_log()
+        node = Calls(on_error="collect", max_concurrency=2)
+        node.set_params({'log': log})
+        shared_storage = {'items': ['a', 'bad', 'b']}
+        asyncio.run(node.run_async(shared_storage))
+        a, bad, b = shared_storage['results']
+        self.assertEqual((a, b), ('A', 'B'))
+        self.assertIsInstance(bad, ValueError)
+        self.assertEqual(log['cancelled'], [])
+
+    def test_fallback_still_wins(self):
+        class Fallback(Calls):
+            async def exec_fallback_async(self, prep_result, exc):
+                return 'fallback'
+
+        node = Fallback(on_error="collect")
+        node.set_params({'log': new_log()})
+        shared_storage = {'items': ['bad']}
+        asyncio.run(node.run_async(shared_storage))
+        self.assertEqual(shared_storage['results'], ['fallback'])
+
+    def test_as_completed_posts_errors(self):
+        posted = []
+
+        class Posting(Calls):
+            async def post_item_async(self, shared_storage, item, exec_result):
+                posted.append((item, type(exec_result).__name__))
+
+        node = Posting(on_error="collect", as_completed=True)
+        node.set_params({'log': new_log()})
+        asyncio.run(node.run_async({'items': ['a', 'bad']}))
+        self.assertEqual(posted, [('bad', 'ValueError'), ('a', 'str')])
+
+    def test_batches(self):
+        class Batched(Calls):
+            async def exec_batch_async(self, items):
+                raise RuntimeError("batch down")
+
+        node = Batched(on_error="collect", batch_size=2)
+        node.set_params({'log': new_log()})
+        shared_storage = {'items': ['a', 'bad', 'b']}
+        asyncio.run(node.run_async(shared_storage))
+        self.assertEqual([type(r).__name__ for r in shared_storage['results']], ['str', 'ValueError', 'str'])
+
+class Worker(AsyncNode):
+    async def exec_async(self, prep_result):
+        log = self.params['log']
+        i = self.params['i']
+        log['started'].append(i)
+        try:
+            await asyncio.sleep(0.01 if i == 1 else 0.1)
+        except asyncio.CancelledError:
+            log['cancelled'].append(i)
+            raise
+        if i == 1:
+            raise ValueError("item 1 failed")
+        log['finished'].append(i)
+
+class Batch(AsyncParallelBatchFlow):
+    async def prep_async(self, shared_storage):
+        return [{'i': i, 'log': shared_storage['log']} for i in range(4)]
+
+    async def post_async(self, shared_storage, prep_result, exec_result):
+        shared_storage['errors'] = exec_result
+
+class TestParallelBatchFlowPolicies(unittest.TestCase):
+    def test_fail_fast(self):
+        shared_storage = {'log': new_log()}
+        with self.assertRaises(ValueError):
+            asyncio.run(Batch(start=AsyncFlow(start=Worker())).run_async(shared_storage))
+        self.assertEqual(sorted(shared_storage['log']['cancelled']), [0, 2, 3])
+
+    def test_collect(self):
+        shared_storage = {'log': new_log()}
+        asyncio.run(Batch(start=AsyncFlow(start=Worker()), on_error="collect").run_async(shared_storage))
+        self.assertEqual(sorted(shared_storage['log']['finished']), [0, 2, 3])
+        self.assertEqual([type(e).__name__ for e in shared_storage['errors']], ['NoneType', 'ValueError', 'NoneType', 'NoneType'])
+
+class TestCancellationPropagation(unittest.TestCase):
+    def test_cancelling_enclosing_flow_cancels_items(self):
+        log = new_log()
+
+        async def main():
+            flow = AsyncFlow(start=Calls(max_concurrency=3))
+            flow.set_params({'log': log})
+            task = asyncio.ensure_future(flow.run_async({'items': ['a', 'b', 'c', 'd']}))
+            await asyncio.sleep(0.02)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(main())
+        self.assertEqual(log['started'], ['a', 'b', 'c'])
+        self.assertEqual(sorted(log['cancelled']), ['a', 'b', 'c'])
+
+    def test_parallel_branches_cancel_siblings(self):
+        log = new_log()
+
+        class Branch(AsyncNode):
+            async def exec_async(self, prep_result):
+                try:
+                    await asyncio.sleep(0.01 if self.i == 1 else 0.1)
+                except asyncio.CancelledError:
+                    log['cancelled'].append(self.i)
+                    raise
+                if self.i == 1:
+                    raise ValueError("branch 1 failed")
+
+        branches = [type(f"Branch{i}", (Branch,), {'i': i})() for i in range(3)]
+        with self.assertRaises(ValueError):
+            asyncio.run(AsyncParallel(*branches).run_async({}))
+        self.assertEqual(sorted(log['cancelled']), [0, 2])
+
+if __name__ == '__main__':
+    unittest.main()
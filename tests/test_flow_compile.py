@@ -0,0 +1,105 @@
+import unittest
+import asyncio
+import warnings
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, AsyncNode, Flow, AsyncFlow, BatchFlow
+
+class CountNode(Node):
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage['count'] = shared_storage.get('count', 0) + 1
+        shared_storage.setdefault('seen', []).append(self.params.get('tag'))
+        return "loop" if shared_storage['count'] < shared_storage['limit'] else "done"
+
+class AsyncCountNode(AsyncNode):
+    async def post_async(self, shared_storage, prep_result, exec_result):
+        shared_storage['count'] = shared_storage.get('count', 0) + 1
+        return "loop" if shared_storage['count'] < shared_storage['limit'] else "done"
+
+class RecordNode(Node):
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage['end'] = self.params.get('tag')
+        return "finished"
+
+class TestFlowCompile(unittest.TestCase):
+    def build(self, node_cls=CountNode):
+        a, b = node_cls(), node_cls()
+        a - "loop" >> b
+        b - "loop" >> a
+        a - "done" >> RecordNode()
+        b - "done" >> RecordNode()
+        return a
+
+    def test_compiled_matches_uncompiled(self):
+        plain, compiled = {'limit': 7}, {'limit': 7}
+        plain_action = Flow(start=self.build()).run(plain)
+        compiled_action = Flow(start=self.build()).compile().run(compiled)
+        self.assertEqual(plain, compiled)
+        self.assertEqual(plain_action, compiled_action)
+        self.assertEqual(compiled['count'], 7)
+
+    def test_params_isolated_from_original_nodes(self):
+        start = self.build()
+        flow = Flow(start=start).compile()
+        flow.set_params({'tag': 'x'})
+        shared_storage = {'limit': 3}
+        flow.run(shared_storage)
+        self.assertEqual(shared_storage['seen'], ['x', 'x', 'x'])
+        self.assertEqual(shared_storage['end'], 'x')
+        self.assertEqual(start.params, {})
+
+    def test_batch_params_per_run(self):
+        class Batch(BatchFlow):
+            def prep(self, shared_storage):
+                return [{'tag': t} for t in 'abc']
+
+        class Tag(Node):
+            def post(self, shared_storage, prep_result, exec_result):
+                shared_storage.setdefault('tags', []).append(self.params['tag'])
+
+        shared_storage = {}
+        Batch(start=Flow(start=Tag()).compile()).run(shared_storage)
+        self.assertEqual(shared_storage['tags'], ['a', 'b', 'c'])
+
+    def test_compile_freezes_graph(self):
+        a, b, c = RecordNode(), CountNode(), CountNode()
+        a - "finished" >> b
+        flow = Flow(start=a).compile()
+        a.successors['finished'] = c
+        c.set_params({'tag': 'late'})
+        shared_storage = {'limit': 1}
+        flow.run(shared_storage)
+        self.assertEqual(shared_storage['seen'], [None])
+
+    def test_missing_action_still_warns(self):
+        a = RecordNode()
+        a - "other" >> RecordNode()
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            Flow(start=a).compile().run({})
+        self.assertTrue(any("Flow ends" in str(w.message) for w in caught))
+
+    def test_invalid_successor_rejected(self):
+        a = RecordNode()
+        a.successors['default'] = "not a node"
+        with self.assertRaises(TypeError):
+            Flow(start=a).compile()
+
+    def test_start_resets_plan(self):
+        flow = Flow(start=RecordNode()).compile()
+        flow.start(CountNode())
+        shared_storage = {'limit': 1}
+        flow.run(shared_storage)
+        self.assertEqual(shared_storage['count'], 1)
+
+    def test_async_compiled(self):
+        shared_storage = {'limit': 5}
+        flow = AsyncFlow(start=self.build(AsyncCountNode)).compile()
+        asyncio.run(flow.run_async(shared_storage))
+        self.assertEqual(shared_storage['count'], 5)
+        self.assertIsNone(shared_storage['end'])
+
+if __name__ == '__main__':
+    unittest.main()
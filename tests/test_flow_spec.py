@@ -0,0 +1,156 @@
+import unittest
+import json
+import pickle
+import asyncio
+import sys
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, AsyncNode, Flow, AsyncFlow, BatchFlow, Parallel, DAGFlow, AsyncParallelBatchNode, RetryPolicy, register_flow, get_flow
+
+class Add(Node):
+    def __init__(self, amount, **kwargs):
+        super().__init__(**kwargs)
+        self.amount = amount
+
+    def prep(self, shared_storage):
+        return shared_storage['value']
+
+    def exec(self, value):
+        return value + self.amount
+
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage['value'] = exec_result
+        return 'loop' if exec_result < shared_storage['limit'] else 'done'
+
+class Label(Node):
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage.setdefault('labels', []).append(self.params.get('label', 'none'))
+
+class Forgetful(Node):
+    def __init__(self, amount):
+        super().__init__()
+
+class Renamed(Node):
+    def __init__(self, model="small", **kwargs):
+        super().__init__(**kwargs)
+        self.llm = model
+
+class Described(Renamed):
+    def spec_args(self):
+        return {'model': self.llm, 'max_retries': self.max_retries}
+
+class AsyncDouble(AsyncParallelBatchNode):
+    async def prep_async(self, shared_storage):
+        return shared_storage['numbers']
+
+    async def exec_async(self, n):
+        return n * 2
+
+    async def post_async(self, shared_storage, prep_result, exec_result):
+        shared_storage['doubled'] = exec_result
+
+def build():
+    add, label = Add(2, max_retries=3), Label()
+    add - 'loop' >> add
+    add - 'done' >> label
+    return Flow(start=add)
+
+def run_spec(spec):
+    shared_storage = {'value': 0, 'limit': 5}
+    Flow.from_spec(spec).run(shared_storage)
+    return shared_storage
+
+class TestFlowSpec(unittest.TestCase):
+    def test_round_trip(self):
+        spec = build().to_spec()
+        self.assertEqual(spec['nodes'][1], {
+            'class': f'{__name__}:Add', 'args': {'amount': 2, 'max_retries': 3}, 'successors': {'loop': 1, 'done': 2},
+        })
+        flow = Flow.from_spec(json.loads(json.dumps(spec)))
+        self.assertEqual(flow.to_spec(), spec)
+        self.assertEqual(run_spec(spec), {'value': 6, 'limit': 5, 'labels': ['none']})
+
+    def test_spec_is_pickle_safe(self):
+        spec = build().to_spec()
+        with ProcessPoolExecutor(1) as executor:
+            self.assertEqual(executor.submit(run_spec, spec).result()['value'], 6)
+
+    def test_params_and_object_args(self):
+        label = Label(retry=RetryPolicy(base=0.5))
+        label.set_params({'label': 'x'})
+        flow = Flow.from_spec(pickle.loads(pickle.dumps(Flow(start=label, timeout=3).to_spec())))
+        self.assertEqual(flow.timeout, 3)
+        self.assertEqual(flow.start_node.retry.base, 0.5)
+        self.assertEqual(flow.start_node.params, {'label': 'x'})
+
+    def test_nested_parallel_and_dag(self):
+        inner = BatchFlow(start=Label())
+        spec = Flow(start=Parallel(inner, DAGFlow([Label(), Label()], max_workers=2))).to_spec()
+        self.assertEqual([e['class'].split(':')[1] for e in spec['nodes']], ['Flow', 'Parallel', 'BatchFlow', 'DAGFlow', 'Label', 'Label', 'Label'])
+        flow = Flow.from_spec(spec)
+        parallel = flow.start_node
+        self.assertEqual(parallel.branches[1].max_workers, 2)
+        self.assertIsInstance(parallel.branches[1].nodes[0], Label)
+        shared_storage = {}
+        flow.run(shared_storage)
+        self.assertEqual(shared_storage['labels'], ['none', 'none'])
+
+    def test_async(self):
+        flow = AsyncFlow.from_spec(AsyncFlow(start=AsyncDouble(max_concurrency=2)).to_spec())
+        self.assertEqual(flow.start_node.max_concurrency, 2)
+        shared_storage = {'numbers': [1, 2]}
+        asyncio.run(flow.run_async(shared_storage))
+        self.assertEqual(shared_storage['doubled'], [2, 4])
+
+    def test_shared_nodes_keep_identity(self):
+        label = Label()
+        add = Add(1)
+        add - 'loop' >> label
+        add - 'done' >> label
+        flow = Flow.from_spec(Flow(start=add).to_spec())
+        self.assertIs(flow.start_node.successors['loop'], flow.start_node.successors['done'])
+
+    def test_errors(self):
+        class Local(Node):
+            pass
+
+        with self.assertRaises(ValueError):
+            Flow(start=Local()).to_spec()
+        with self.assertRaises(ValueError):
+            Flow(start=Forgetful(1)).to_spec()
+        with self.assertRaises(ValueError):
+            Flow(start=Renamed("large")).to_spec()
+
+    def test_spec_args_hook(self):
+        flow = Flow.from_spec(Flow(start=Described("large", max_retries=2)).to_spec())
+        self.assertEqual((flow.start_node.llm, flow.start_node.max_retries), ("large", 2))
+        with self.assertRaises(TypeError):
+            AsyncFlow.from_spec(build().to_spec())
+
+class TestFlowRegistry(unittest.TestCase):
+    def test_builds_once_from_factory(self):
+        calls = []
+        register_flow('counted', lambda: calls.append(1) or build())
+        self.assertIs(get_flow('counted'), get_flow('counted'))
+        self.assertEqual(calls, [1])
+
+    def test_from_spec(self):
+        register_flow('from_spec', build().to_spec())
+        shared_storage = {'value': 0, 'limit': 3}
+        get_flow('from_spec').run(shared_storage)
+        self.assertEqual(shared_storage['value'], 4)
+
+    def test_reregister_replaces(self):
+        register_flow('replaced', build)
+        first = get_flow('replaced')
+        register_flow('replaced', build)
+        self.assertIsNot(get_flow('replaced'), first)
+
+    def test_missing(self):
+        with self.assertRaises(KeyError):
+            get_flow('missing')
+
+if __name__ == '__main__':
+    unittest.main()
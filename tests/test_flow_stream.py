@@ -0,0 +1,134 @@
+import unittest
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, AsyncNode, AsyncFlow, HedgePolicy, STREAM_RESET, add_listener, remove_listener
+
+class Chat(AsyncNode):
+    async def prep_async(self, shared_storage):
+        return shared_storage['prompt']
+
+    async def exec_stream_async(self, prompt):
+        for word in prompt.split():
+            yield word + ' '
+            await asyncio.sleep(0.02)
+
+    async def post_async(self, shared_storage, prep_result, exec_result):
+        shared_storage['reply'] = exec_result
+        shared_storage['finished'] = time.perf_counter()
+
+class Numbers(AsyncNode):
+    async def exec_stream_async(self, prep_result):
+        yield 1
+        yield 2
+
+    async def post_async(self, shared_storage, prep_result, exec_result):
+        shared_storage['numbers'] = exec_result
+
+class Plain(AsyncNode):
+    async def exec_async(self, prep_result):
+        return 'plain'
+
+    async def post_async(self, shared_storage, prep_result, exec_result):
+        shared_storage['plain'] = exec_result
+
+class Broken(AsyncNode):
+    async def exec_stream_async(self, prep_result):
+        yield 'partial'
+        raise ValueError("stream broke")
+
+class Flaky(AsyncNode):
+    async def exec_stream_async(self, prep_result):
+        yield 'Hel'
+        if self.cur_retry == 0:
+            raise ValueError("connection dropped")
+        yield 'lo'
+
+    async def post_async(self, shared_storage, prep_result, exec_result):
+        shared_storage['reply'] = exec_result
+
+class SyncStep(Node):
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage['sync_ran'] = True
+
+async def collect(flow, shared_storage):
+    return [(type(node).__name__, chunk, time.perf_counter()) async for node, chunk in flow.stream(shared_storage)]
+
+class TestFlowStream(unittest.TestCase):
+    def test_chunks_arrive_before_node_finishes(self):
+        shared_storage = {'prompt': 'hello streaming world'}
+        chunks = asyncio.run(collect(AsyncFlow(start=Chat()), shared_storage))
+        self.assertEqual([(n, c) for n, c, _ in chunks], [('Chat', 'hello '), ('Chat', 'streaming '), ('Chat', 'world ')])
+        self.assertLess(chunks[0][2], shared_storage['finished'] - 0.03)
+        self.assertEqual(shared_storage['reply'], 'hello streaming world ')
+
+    def test_chunks_from_each_node_in_turn(self):
+        chat, plain, sync, numbers = Chat(), Plain(), SyncStep(), Numbers()
+        chat >> plain >> sync >> AsyncFlow(start=numbers)
+        shared_storage = {'prompt': 'hi'}
+        chunks = asyncio.run(collect(AsyncFlow(start=chat), shared_storage))
+        self.assertEqual([(n, c) for n, c, _ in chunks], [('Chat', 'hi '), ('Numbers', 1), ('Numbers', 2)])
+        self.assertEqual((shared_storage['plain'], shared_storage['numbers']), ('plain', [1, 2]))
+        self.assertTrue(shared_storage['sync_ran'])
+
+    def test_run_async_without_consumer(self):
+        shared_storage = {'prompt': 'a b'}
+        asyncio.run(AsyncFlow(start=Chat()).run_async(shared_storage))
+        self.assertEqual(shared_storage['reply'], 'a b ')
+
+    def test_errors_surface_after_partial_output(self):
+        seen = []
+
+        async def main():
+            async for _, chunk in AsyncFlow(start=Broken()).stream({}):
+                seen.append(chunk)
+
+        with self.assertRaises(ValueError):
+            asyncio.run(main())
+        self.assertEqual(seen, ['partial'])
+
+    def test_retry_sends_reset_marker(self):
+        shared_storage = {}
+        chunks = asyncio.run(collect(AsyncFlow(start=Flaky(max_retries=2)), shared_storage))
+        self.assertEqual([c for _, c, _ in chunks], ['Hel', STREAM_RESET, 'Hel', 'lo'])
+        self.assertEqual(shared_storage['reply'], 'Hello')
+
+    def test_streaming_node_rejects_hedge(self):
+        with self.assertRaises(ValueError):
+            Flaky(hedge=HedgePolicy(delay=1))
+
+    def test_stopping_early_cancels_flow(self):
+        chat, plain = Chat(), Plain()
+        chat >> plain
+        shared_storage = {'prompt': 'one two three four'}
+
+        async def main():
+            stream = AsyncFlow(start=chat).stream(shared_storage)
+            async for _, chunk in stream:
+                break
+            await stream.aclose()
+            await asyncio.sleep(0.1)
+
+        asyncio.run(main())
+        self.assertNotIn('reply', shared_storage)
+        self.assertNotIn('plain', shared_storage)
+
+    def test_chunk_events(self):
+        events = []
+
+        def listener(event, node, info):
+            if event == 'chunk':
+                events.append(info['chunk'])
+
+        add_listener(listener)
+        try:
+            asyncio.run(AsyncFlow(start=Numbers()).run_async({}))
+        finally:
+            remove_listener(listener)
+        self.assertEqual(events, [1, 2])
+
+if __name__ == '__main__':
+    unittest.main()
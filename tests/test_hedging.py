@@ -0,0 +1,106 @@
+import unittest
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import AsyncNode, AsyncParallelBatchNode, HedgePolicy, RateLimiter
+
+class ScriptedNode(AsyncNode):
+    """Each call pops the next (delay, outcome) from the script."""
+    def __init__(self, script, **kwargs):
+        super().__init__(**kwargs)
+        self.script, self.cancelled = list(script), 0
+
+    async def exec_async(self, prep_result):
+        delay, outcome = self.script.pop(0)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    async def post_async(self, shared_storage, prep_result, exec_result):
+        shared_storage['result'] = exec_result
+
+class TestHedging(unittest.TestCase):
+    def run_node(self, node):
+        shared_storage = {}
+        async def main():
+            await node.run_async(shared_storage)
+            await asyncio.sleep(0)
+        asyncio.run(main())
+        return shared_storage['result']
+
+    def test_no_hedge_when_fast(self):
+        hedge = HedgePolicy(delay=0.1)
+        node = ScriptedNode([(0.01, "primary")], hedge=hedge)
+        self.assertEqual(self.run_node(node), "primary")
+        self.assertEqual((hedge.calls, hedge.hedges, hedge.hedge_wins), (1, 0, 0))
+
+    def test_hedge_wins_and_cancels_slow_attempt(self):
+        hedge = HedgePolicy(delay=0.02)
+        node = ScriptedNode([(1, "slow"), (0.01, "hedge")], hedge=hedge)
+        self.assertEqual(self.run_node(node), "hedge")
+        self.assertEqual((hedge.hedges, hedge.hedge_wins), (1, 1))
+        self.assertEqual(node.cancelled, 1)
+
+    def test_primary_can_still_win(self):
+        hedge = HedgePolicy(delay=0.02)
+        node = ScriptedNode([(0.04, "primary"), (1, "hedge")], hedge=hedge)
+        self.assertEqual(self.run_node(node), "primary")
+        self.assertEqual((hedge.hedges, hedge.hedge_wins), (1, 0))
+
+    def test_failed_attempt_waits_for_other(self):
+        hedge = HedgePolicy(delay=0.01)
+        node = ScriptedNode([(0.03, ValueError("bad")), (0.05, "hedge")], hedge=hedge)
+        self.assertEqual(self.run_node(node), "hedge")
+
+    def test_all_attempts_fail_uses_retry(self):
+        hedge = HedgePolicy(delay=0.01)
+        script = [(0.02, ValueError("a")), (0.02, ValueError("b")), (0, "retried")]
+        node = ScriptedNode(script, hedge=hedge, max_retries=2)
+        self.assertEqual(self.run_node(node), "retried")
+
+    def test_max_hedges(self):
+        hedge = HedgePolicy(delay=0.01, max_hedges=2)
+        node = ScriptedNode([(1, "a"), (1, "b"), (0.01, "c")], hedge=hedge)
+        self.assertEqual(self.run_node(node), "c")
+        self.assertEqual(hedge.hedges, 2)
+
+    def test_percentile_delay(self):
+        hedge = HedgePolicy(percentile=90, delay=5, min_samples=10)
+        self.assertEqual(hedge.hedge_delay(), 5)
+        hedge.latencies.extend([0.01 * i for i in range(1, 11)])
+        self.assertAlmostEqual(hedge.hedge_delay(), 0.1)
+
+    def test_shared_policy_across_batch_items(self):
+        hedge = HedgePolicy(delay=0.02)
+
+        class Items(AsyncParallelBatchNode):
+            async def prep_async(self, shared_storage):
+                return [0.001, 0.001, 1]
+
+            async def exec_async(self, delay):
+                await asyncio.sleep(delay)
+                return delay
+
+            async def exec_fallback_async(self, prep_result, exc):
+                return None
+
+        asyncio.run(Items(hedge=hedge, timeout=0.2).run_async({}))
+        self.assertEqual(hedge.calls, 3)
+        self.assertGreaterEqual(hedge.hedges, 1)
+
+    def test_each_hedge_is_rate_limited(self):
+        hedge = HedgePolicy(delay=0.01, max_hedges=3)
+        script = [(0.1, "a"), (0, "b"), (0, "c"), (0, "d")]
+        node = ScriptedNode(script, hedge=hedge, rate_limit=RateLimiter(requests=1, per=60))
+        self.assertEqual(self.run_node(node), "a")
+        self.assertEqual(len(script) - len(node.script), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import unittest
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, BatchNode, AsyncNode, Flow, AsyncFlow, TimingCollector, add_listener, remove_listener
+
+class Sleep(Node):
+    def exec(self, prep_result):
+        time.sleep(0.01)
+
+    def post(self, shared_storage, prep_result, exec_result):
+        return 'done'
+
+class Flaky(Node):
+    def exec(self, prep_result):
+        raise ValueError("boom")
+
+    def exec_fallback(self, prep_result, exc):
+        return 'fallback'
+
+class Square(BatchNode):
+    def prep(self, shared_storage):
+        return [1, 2, 3]
+
+    def exec(self, n):
+        return n * n
+
+class AsyncSleep(AsyncNode):
+    async def exec_async(self, prep_result):
+        await asyncio.sleep(0.01)
+
+class Recorder:
+    def __init__(self):
+        self.events = []
+
+    def __call__(self, event, node, info):
+        self.events.append((event, type(node).__name__, info))
+
+    def __enter__(self):
+        add_listener(self)
+        return self
+
+    def __exit__(self, *exc):
+        remove_listener(self)
+
+class TestListeners(unittest.TestCase):
+    def test_node_lifecycle(self):
+        with Recorder() as rec:
+            Sleep().run({})
+        self.assertEqual([e for e, _, _ in rec.events], ['node_start', 'prep', 'exec', 'post', 'node_end'])
+        end = rec.events[-1][2]
+        self.assertEqual(end['action'], 'done')
+        self.assertIsNone(end['error'])
+        self.assertGreaterEqual(end['duration'], 0.01)
+        self.assertGreaterEqual(rec.events[2][2]['duration'], 0.01)
+
+    def test_retries_and_fallback(self):
+        with Recorder() as rec:
+            Flaky(max_retries=3).run({})
+        retries = [info['attempt'] for e, _, info in rec.events if e == 'retry']
+        self.assertEqual(retries, [0, 1])
+        self.assertEqual([e for e, _, _ in rec.events].count('fallback'), 1)
+
+    def test_flow_paths_and_actions(self):
+        inner = Flow(start=Sleep())
+        first = Sleep()
+        first - 'done' >> inner
+        with Recorder() as rec:
+            Flow(start=first).run({})
+        ends = [(name, info['path'], info['action']) for e, name, info in rec.events if e == 'node_end']
+        self.assertEqual(ends, [
+            ('Sleep', ('Flow', 'Sleep'), 'done'),
+            ('Sleep', ('Flow', 'Flow', 'Sleep'), 'done'),
+            ('Flow', ('Flow', 'Flow'), 'done'),
+            ('Flow', ('Flow',), 'done'),
+        ])
+
+    def test_errors_are_reported(self):
+        class Broken(Node):
+            def exec(self, prep_result):
+                raise RuntimeError("down")
+
+        with Recorder() as rec:
+            with self.assertRaises(RuntimeError):
+                Flow(start=Broken()).run({})
+        errors = [info['error'] for e, _, info in rec.events if e == 'node_end']
+        self.assertTrue(all(isinstance(err, RuntimeError) for err in errors))
+
+    def test_batch_event(self):
+        with Recorder() as rec:
+            Square().run({})
+        batch = [info for e, _, info in rec.events if e == 'batch']
+        self.assertEqual(batch[0]['items'], 3)
+
+    def test_async_flow(self):
+        with Recorder() as rec:
+            asyncio.run(AsyncFlow(start=AsyncSleep()).run_async({}))
+        self.assertEqual([(e, n) for e, n, _ in rec.events], [
+            ('node_start', 'AsyncFlow'), ('node_start', 'AsyncSleep'), ('prep', 'AsyncSleep'),
+            ('exec', 'AsyncSleep'), ('post', 'AsyncSleep'), ('node_end', 'AsyncSleep'), ('node_end', 'AsyncFlow'),
+        ])
+
+    def test_no_events_without_listener(self):
+        rec = Recorder()
+        Flow(start=Sleep()).run({})
+        self.assertEqual(rec.events, [])
+
+class TestTimingCollector(unittest.TestCase):
+    def test_histogram_and_summary(self):
+        with TimingCollector(buckets=(0.001, 1)) as timings:
+            for _ in range(3):
+                Flow(start=Sleep()).run({})
+        self.assertEqual(timings.histogram('Sleep'), [(0.001, 0), (1, 3), (float('inf'), 0)])
+        summary = timings.summary()['Sleep']
+        self.assertEqual(summary['count'], 3)
+        self.assertGreaterEqual(summary['p50'], 0.01)
+        self.assertEqual(timings.events['Sleep', 'exec'], 3)
+
+    def test_folded_stacks(self):
+        with TimingCollector() as timings:
+            Flow(start=Sleep()).run({})
+        stacks = dict(line.rsplit(' ', 1) for line in timings.folded().splitlines())
+        self.assertEqual(set(stacks), {'Flow', 'Flow;Sleep', 'Flow;Sleep;prep', 'Flow;Sleep;exec', 'Flow;Sleep;post'})
+        self.assertGreaterEqual(int(stacks['Flow;Sleep;exec']), 10000)
+
+if __name__ == '__main__':
+    unittest.main()
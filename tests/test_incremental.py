@@ -0,0 +1,219 @@
+import unittest
+from unittest import mock
+import asyncio
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, AsyncNode, Flow, AsyncFlow, BatchFlow, DAGFlow, Cache
+
+calls = []
+
+class Load(Node):
+    reads, writes = ['path'], ['text']
+
+    def prep(self, shared_storage):
+        return shared_storage['path']
+
+    def exec(self, path):
+        calls.append('load')
+        return f"text of {path}"
+
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage['text'] = exec_result
+        return 'loaded'
+
+class Summarize(Node):
+    reads, writes = ['text'], ['summary']
+
+    def prep(self, shared_storage):
+        return shared_storage['text']
+
+    def exec(self, text):
+        calls.append('summarize')
+        return text.upper()
+
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage['summary'] = exec_result
+
+class Undeclared(Node):
+    def post(self, shared_storage, prep_result, exec_result):
+        calls.append('undeclared')
+
+def build():
+    load = Load()
+    load - 'loaded' >> Summarize()
+    return load
+
+class TestIncrementalFlow(unittest.TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_unchanged_nodes_are_skipped_and_writes_restored(self):
+        store = Cache()
+        Flow(start=build(), incremental=store).run({'path': 'a.txt'})
+        shared_storage = {'path': 'a.txt'}
+        action = Flow(start=build(), incremental=store).run(shared_storage)
+        self.assertEqual(calls, ['load', 'summarize'])
+        self.assertEqual(shared_storage['summary'], 'TEXT OF A.TXT')
+        self.assertIsNone(action)
+
+    def test_restored_action_drives_transitions(self):
+        store = Cache()
+        Flow(start=build(), incremental=store).run({'path': 'a.txt'})
+        calls.clear()
+        load = Load()
+        load - 'loaded' >> Undeclared()
+        Flow(start=load, incremental=store).run({'path': 'a.txt'})
+        self.assertEqual(calls, ['undeclared'])
+
+    def test_changed_reads_rerun_downstream_only_when_needed(self):
+        store = Cache()
+        Flow(start=build(), incremental=store).run({'path': 'a.txt'})
+        Flow(start=build(), incremental=store).run({'path': 'b.txt'})
+        self.assertEqual(calls, ['load', 'summarize', 'load', 'summarize'])
+
+    def test_params_are_part_of_fingerprint(self):
+        store = Cache()
+        for n in [1, 2, 1]:
+            flow = Flow(start=build(), incremental=store)
+            flow.set_params({'n': n})
+            flow.run({'path': 'a.txt'})
+        self.assertEqual(calls, ['load', 'summarize', 'load', 'summarize'])
+
+    def test_code_change_invalidates(self):
+        store = Cache()
+        Flow(start=build(), incremental=store).run({'path': 'a.txt'})
+
+        class Summarize(Node):
+            reads, writes = ['text'], ['summary']
+
+            def prep(self, shared_storage):
+                return shared_storage['text']
+
+            def exec(self, text):
+                calls.append('summarize v2')
+                return text.lower()
+
+            def post(self, shared_storage, prep_result, exec_result):
+                shared_storage['summary'] = exec_result
+
+        load = Load()
+        load - 'loaded' >> Summarize()
+        shared_storage = {'path': 'a.txt'}
+        Flow(start=load, incremental=store).run(shared_storage)
+        self.assertEqual(calls, ['load', 'summarize', 'summarize v2'])
+        self.assertEqual(shared_storage['summary'], 'text of a.txt')
+
+    def test_class_attribute_change_invalidates(self):
+        store = Cache()
+
+        def run(prompt, version=None):
+            class Prompted(Summarize):
+                PROMPT = prompt
+
+                def exec(self, text):
+                    calls.append(self.PROMPT)
+                    return self.PROMPT + text
+
+            node = Prompted()
+            node.version = version
+            Flow(start=node, incremental=store).run({'text': 'a'})
+
+        run('v1:')
+        run('v1:')
+        run('v2:')
+        run('v2:', version=2)
+        self.assertEqual(calls, ['v1:', 'v2:', 'v2:'])
+
+    def test_plain_runs_skip_fingerprinting(self):
+        with mock.patch.object(Flow, '_fingerprint', side_effect=AssertionError):
+            Flow(start=build()).run({'path': 'a.txt'})
+            asyncio.run(AsyncFlow(start=build()).run_async({'path': 'a.txt'}))
+        self.assertEqual(calls, ['load', 'summarize'] * 2)
+
+    def test_undeclared_nodes_always_run(self):
+        store = Cache()
+        for _ in range(2):
+            Flow(start=Undeclared(), incremental=store).run({})
+        self.assertEqual(calls, ['undeclared', 'undeclared'])
+
+    def test_restored_values_are_copies(self):
+        class Collect(Node):
+            reads, writes = [], ['items']
+
+            def post(self, shared_storage, prep_result, exec_result):
+                shared_storage['items'] = [1]
+
+        store = Cache()
+        first = {}
+        Flow(start=Collect(), incremental=store).run(first)
+        first['items'].append(2)
+        second = {}
+        Flow(start=Collect(), incremental=store).run(second)
+        self.assertEqual(second['items'], [1])
+
+    def test_nested_flows_inherit_store(self):
+        store = Cache()
+        for _ in range(2):
+            Flow(start=Flow(start=build()), incremental=store).run({'path': 'a.txt'})
+        self.assertEqual(calls, ['load', 'summarize'])
+
+    def test_batch_flow_per_item(self):
+        class Files(BatchFlow):
+            def prep(self, shared_storage):
+                return [{'i': i} for i in range(3)]
+
+        store = Cache()
+        Files(start=build(), incremental=store).run({'path': 'a.txt'})
+        Files(start=build(), incremental=store).run({'path': 'a.txt'})
+        self.assertEqual(calls.count('load'), 3)
+
+    def test_dag_flow(self):
+        store = Cache()
+        for _ in range(2):
+            shared_storage = {'path': 'a.txt'}
+            DAGFlow([Load(), Summarize()], incremental=store).run(shared_storage)
+        self.assertEqual(calls, ['load', 'summarize'])
+        self.assertEqual(shared_storage['summary'], 'TEXT OF A.TXT')
+
+    def test_disk_store_survives_restart(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'runs.db')
+            Flow(start=build(), incremental=Cache(path=path)).run({'path': 'a.txt'})
+            shared_storage = {'path': 'a.txt'}
+            Flow(start=build(), incremental=Cache(path=path)).run(shared_storage)
+        self.assertEqual(calls, ['load', 'summarize'])
+        self.assertEqual(shared_storage['summary'], 'TEXT OF A.TXT')
+
+class TestIncrementalAsyncFlow(unittest.TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_async_and_sync_nodes(self):
+        class AsyncSummarize(AsyncNode):
+            reads, writes = ['text'], ['summary']
+
+            async def prep_async(self, shared_storage):
+                return shared_storage['text']
+
+            async def exec_async(self, text):
+                calls.append('async summarize')
+                return text.title()
+
+            async def post_async(self, shared_storage, prep_result, exec_result):
+                shared_storage['summary'] = exec_result
+
+        store = Cache()
+        for _ in range(2):
+            load = Load()
+            load - 'loaded' >> AsyncSummarize()
+            shared_storage = {'path': 'a.txt'}
+            asyncio.run(AsyncFlow(start=load, incremental=store).run_async(shared_storage))
+        self.assertEqual(calls, ['load', 'async summarize'])
+        self.assertEqual(shared_storage['summary'], 'Text Of A.Txt')
+
+if __name__ == '__main__':
+    unittest.main()
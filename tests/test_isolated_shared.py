@@ -0,0 +1,152 @@
+import unittest
+import asyncio
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import AsyncNode, AsyncFlow, AsyncParallel, AsyncParallelBatchFlow, MergePolicy, DirCheckpoint
+
+class Record(AsyncNode):
+    async def prep_async(self, shared_storage):
+        i = self.params['i']
+        seen = len(shared_storage['log'])
+        await asyncio.sleep(0.01 * (4 - i))
+        shared_storage['log'].append(i)
+        shared_storage['answers'][i] = i * 10
+        shared_storage['last'] = i
+        shared_storage['best'] = max(shared_storage.get('best', 0), i * 3 % 7)
+        shared_storage['tags'] = shared_storage['tags'] | {f"t{i}"}
+        if i == shared_storage.get('fail'):
+            raise ValueError(f"item {i} failed")
+        return seen
+
+    async def post_async(self, shared_storage, prep_result, exec_result):
+        shared_storage.setdefault('seen', []).append(prep_result)
+
+class Items(AsyncParallelBatchFlow):
+    async def prep_async(self, shared_storage):
+        return ({'i': i} for i in range(4))
+
+    async def post_async(self, shared_storage, prep_result, exec_result):
+        shared_storage['merged_before_post'] = list(shared_storage['log'])
+
+def new_shared(**extra):
+    return {'log': [], 'answers': {}, 'tags': set(), **extra}
+
+def run(isolate, **kwargs):
+    shared_storage = new_shared(**kwargs.pop('shared', {}))
+    asyncio.run(Items(start=AsyncFlow(start=Record()), isolate=isolate, **kwargs).run_async(shared_storage))
+    return shared_storage
+
+class TestIsolatedBatchFlow(unittest.TestCase):
+    def test_branches_do_not_see_each_other(self):
+        shared_storage = run(MergePolicy({'log': 'append', 'seen': 'append'}))
+        self.assertEqual(shared_storage['seen'], [0, 0, 0, 0])
+        self.assertEqual(shared_storage['log'], [0, 1, 2, 3])
+        self.assertEqual(shared_storage['merged_before_post'], [0, 1, 2, 3])
+
+    def test_without_isolation_branches_race(self):
+        shared_storage = run(None)
+        self.assertEqual(shared_storage['log'], [3, 2, 1, 0])
+
+    def test_default_rule(self):
+        shared_storage = run(True)
+        self.assertEqual(shared_storage['answers'], {3: 30})
+        self.assertEqual(shared_storage['last'], 3)
+        self.assertEqual(shared_storage['log'], [3])
+
+    def test_merge_rule(self):
+        shared_storage = run(MergePolicy({'answers': 'merge'}))
+        self.assertEqual(shared_storage['answers'], {0: 0, 1: 10, 2: 20, 3: 30})
+
+    def test_reducers(self):
+        shared_storage = run(MergePolicy({'best': max, 'tags': set.union}))
+        self.assertEqual(shared_storage['best'], 6)
+        self.assertEqual(shared_storage['tags'], {'t0', 't1', 't2', 't3'})
+
+    def test_failed_items_are_dropped_in_collect_mode(self):
+        shared_storage = run(MergePolicy({'log': 'append'}), on_error='collect', shared={'fail': 2})
+        self.assertEqual(shared_storage['log'], [0, 1, 3])
+        self.assertNotIn(2, shared_storage['answers'])
+
+    def test_nothing_merged_when_fail_fast(self):
+        shared_storage = new_shared(fail=3)
+        with self.assertRaises(ValueError):
+            asyncio.run(Items(start=AsyncFlow(start=Record()), isolate=True).run_async(shared_storage))
+        self.assertEqual(shared_storage, new_shared(fail=3))
+
+    def test_invalid_configuration(self):
+        with self.assertRaises(ValueError):
+            MergePolicy({'log': 'sum'})
+        with tempfile.TemporaryDirectory() as d, self.assertRaises(ValueError):
+            Items(isolate=True, checkpoint=DirCheckpoint(d))
+
+class TestOverlay(unittest.TestCase):
+    def test_copy_on_write_view(self):
+        base = {'items': [1], 'name': 'a', 'gone': 1}
+        view = MergePolicy().overlay(base)
+        view['items'].append(2)
+        view['name'] = 'b'
+        del view['gone']
+        view['new'] = True
+        self.assertEqual(base, {'items': [1], 'name': 'a', 'gone': 1})
+        self.assertEqual(dict(view), {'items': [1, 2], 'name': 'b', 'new': True})
+        self.assertNotIn('gone', view)
+        MergePolicy().merge(base, [view])
+        self.assertEqual(base, {'items': [1, 2], 'name': 'b', 'new': True})
+
+    def test_reads_are_not_writes(self):
+        base = {'items': [1]}
+        views = [MergePolicy().overlay(base) for _ in range(2)]
+        views[0]['items'].append(2)
+        self.assertEqual(views[1]['items'], [1])
+        MergePolicy().merge(base, views)
+        self.assertEqual(base['items'], [1, 2])
+
+    def test_nested_changes_stay_private(self):
+        base = {'cfg': {'opts': {'a': 1}}}
+        view = MergePolicy().overlay(base)
+        view['cfg']['opts']['b'] = 2
+        self.assertEqual(base, {'cfg': {'opts': {'a': 1}}})
+        MergePolicy().merge(base, [view])
+        self.assertEqual(base, {'cfg': {'opts': {'a': 1, 'b': 2}}})
+
+    def test_last_replaces_and_merge_combines(self):
+        def views(base):
+            first, second = MergePolicy().overlay(base), MergePolicy().overlay(base)
+            del first['cfg']['a']
+            second['cfg']['b'] = 2
+            return [first, second]
+
+        base = {'cfg': {'a': 1, 'stale': 0}}
+        MergePolicy().merge(base, views(base))
+        self.assertEqual(base, {'cfg': {'a': 1, 'stale': 0, 'b': 2}})
+        base = {'cfg': {'a': 1, 'stale': 0}}
+        first = MergePolicy().overlay(base)
+        first['cfg'] = {'a': 2}
+        MergePolicy().merge(base, [first])
+        self.assertEqual(base, {'cfg': {'a': 2}})
+        base = {'cfg': {'a': 1}}
+        MergePolicy({'cfg': 'merge'}).merge(base, views(base))
+        self.assertEqual(base, {'cfg': {'a': 1, 'b': 2}})
+
+class Branch(AsyncNode):
+    async def post_async(self, shared_storage, prep_result, exec_result):
+        shared_storage['results'].append(self.name)
+        shared_storage['winner'] = self.name
+
+class Left(Branch):
+    name = 'left'
+
+class Right(Branch):
+    name = 'right'
+
+class TestIsolatedParallel(unittest.TestCase):
+    def test_branches_merge_in_order(self):
+        shared_storage = {'results': []}
+        asyncio.run(AsyncParallel(Left(), Right(), isolate=MergePolicy({'results': 'append'})).run_async(shared_storage))
+        self.assertEqual(shared_storage, {'results': ['left', 'right'], 'winner': 'right'})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+import asyncio
+import time
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, AsyncNode, Flow, AsyncFlow, Parallel, AsyncParallel
+
+class SyncBranch(Node):
+    def __init__(self, key, delay=0.1, action=None):
+        super().__init__()
+        self.key, self.delay, self.action = key, delay, action
+
+    def exec(self, prep_result):
+        time.sleep(self.delay)
+        return self.params.get('doc', '') + self.key
+
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage[self.key] = exec_result
+        return self.action
+
+class AsyncBranch(AsyncNode):
+    def __init__(self, key, delay=0.1, action=None):
+        super().__init__()
+        self.key, self.delay, self.action = key, delay, action
+
+    async def exec_async(self, prep_result):
+        await asyncio.sleep(self.delay)
+        return self.params.get('doc', '') + self.key
+
+    async def post_async(self, shared_storage, prep_result, exec_result):
+        shared_storage[self.key] = exec_result
+        return self.action
+
+class Join(Node):
+    def prep(self, shared_storage):
+        return sorted(k for k in ('summary', 'label', 'entities') if k in shared_storage)
+
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage['joined'] = prep_result
+
+class TestParallel(unittest.TestCase):
+    def test_thread_branches_run_concurrently_then_join(self):
+        fan = Parallel(SyncBranch('summary'), SyncBranch('label'), SyncBranch('entities'))
+        fan >> Join()
+        flow = Flow(start=fan)
+        flow.set_params({'doc': 'd:'})
+        shared_storage = {}
+        start = time.perf_counter()
+        flow.run(shared_storage)
+        self.assertLess(time.perf_counter() - start, 0.25)
+        self.assertEqual(shared_storage['summary'], 'd:summary')
+        self.assertEqual(shared_storage['joined'], ['entities', 'label', 'summary'])
+
+    def test_post_receives_branch_actions(self):
+        class Route(Parallel):
+            def post(self, shared_storage, prep_result, exec_result):
+                shared_storage['actions'] = exec_result
+                return "review" if "flagged" in exec_result else "default"
+
+        fan = Route(SyncBranch('summary', 0, 'ok'), SyncBranch('label', 0, 'flagged'))
+        review = SyncBranch('review', 0)
+        fan - "review" >> review
+        shared_storage = {}
+        Flow(start=fan).run(shared_storage)
+        self.assertEqual(shared_storage['actions'], ['ok', 'flagged'])
+        self.assertIn('review', shared_storage)
+
+    def test_sub_flow_branch(self):
+        a, b = SyncBranch('summary', 0), SyncBranch('label', 0)
+        a >> b
+        fan = Parallel(Flow(start=a), SyncBranch('entities', 0))
+        fan >> Join()
+        shared_storage = {}
+        Flow(start=fan).run(shared_storage)
+        self.assertEqual(shared_storage['joined'], ['entities', 'label', 'summary'])
+
+class TestAsyncParallel(unittest.TestCase):
+    def test_async_branches_concurrent(self):
+        fan = AsyncParallel(AsyncBranch('summary'), AsyncBranch('label'), SyncBranch('entities'))
+        fan >> Join()
+        flow = AsyncFlow(start=fan)
+        flow.set_params({'doc': 'x:'})
+        shared_storage = {}
+        start = time.perf_counter()
+        asyncio.run(flow.run_async(shared_storage))
+        self.assertLess(time.perf_counter() - start, 0.25)
+        self.assertEqual(shared_storage['entities'], 'x:entities')
+        self.assertEqual(shared_storage['joined'], ['entities', 'label', 'summary'])
+
+    def test_branch_error_propagates(self):
+        class Failing(AsyncNode):
+            async def exec_async(self, prep_result):
+                raise ValueError("branch failed")
+
+        fan = AsyncParallel(AsyncBranch('summary', 0), Failing())
+        with self.assertRaises(ValueError):
+            asyncio.run(AsyncFlow(start=fan).run_async({}))
+
+    def test_original_branches_untouched(self):
+        branch = AsyncBranch('summary', 0)
+        flow = AsyncFlow(start=AsyncParallel(branch))
+        flow.set_params({'doc': 'p'})
+        asyncio.run(flow.run_async({}))
+        self.assertEqual(branch.params, {})
+
+if __name__ == '__main__':
+    unittest.main()
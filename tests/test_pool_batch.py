@@ -0,0 +1,163 @@
+import unittest
+import time
+import threading
+import sys
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, Flow, ThreadPoolBatchNode, ProcessPoolBatchNode, ThreadPoolBatchFlow, ProcessPoolBatchFlow, add_listener, remove_listener
+
+class SlowSquare(ThreadPoolBatchNode):
+    def prep(self, shared_storage):
+        return shared_storage['numbers']
+
+    def exec(self, number):
+        time.sleep(0.05)
+        return number * number
+
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage['squares'] = exec_result
+
+class ProcessSquare(ProcessPoolBatchNode):
+    def prep(self, shared_storage):
+        return shared_storage['numbers']
+
+    def exec(self, number):
+        if number < 0:
+            raise ValueError("negative")
+        return number * number
+
+    def exec_fallback(self, prep_result, exc):
+        return None
+
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage['squares'] = exec_result
+
+class FlakyNode(ThreadPoolBatchNode):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.lock = threading.Lock()
+        self.attempts = {}
+
+    def prep(self, shared_storage):
+        return shared_storage['numbers']
+
+    def exec(self, number):
+        with self.lock:
+            self.attempts[number] = self.attempts.get(number, 0) + 1
+        if self.cur_retry < number:
+            raise RuntimeError("flaky")
+        return (number, self.cur_retry)
+
+    def exec_fallback(self, prep_result, exc):
+        return (prep_result, 'fallback')
+
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage['results'] = exec_result
+
+class StoreSquare(Node):
+    def prep(self, shared_storage):
+        return self.params['n']
+
+    def exec(self, n):
+        return n * n
+
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage.setdefault('squares', {})[prep_result] = exec_result
+
+class MarkFirst(Node):
+    def post(self, shared_storage, prep_result, exec_result):
+        if self.params['n'] == 0:
+            shared_storage['status'] = 'done0'
+        shared_storage['seen'] = shared_storage['status']
+
+class MarkAll(ProcessPoolBatchFlow):
+    def prep(self, shared_storage):
+        return [{'n': n} for n in range(4)]
+
+class ThreadSquares(ThreadPoolBatchFlow):
+    def prep(self, shared_storage):
+        return [{'n': n} for n in shared_storage['numbers']]
+
+class ProcessSquares(ProcessPoolBatchFlow):
+    def prep(self, shared_storage):
+        return [{'n': n} for n in shared_storage['numbers']]
+
+class TestPoolBatchNode(unittest.TestCase):
+    def test_thread_pool_runs_items_concurrently(self):
+        shared_storage = {'numbers': list(range(8))}
+        start = time.perf_counter()
+        SlowSquare(max_workers=8).run(shared_storage)
+        elapsed = time.perf_counter() - start
+        self.assertEqual(shared_storage['squares'], [n * n for n in range(8)])
+        self.assertLess(elapsed, 0.3)
+
+    def test_per_item_retry_and_fallback(self):
+        node = FlakyNode(max_retries=3, max_workers=4)
+        shared_storage = {'numbers': [0, 1, 2, 3]}
+        node.run(shared_storage)
+        self.assertEqual(shared_storage['results'], [(0, 0), (1, 1), (2, 2), (3, 'fallback')])
+        self.assertEqual(node.attempts, {0: 1, 1: 2, 2: 3, 3: 3})
+
+    def test_external_executor_is_reused(self):
+        with ThreadPoolExecutor(2) as executor:
+            node = SlowSquare(executor=executor)
+            shared_storage = {'numbers': [1, 2, 3]}
+            node.run(shared_storage)
+            node.run(shared_storage)
+            self.assertEqual(shared_storage['squares'], [1, 4, 9])
+            self.assertEqual(executor.submit(lambda: 'alive').result(), 'alive')
+
+    def test_empty_input(self):
+        shared_storage = {'numbers': []}
+        SlowSquare().run(shared_storage)
+        self.assertEqual(shared_storage['squares'], [])
+
+    def test_process_pool(self):
+        shared_storage = {'numbers': [3, -1, 4]}
+        ProcessSquare(max_workers=2).run(shared_storage)
+        self.assertEqual(shared_storage['squares'], [9, None, 16])
+
+    def test_process_pool_results_reach_parent_cache(self):
+        cached = []
+
+        def listener(event, node, info):
+            if event == 'batch':
+                cached.append(info['cached'])
+
+        node = ProcessSquare(max_workers=2, cache=True)
+        add_listener(listener)
+        try:
+            for _ in range(2):
+                shared_storage = {'numbers': [3, -1, 4]}
+                node.run(shared_storage)
+        finally:
+            remove_listener(listener)
+        self.assertEqual(shared_storage['squares'], [9, None, 16])
+        self.assertEqual(cached, [0, 2])
+
+class TestPoolBatchFlow(unittest.TestCase):
+    def test_thread_pool_flow(self):
+        shared_storage = {'numbers': [1, 2, 3, 4]}
+        ThreadSquares(start=StoreSquare(), max_workers=4).run(shared_storage)
+        self.assertEqual(shared_storage['squares'], {1: 1, 2: 4, 3: 9, 4: 16})
+
+    def test_process_pool_flow_merges_shared(self):
+        shared_storage = {'numbers': [1, 2, 3], 'squares': {0: 0}}
+        ProcessSquares(start=StoreSquare(), max_workers=2).run(shared_storage)
+        self.assertEqual(shared_storage['squares'], {0: 0, 1: 1, 2: 4, 3: 9})
+
+    def test_process_pool_flow_merges_only_changed_keys(self):
+        for _ in range(3):
+            shared_storage = {'status': 'init'}
+            MarkAll(start=MarkFirst(), max_workers=2).run(shared_storage)
+            self.assertEqual(shared_storage, {'status': 'done0', 'seen': 'init'})
+
+    def test_nested_in_flow(self):
+        shared_storage = {'numbers': [5, 6]}
+        Flow(start=ProcessSquares(start=StoreSquare())).run(shared_storage)
+        self.assertEqual(shared_storage['squares'], {5: 25, 6: 36})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+import unittest
+import asyncio
+import pickle
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import (Node, AsyncNode, AsyncFlow, AsyncParallelBatchNode, AsyncParallelBatchFlow, ThreadPoolBatchNode, Flow, RateLimiter,
+                        ProcessPoolBatchNode, ProcessPoolBatchFlow, RetryPolicy, RetryBudget)
+
+class ProcessCalls(ProcessPoolBatchNode):
+    def prep(self, shared_storage):
+        return range(6)
+
+    def exec(self, item):
+        return item
+
+class Step(Node):
+    pass
+
+class ProcessItems(ProcessPoolBatchFlow):
+    def prep(self, shared_storage):
+        return [{'i': i} for i in range(3)]
+
+class Calls(AsyncParallelBatchNode):
+    async def prep_async(self, shared_storage):
+        return shared_storage['prompts']
+
+    async def exec_async(self, prompt):
+        self.params['times'].append(time.monotonic())
+        return prompt
+
+    def estimate_tokens(self, prompt):
+        return len(prompt)
+
+class TestRateLimiter(unittest.TestCase):
+    def test_burst_then_paced(self):
+        limiter = RateLimiter(requests=20, per=1, burst=0.25)
+        start = time.monotonic()
+        for _ in range(10):
+            limiter.acquire()
+        elapsed = time.monotonic() - start
+        self.assertGreaterEqual(elapsed, 0.23)
+        self.assertLess(elapsed, 0.4)
+
+    def test_weighted_tokens(self):
+        limiter = RateLimiter(tokens=100, per=1)
+        limiter.acquire(100)
+        start = time.monotonic()
+        limiter.acquire(20)
+        self.assertGreaterEqual(time.monotonic() - start, 0.18)
+
+    def test_adjust_charges_actual_usage(self):
+        limiter = RateLimiter(tokens=100, per=1)
+        limiter.acquire(10)
+        limiter.adjust(90)
+        start = time.monotonic()
+        limiter.acquire(10)
+        self.assertGreaterEqual(time.monotonic() - start, 0.08)
+
+    def test_wait_beyond_timeout_raises(self):
+        limiter = RateLimiter(requests=1, per=10)
+        limiter.acquire()
+        with self.assertRaises(TimeoutError):
+            limiter.acquire(timeout=0.1)
+
+    def test_thread_safe(self):
+        limiter = RateLimiter(requests=50, per=1, burst=0.1)
+        start = time.monotonic()
+        threads = [threading.Thread(target=limiter.acquire) for _ in range(20)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        self.assertGreaterEqual(time.monotonic() - start, 0.28)
+
+    def test_picklable(self):
+        limiter = pickle.loads(pickle.dumps(RateLimiter(requests=5)))
+        limiter.acquire()
+
+class TestRateLimitedNodes(unittest.TestCase):
+    def test_parallel_items_share_quota(self):
+        times = []
+        node = Calls(rate_limit=RateLimiter(requests=40, tokens=1000, per=1, burst=0.1))
+        node.set_params({'times': times})
+        asyncio.run(node.run_async({'prompts': ['x'] * 12}))
+        self.assertEqual(len(times), 12)
+        self.assertGreaterEqual(max(times) - min(times), 0.18)
+
+    def test_token_estimate(self):
+        times = []
+        node = Calls(rate_limit=RateLimiter(tokens=100, per=1, burst=0.5))
+        node.set_params({'times': times})
+        asyncio.run(node.run_async({'prompts': ['x' * 50, 'y' * 50]}))
+        self.assertGreaterEqual(times[1] - times[0], 0.45)
+
+    def test_batch_flows_share_limiter(self):
+        limiter, times = RateLimiter(requests=50, per=1, burst=0.1), []
+
+        class Call(AsyncNode):
+            async def exec_async(self, prep_result):
+                times.append(time.monotonic())
+
+        class Runs(AsyncParallelBatchFlow):
+            async def prep_async(self, shared_storage):
+                return [{'i': i} for i in range(10)]
+
+        asyncio.run(Runs(start=AsyncFlow(start=Call(rate_limit=limiter))).run_async({}))
+        self.assertGreaterEqual(max(times) - min(times), 0.08)
+
+    def test_thread_pool_node(self):
+        times = []
+
+        class Call(ThreadPoolBatchNode):
+            def prep(self, shared_storage):
+                return range(10)
+
+            def exec(self, item):
+                times.append(time.monotonic())
+
+        Call(max_workers=10, rate_limit=RateLimiter(requests=50, per=1, burst=0.1)).run({})
+        self.assertGreaterEqual(max(times) - min(times), 0.08)
+
+    def test_deadline_wait_goes_to_fallback(self):
+        class Call(Node):
+            def exec(self, prep_result):
+                return 'ok'
+
+            def exec_fallback(self, prep_result, exc):
+                return type(exc).__name__
+
+            def post(self, shared_storage, prep_result, exec_result):
+                shared_storage.setdefault('results', []).append(exec_result)
+
+        limiter = RateLimiter(requests=1, per=10)
+        shared_storage = {}
+        for _ in range(2):
+            Flow(start=Call(rate_limit=limiter), timeout=0.5).run(shared_storage)
+        self.assertEqual(shared_storage['results'], ['ok', 'TimeoutError'])
+
+    def test_process_pools_refuse_shared_state(self):
+        with self.assertRaises(TypeError):
+            ProcessCalls(max_workers=3, rate_limit=RateLimiter(requests=1, per=1)).run({})
+        with self.assertRaises(TypeError):
+            ProcessItems(start=Step(retry=RetryPolicy(budget=RetryBudget())), max_workers=2).run({})
+        ProcessCalls(max_workers=2).run({})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import unittest
+import asyncio
+import sys
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, AsyncNode, RetryPolicy, RetryBudget
+
+class RateLimited(Exception):
+    def __init__(self, retry_after=None, headers=None):
+        super().__init__("rate limited")
+        if retry_after is not None:
+            self.retry_after = retry_after
+        if headers is not None:
+            self.response = type("Response", (), {"headers": headers})()
+
+class FailNTimes(Node):
+    def __init__(self, failures, exc=None, **kwargs):
+        super().__init__(**kwargs)
+        self.failures, self.exc, self.calls = failures, exc or RateLimited(), 0
+
+    def exec(self, prep_result):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.exc
+        return "ok"
+
+    def exec_fallback(self, prep_result, exc):
+        return "fallback"
+
+class AsyncFailNTimes(AsyncNode):
+    def __init__(self, failures, **kwargs):
+        super().__init__(**kwargs)
+        self.failures, self.calls = failures, 0
+
+    async def exec_async(self, prep_result):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RateLimited()
+        return "ok"
+
+    async def exec_fallback_async(self, prep_result, exc):
+        return "fallback"
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_exponential_delays_are_capped(self):
+        policy = RetryPolicy(base=1, max_delay=5, jitter=False)
+        self.assertEqual([policy.delay(a, ValueError()) for a in range(5)], [1, 2, 4, 5, 5])
+
+    def test_full_jitter_stays_within_bound(self):
+        policy = RetryPolicy(base=1, max_delay=8)
+        for attempt in range(6):
+            self.assertTrue(0 <= policy.delay(attempt, ValueError()) <= min(8, 2 ** attempt))
+
+    def test_retry_after_hints(self):
+        policy = RetryPolicy(base=0.1, jitter=False)
+        self.assertEqual(policy.delay(0, RateLimited(retry_after=3)), 3)
+        self.assertEqual(policy.delay(0, RateLimited(headers={"Retry-After": "7"})), 7)
+        self.assertEqual(policy.delay(0, RateLimited(headers={"Retry-After": "garbage"})), 0.1)
+        http_date = policy.delay(0, RateLimited(headers={"Retry-After": "Wed, 21 Oct 2099 07:28:00 GMT"}))
+        self.assertGreater(http_date, 1000)
+
+    def test_node_sleeps_policy_delay(self):
+        node = FailNTimes(2, max_retries=3, retry=RetryPolicy(base=0.5, jitter=False))
+        with mock.patch("pocketflow.time.sleep") as sleep:
+            self.assertEqual(node._exec(None), "ok")
+        self.assertEqual([c.args[0] for c in sleep.call_args_list], [0.5, 1.0])
+
+    def test_non_retryable_exception_falls_back_immediately(self):
+        node = FailNTimes(5, exc=KeyError("x"), max_retries=5, retry=RetryPolicy(base=0, retry_on=(RateLimited,)))
+        self.assertEqual(node._exec(None), "fallback")
+        self.assertEqual(node.calls, 1)
+
+    def test_fixed_wait_unchanged_without_policy(self):
+        node = FailNTimes(1, max_retries=2, wait=0.25)
+        with mock.patch("pocketflow.time.sleep") as sleep:
+            self.assertEqual(node._exec(None), "ok")
+        sleep.assert_called_once_with(0.25)
+
+class TestRetryBudget(unittest.TestCase):
+    def test_budget_shared_across_nodes(self):
+        policy = RetryPolicy(base=0, budget=RetryBudget(max_tokens=3, refill=0))
+        first, second = FailNTimes(10, max_retries=3, retry=policy), FailNTimes(10, max_retries=3, retry=policy)
+        self.assertEqual(first._exec(None), "fallback")
+        self.assertEqual(second._exec(None), "fallback")
+        self.assertEqual(first.calls + second.calls, 5)
+
+    def test_success_refills_budget(self):
+        budget = RetryBudget(max_tokens=2, refill=0.5)
+        budget.withdraw(); budget.withdraw()
+        self.assertFalse(budget.withdraw())
+        node = FailNTimes(0, retry=RetryPolicy(budget=budget))
+        node._exec(None); node._exec(None)
+        self.assertTrue(budget.withdraw())
+
+    def test_budget_is_picklable(self):
+        import pickle
+        budget = pickle.loads(pickle.dumps(RetryBudget(max_tokens=4)))
+        self.assertTrue(budget.withdraw())
+        self.assertEqual(budget.tokens, 3)
+
+class TestAsyncRetryPolicy(unittest.TestCase):
+    def test_async_backoff_and_budget(self):
+        policy = RetryPolicy(base=0.001, max_delay=0.01, budget=RetryBudget(max_tokens=1, refill=0))
+        node = AsyncFailNTimes(2, max_retries=5, retry=policy)
+        self.assertEqual(asyncio.run(node._exec(None)), "fallback")
+        self.assertEqual(node.calls, 2)
+
+    def test_async_recovers(self):
+        node = AsyncFailNTimes(2, max_retries=3, retry=RetryPolicy(base=0.001))
+        self.assertEqual(asyncio.run(node._exec(None)), "ok")
+
+if __name__ == '__main__':
+    unittest.main()
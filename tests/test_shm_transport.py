@@ -0,0 +1,105 @@
+import unittest
+import os
+import pickle
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, ProcessPoolBatchNode, ProcessPoolBatchFlow, SharedMemoryTransport, _unpack
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+BIG = 1 << 16
+
+class Reverse(ProcessPoolBatchNode):
+    def prep(self, shared_storage):
+        return shared_storage['blobs']
+
+    def exec(self, blob):
+        return {'pid': os.getpid(), 'blob': blob[::-1], 'type': type(blob).__name__}
+
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage['results'] = exec_result
+
+class Measure(Node):
+    def post(self, shared_storage, prep_result, exec_result):
+        i = self.params['i']
+        shared_storage.setdefault('sizes', {})[i] = len(shared_storage['payload']) + i
+
+class MeasureAll(ProcessPoolBatchFlow):
+    def prep(self, shared_storage):
+        return [{'i': i} for i in range(4)]
+
+class TestSharedMemoryTransport(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.transport = SharedMemoryTransport(threshold=BIG, dir=self.dir.name)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_large_buffers_travel_by_handle(self):
+        payload = {'raw': b'a' * BIG, 'buf': bytearray(b'b' * BIG), 'small': b'c' * 10}
+        with self.transport.session() as t:
+            packed = t.pack(payload)
+            self.assertLess(len(pickle.dumps(packed)), 1024)
+            self.assertEqual(len(os.listdir(t.dir)), 2)
+            out = _unpack(packed)
+            self.assertEqual(os.listdir(t.dir), [])
+        self.assertEqual(out, payload)
+        self.assertEqual(type(out['buf']), bytearray)
+
+    def test_small_payloads_stay_inline(self):
+        with self.transport.session() as t:
+            packed = t.pack([b'x' * 100, 'text', 42])
+            self.assertEqual(os.listdir(t.dir), [])
+            self.assertEqual(_unpack(packed), [b'x' * 100, 'text', 42])
+
+    def test_session_cleans_up_unconsumed_buffers(self):
+        with self.transport.session() as t:
+            t.pack(b'x' * BIG)
+        self.assertEqual(os.listdir(self.dir.name), [])
+
+    def test_kept_buffers_can_be_read_many_times(self):
+        with self.transport.session() as t:
+            packed = t.pack(b'x' * BIG, keep=True)
+            self.assertEqual(_unpack(packed), _unpack(packed))
+
+    @unittest.skipIf(numpy is None, "numpy not installed")
+    def test_numpy_arrays_are_mapped_not_copied(self):
+        array = numpy.arange(BIG, dtype=numpy.float64)
+        with self.transport.session() as t:
+            packed = t.pack(array)
+            self.assertEqual(len(packed.files), 1)
+            out = _unpack(packed)
+        numpy.testing.assert_array_equal(out, array)
+        out[0] = -1
+        self.assertEqual(array[0], 0)
+
+class TestProcessPoolTransport(unittest.TestCase):
+    def test_batch_node(self):
+        blobs = [bytes([i]) * BIG + b'!' for i in range(4)] + [bytearray(b'tiny')]
+        shared_storage = {'blobs': blobs}
+        Reverse(max_workers=2, transport=SharedMemoryTransport(threshold=BIG)).run(shared_storage)
+        self.assertEqual([r['blob'] for r in shared_storage['results']], [b[::-1] for b in blobs])
+        self.assertEqual([r['type'] for r in shared_storage['results']], ['bytes'] * 4 + ['bytearray'])
+        self.assertNotIn(os.getpid(), {r['pid'] for r in shared_storage['results']})
+
+    def test_batch_node_in_chunks(self):
+        shared_storage = {'blobs': [b'x' * BIG, b'y' * BIG, b'z' * BIG]}
+        Reverse(max_workers=2, batch_size=2, transport=True).run(shared_storage)
+        self.assertEqual([r['blob'][:1] for r in shared_storage['results']], [b'x', b'y', b'z'])
+
+    def test_batch_flow_ships_shared_once(self):
+        with tempfile.TemporaryDirectory() as d:
+            shared_storage = {'payload': b'p' * BIG}
+            MeasureAll(start=Measure(), max_workers=2, transport=SharedMemoryTransport(threshold=BIG, dir=d)).run(shared_storage)
+            self.assertEqual(os.listdir(d), [])
+        self.assertEqual(shared_storage['sizes'], {i: BIG + i for i in range(4)})
+
+if __name__ == '__main__':
+    unittest.main()
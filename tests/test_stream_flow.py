@@ -0,0 +1,155 @@
+import unittest
+import asyncio
+import time
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Flow, StreamNode, StreamFlow, AsyncStreamNode, AsyncStreamFlow
+
+class Split(StreamNode):
+    flatten = True
+
+    def prep(self, shared_storage):
+        return shared_storage['docs']
+
+    def exec(self, doc):
+        return doc.split()
+
+class Upper(StreamNode):
+    def exec(self, word):
+        return word.upper()
+
+class Collect(StreamNode):
+    def exec(self, word):
+        return word
+
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage['words'] = exec_result
+        return "collected"
+
+class AsyncStage(AsyncStreamNode):
+    def __init__(self, name, delay, log, flatten=False, source=None, **kwargs):
+        super().__init__(**kwargs)
+        self.name, self.delay, self.log, self.flatten, self.source = name, delay, log, flatten, source
+
+    async def prep_async(self, shared_storage):
+        return self.source
+
+    async def exec_async(self, item):
+        self.log.append((self.name, item))
+        await asyncio.sleep(self.delay)
+        return [f"{item}.{i}" for i in range(2)] if self.flatten else f"{self.name}({item})"
+
+    async def post_async(self, shared_storage, prep_result, exec_result):
+        shared_storage.setdefault('posts', []).append((self.name, exec_result))
+
+class TestStreamFlow(unittest.TestCase):
+    def test_sync_pipeline(self):
+        split, upper, collect = Split(), Upper(), Collect()
+        split >> upper >> collect
+        shared_storage = {'docs': ['a b', 'c']}
+        action = StreamFlow(start=split).run(shared_storage)
+        self.assertEqual(shared_storage['words'], ['A', 'B', 'C'])
+        self.assertEqual(action, "collected")
+
+    def test_sync_items_flow_through_one_at_a_time(self):
+        log = []
+
+        class Source(StreamNode):
+            def prep(self, shared_storage):
+                def gen():
+                    for i in range(3):
+                        log.append(('produce', i))
+                        yield i
+                return gen()
+
+            def exec(self, i):
+                return i
+
+        class Sink(StreamNode):
+            def exec(self, i):
+                log.append(('consume', i))
+                return i
+
+        source = Source()
+        source >> Sink()
+        StreamFlow(start=source).run({})
+        self.assertEqual(log, [('produce', 0), ('consume', 0), ('produce', 1), ('consume', 1), ('produce', 2), ('consume', 2)])
+
+    def test_cycle_rejected(self):
+        a, b = Upper(), Upper()
+        a >> b >> a
+        with self.assertRaises(ValueError):
+            StreamFlow(start=a).run({})
+
+class TestAsyncStreamFlow(unittest.TestCase):
+    def test_stages_overlap(self):
+        log, shared_storage = [], {}
+        chunk = AsyncStage('chunk', 0.02, log, flatten=True, source=['d0', 'd1', 'd2'])
+        embed = AsyncStage('embed', 0.02, log)
+        index = AsyncStage('index', 0.0, log)
+        chunk >> embed >> index
+        start = time.perf_counter()
+        asyncio.run(AsyncStreamFlow(start=chunk).run_async(shared_storage))
+        elapsed = time.perf_counter() - start
+        self.assertLess(elapsed, 0.06 + 0.12)
+        self.assertLess(log.index(('embed', 'd0.0')), log.index(('chunk', 'd2')))
+        self.assertEqual(shared_storage['posts'][0], ('chunk', None))
+        self.assertEqual(shared_storage['posts'][2][1], [f"index(embed(d{d}.{i}))" for d in range(3) for i in range(2)])
+
+    def test_backpressure_bounds_queue(self):
+        log, shared_storage = [], {}
+        fast = AsyncStage('fast', 0, log, source=range(50))
+        slow = AsyncStage('slow', 0.005, log)
+        fast >> slow
+        asyncio.run(AsyncStreamFlow(start=fast, maxsize=2).run_async(shared_storage))
+        ahead = max(sum(1 for n, _ in log[:k] if n == 'fast') - sum(1 for n, _ in log[:k] if n == 'slow') for k in range(len(log)))
+        self.assertLessEqual(ahead, 6)
+
+    def test_async_iterable_source(self):
+        async def source():
+            for i in range(3):
+                yield i
+
+        log, shared_storage = [], {}
+        only = AsyncStage('only', 0, log, source=source())
+        asyncio.run(AsyncStreamFlow(start=only).run_async(shared_storage))
+        self.assertEqual(shared_storage['posts'], [('only', ['only(0)', 'only(1)', 'only(2)'])])
+
+    def test_stage_failure_cancels_pipeline(self):
+        class Fail(AsyncStreamNode):
+            async def exec_async(self, item):
+                if item == "src(3)":
+                    raise RuntimeError("bad item")
+                return item
+
+        log = []
+        src = AsyncStage('src', 0, log, source=range(100))
+        src >> Fail()
+        with self.assertRaises(RuntimeError):
+            asyncio.run(AsyncStreamFlow(start=src, maxsize=1).run_async({}))
+        self.assertLess(len(log), 100)
+
+    def test_retry_per_item(self):
+        attempts = {}
+
+        class Flaky(AsyncStreamNode):
+            async def prep_async(self, shared_storage):
+                return [1, 2]
+
+            async def exec_async(self, item):
+                attempts[item] = attempts.get(item, 0) + 1
+                if attempts[item] < 2:
+                    raise ValueError("transient")
+                return item
+
+            async def post_async(self, shared_storage, prep_result, exec_result):
+                shared_storage['out'] = exec_result
+
+        shared_storage = {}
+        asyncio.run(AsyncStreamFlow(start=Flaky(max_retries=2)).run_async(shared_storage))
+        self.assertEqual(shared_storage['out'], [1, 2])
+
+if __name__ == '__main__':
+    unittest.main()
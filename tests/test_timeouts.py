@@ -0,0 +1,187 @@
+import unittest
+import asyncio
+import sqlite3
+import threading
+import time
+from unittest import mock
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from pocketflow import Node, AsyncNode, Flow, AsyncFlow, BatchFlow, AsyncParallelBatchNode, ThreadPoolBatchFlow
+
+class SleepNode(Node):
+    def prep(self, shared_storage):
+        return self.params.get('delay', shared_storage.get('delay', 0))
+
+    def exec(self, delay):
+        self.attempts = getattr(self, 'attempts', 0) + 1
+        time.sleep(delay)
+        return "done"
+
+    def exec_fallback(self, prep_result, exc):
+        return type(exc).__name__
+
+    def post(self, shared_storage, prep_result, exec_result):
+        shared_storage.setdefault('results', []).append(exec_result)
+
+class AsyncSleepNode(AsyncNode):
+    async def prep_async(self, shared_storage):
+        return shared_storage['delay']
+
+    async def exec_async(self, delay):
+        await asyncio.sleep(delay)
+        return "done"
+
+    async def exec_fallback_async(self, prep_result, exc):
+        return type(exc).__name__
+
+    async def post_async(self, shared_storage, prep_result, exec_result):
+        shared_storage.setdefault('results', []).append(exec_result)
+
+class TestNodeTimeout(unittest.TestCase):
+    def test_sync_timeout_triggers_fallback(self):
+        shared_storage = {'delay': 0.5}
+        start = time.perf_counter()
+        SleepNode(timeout=0.05).run(shared_storage)
+        self.assertLess(time.perf_counter() - start, 0.3)
+        self.assertEqual(shared_storage['results'], ['TimeoutError'])
+
+    def test_sync_timeout_is_retried(self):
+        node = SleepNode(max_retries=3, timeout=0.02)
+        node.run({'delay': 0.1})
+        self.assertEqual(node.attempts, 3)
+
+    def test_sync_exception_propagates_through_thread(self):
+        class Boom(Node):
+            def exec(self, prep_result):
+                raise KeyError("boom")
+
+        with self.assertRaises(KeyError):
+            Boom(timeout=1).run({})
+
+    def test_fast_exec_unaffected(self):
+        shared_storage = {'delay': 0}
+        SleepNode(timeout=1).run(shared_storage)
+        self.assertEqual(shared_storage['results'], ['done'])
+
+    def test_async_timeout(self):
+        shared_storage = {'delay': 1}
+        asyncio.run(AsyncSleepNode(timeout=0.05).run_async(shared_storage))
+        self.assertEqual(shared_storage['results'], ['TimeoutError'])
+
+    def test_straggler_does_not_hold_parallel_batch(self):
+        class Items(AsyncParallelBatchNode):
+            async def prep_async(self, shared_storage):
+                return [0.01, 5, 0.01]
+
+            async def exec_async(self, delay):
+                await asyncio.sleep(delay)
+                return delay
+
+            async def exec_fallback_async(self, prep_result, exc):
+                return None
+
+            async def post_async(self, shared_storage, prep_result, exec_result):
+                shared_storage['results'] = exec_result
+
+        shared_storage = {}
+        start = time.perf_counter()
+        asyncio.run(Items(timeout=0.1).run_async(shared_storage))
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertEqual(shared_storage['results'], [0.01, None, 0.01])
+
+    def test_untimed_exec_skips_wrappers(self):
+        shared_storage = {'delay': 0}
+        with mock.patch('pocketflow._call_with_timeout', side_effect=AssertionError), mock.patch('pocketflow._wait_for', side_effect=AssertionError):
+            Flow(start=SleepNode()).run(shared_storage)
+            asyncio.run(AsyncFlow(start=AsyncSleepNode()).run_async(shared_storage))
+        self.assertEqual(shared_storage['results'], ['done', 'done'])
+
+class TestFlowDeadline(unittest.TestCase):
+    def test_deadline_stops_flow(self):
+        a, b, c = SleepNode(), SleepNode(), SleepNode()
+        a >> b >> c
+        shared_storage = {'delay': 0.06}
+        with self.assertRaises(TimeoutError):
+            Flow(start=a, timeout=0.1).run(shared_storage)
+        self.assertEqual(shared_storage['results'], ['done', 'TimeoutError'])
+
+    def test_node_timeout_clipped_to_deadline(self):
+        shared_storage = {'delay': 1}
+        start = time.perf_counter()
+        Flow(start=SleepNode(timeout=10), timeout=0.05).run(shared_storage)
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(shared_storage['results'], ['TimeoutError'])
+
+    def test_batch_items_share_deadline(self):
+        class Batch(BatchFlow):
+            def prep(self, shared_storage):
+                return [{'delay': 0.04}] * 10
+
+        shared_storage = {}
+        with self.assertRaises(TimeoutError):
+            Batch(start=SleepNode(), timeout=0.1).run(shared_storage)
+        self.assertLess(len(shared_storage['results']), 10)
+
+    def test_nested_flow_inherits_tighter_deadline(self):
+        inner = Flow(start=SleepNode(timeout=10), timeout=10)
+        shared_storage = {'delay': 1}
+        Flow(start=inner, timeout=0.05).run(shared_storage)
+        self.assertEqual(shared_storage['results'], ['TimeoutError'])
+
+    def test_thread_pool_items_inherit_deadline(self):
+        class Batch(ThreadPoolBatchFlow):
+            def prep(self, shared_storage):
+                return [{'delay': 1}] * 3
+
+        shared_storage = {}
+        start = time.perf_counter()
+        Batch(start=SleepNode(timeout=10), max_workers=3, timeout=0.05).run(shared_storage)
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(shared_storage['results'], ['TimeoutError'] * 3)
+
+    def test_deadline_alone_runs_exec_inline(self):
+        class Query(Node):
+            def prep(self, shared_storage):
+                self.conn = sqlite3.connect(':memory:')
+                return threading.get_ident()
+
+            def exec(self, caller):
+                self.conn.execute('select 1').fetchone()
+                return threading.get_ident() == caller
+
+            def post(self, shared_storage, prep_result, exec_result):
+                shared_storage['inline'] = exec_result
+
+        shared_storage = {}
+        Flow(start=Query(), timeout=60).run(shared_storage)
+        self.assertTrue(shared_storage['inline'])
+
+    def test_deadline_checked_after_inline_exec(self):
+        shared_storage = {'delay': 0.1}
+        Flow(start=SleepNode(), timeout=0.05).run(shared_storage)
+        self.assertEqual(shared_storage['results'], ['TimeoutError'])
+
+    def test_retry_wait_clipped_to_deadline(self):
+        class Flaky(Node):
+            def exec(self, prep_result):
+                raise ValueError("flaky")
+
+            def exec_fallback(self, prep_result, exc):
+                return type(exc).__name__
+
+        start = time.perf_counter()
+        Flow(start=Flaky(max_retries=3, wait=5), timeout=0.1).run({})
+        self.assertLess(time.perf_counter() - start, 1)
+
+    def test_async_deadline(self):
+        a, b, c = AsyncSleepNode(), AsyncSleepNode(), AsyncSleepNode()
+        a >> b >> c
+        shared_storage = {'delay': 0.06}
+        with self.assertRaises(TimeoutError):
+            asyncio.run(AsyncFlow(start=a, timeout=0.1).run_async(shared_storage))
+        self.assertEqual(shared_storage['results'], ['done', 'TimeoutError'])
+
+if __name__ == '__main__':
+    unittest.main()